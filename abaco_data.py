@@ -2,23 +2,96 @@
 Modulo per la gestione dei dati, come il caricamento del vocabolario.
 """
 import os
+import sys
 import json
-from typing import Set, List
+import mmap
+import struct
+import hashlib
+import argparse
+import logging
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from cache import LRUCache
+from ingestion import ingerisci
+from scores import ScoreStore
+
+logger = logging.getLogger(__name__)
+
+ALFABETO = 'abcdefghijklmnopqrstuvwxyz'
+
+# Identificativo del dizionario usato quando non ne viene indicato un altro
+DIZIONARIO_PREDEFINITO = 'italiano'
 
 ARTICOLI = {
     "il", "lo", "la", "i", "gli", "le", "un", "uno", "una", "un'"
 }
 
+# Formato binario del dizionario compilato (little-endian):
+#   intestazione: magic, versione del formato, collazione, digest del contenuto,
+#                 poi (numero di parole, posizione) per ciascuna sezione
+#   sezione:      (n + 1) offset uint32 relativi al blob, seguiti dal blob UTF-8
+#                 delle parole ordinate e concatenate
+#   Con una collazione diversa da 'codepoint', dopo le parole da indovinare
+#   segue la sezione delle chiavi di ordinamento del vocabolario.
+MAGIC_BINARIO = b'ABACOVOC'
+VERSIONE_FORMATO = 1
+_INTESTAZIONE = struct.Struct('<8sHH16sIQIQ')
+
+def _identita(parola: str) -> str:
+    return parola
+
+def piega_accenti(testo: str) -> str:
+    """Rimuove i segni diacritici da un testo ("città" -> "citta")."""
+    if testo.isascii():
+        return testo
+    return ''.join(c for c in unicodedata.normalize('NFD', testo) if not unicodedata.combining(c))
+
+def chiave_italiana(parola: str) -> str:
+    """
+    Chiave di ordinamento secondo l'uso dei dizionari italiani: le parole si
+    confrontano senza accenti e, a parità, la forma non accentata precede
+    quella accentata ("citta" < "città" < "cittadino").
+
+    La chiave è la parola stessa se non ha accenti, altrimenti la forma senza
+    accenti seguita da un separatore e dalla parola originale. Dato che il
+    separatore precede ogni lettera, le chiavi che iniziano con un prefisso
+    senza accenti sono contigue nell'ordine delle chiavi.
+    """
+    piegata = piega_accenti(parola)
+    return parola if piegata == parola else f"{piegata}\0{parola}"
+
+# Collazioni disponibili: nome -> (identificativo nel file binario, chiave di
+# ordinamento delle parole, piegatura dei prefissi)
+COLLAZIONI: Dict[str, Tuple[int, Callable[[str], str], Callable[[str], str]]] = {
+    'codepoint': (0, _identita, _identita),
+    'italiano': (1, chiave_italiana, piega_accenti),
+}
+
+# Collazione usata quando un dizionario non ne indica una
+COLLAZIONE_PREDEFINITA = os.environ.get('COLLAZIONE', 'codepoint')
+
+def _collazione(nome: str) -> Tuple[int, Callable[[str], str], Callable[[str], str]]:
+    if nome not in COLLAZIONI:
+        raise ValueError(f"Collazione sconosciuta: {nome}. Disponibili: {', '.join(COLLAZIONI)}")
+    return COLLAZIONI[nome]
+
 def carica_parole_da_indovinare(file_path: str) -> List[str]:
     """
-    Carica un elenco di parole da un file di testo, una parola per riga,
-    e le filtra per rimuovere articoli e parole troppo corte.
+    Carica un elenco di parole da un file di testo (anche compresso con
+    gzip o xz), una parola per riga, e le filtra per rimuovere articoli e
+    parole troppo corte.
 
     Args:
         file_path: Il percorso del file di testo.
 
     Returns:
-        Una lista di parole filtrate.
+        Una lista ordinata di parole normalizzate e filtrate.
         
     Raises:
         FileNotFoundError: Se il file non viene trovato.
@@ -26,25 +99,260 @@ def carica_parole_da_indovinare(file_path: str) -> List[str]:
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File delle parole da indovinare non trovato in: {file_path}")
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        parole = {line.strip().lower() for line in f if line.strip()}
-    
     # Filtra gli articoli e le parole con 1 o 2 caratteri
-    parole_filtrate = [
-        parola for parola in parole 
-        if parola not in ARTICOLI and len(parola) > 2
-    ]
-    return parole_filtrate
+    return ingerisci(file_path, lunghezza_minima=3, escluse=ARTICOLI)
 
-def carica_vocabolario(file_path: str) -> Set[str]:
+class VocabularyIndex:
     """
-    Carica un elenco di parole da un file di testo, una parola per riga.
+    Indice ordinato del vocabolario.
+
+    Mantiene le parole in un array ordinato (per le ricerche per intervallo e
+    per prefisso tramite bisezione) e in un set (per l'appartenenza in O(1)).
+
+    L'ordine è quello della collazione scelta: le chiavi di ordinamento sono
+    calcolate una sola volta al caricamento e tutte le ricerche e i confronti
+    avvengono sulle chiavi (con 'codepoint' le chiavi sono le parole stesse).
+    I prefissi vengono confrontati nella forma piegata dalla collazione, per
+    cui con 'italiano' il prefisso "citta" comprende anche "città".
+
+    L'array ordinato è anche una rappresentazione compatta del trie delle
+    parole: ogni nodo corrisponde all'intervallo contiguo di parole che
+    condividono il suo prefisso, e i figli si visitano saltando da un
+    intervallo al successivo con una ricerca binaria.
+
+    Attributes:
+        parole (Sequence[str]): Le parole del vocabolario in ordine crescente.
+        chiavi (Sequence[str]): Le chiavi di ordinamento, parallele alle parole.
+        collazione (str): Il nome della collazione (vedi COLLAZIONI).
+        versione (str): Impronta del contenuto del vocabolario.
+    """
+
+    def __init__(self, parole: Iterable[str], versione: Optional[str] = None,
+                 collazione: str = COLLAZIONE_PREDEFINITA):
+        """
+        Costruisce l'indice a partire da un insieme di parole.
+
+        Args:
+            parole: Le parole del vocabolario (già in minuscolo).
+            versione: Impronta del contenuto. Se None, viene calcolata.
+            collazione: Il nome della collazione che determina l'ordine.
+
+        Raises:
+            ValueError: Se la collazione non esiste.
+        """
+        _, self.chiave, self.piega = _collazione(collazione)
+        self.collazione = collazione
+        self._insieme: Optional[frozenset] = frozenset(parole)
+        if self.chiave is _identita:
+            self.parole: Sequence[str] = sorted(self._insieme)
+            self.chiavi: Sequence[str] = self.parole
+        else:
+            coppie = sorted((self.chiave(parola), parola) for parola in self._insieme)
+            self.chiavi = [chiave for chiave, _ in coppie]
+            self.parole = [parola for _, parola in coppie]
+        self.versione: str = versione or _impronta('\n'.join(self.parole).encode('utf-8'))
+
+    @classmethod
+    def from_sorted(cls, parole: Sequence[str], versione: str, chiavi: Optional[Sequence[str]] = None,
+                    collazione: str = 'codepoint') -> 'VocabularyIndex':
+        """
+        Costruisce l'indice su una sequenza già ordinata e senza duplicati,
+        senza copiarla (ad esempio le parole di un dizionario mappato in memoria).
+        L'appartenenza viene allora verificata con una ricerca binaria.
+
+        Con una collazione diversa da 'codepoint' servono anche le chiavi
+        di ordinamento, parallele alle parole.
+        """
+        indice = cls.__new__(cls)
+        _, indice.chiave, indice.piega = _collazione(collazione)
+        indice.collazione = collazione
+        indice._insieme = None
+        indice.parole = parole
+        indice.chiavi = parole if chiavi is None else chiavi
+        indice.versione = versione
+        return indice
+
+    def __contains__(self, parola: object) -> bool:
+        if self._insieme is not None:
+            return parola in self._insieme
+        if not isinstance(parola, str):
+            return False
+        i = bisect_left(self.chiavi, self.chiave(parola))
+        return i < len(self.parole) and self.parole[i] == parola
+
+    def __len__(self) -> int:
+        return len(self.parole)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.parole)
+
+    def bounds(self, min_word: str, max_word: str) -> Tuple[int, int]:
+        """
+        Restituisce gli indici [inizio, fine) delle parole comprese tra
+        min_word e max_word (estremi inclusi).
+        """
+        inizio = bisect_left(self.chiavi, self.chiave(min_word))
+        fine = bisect_right(self.chiavi, self.chiave(max_word), inizio)
+        return inizio, max(inizio, fine)
+
+    def range(self, min_word: str, max_word: str) -> List[str]:
+        """Restituisce le parole comprese tra min_word e max_word (estremi inclusi)."""
+        inizio, fine = self.bounds(min_word, max_word)
+        return self.parole[inizio:fine]
+
+    def count_between(self, min_word: str, max_word: str) -> int:
+        """Conta le parole comprese tra min_word e max_word (estremi inclusi)."""
+        inizio, fine = self.bounds(min_word, max_word)
+        return fine - inizio
+
+    def prefix_bounds(self, prefisso: str) -> Tuple[int, int]:
+        """
+        Restituisce gli indici [inizio, fine) delle parole che iniziano con
+        il prefisso dato (nella forma piegata dalla collazione). L'intervallo
+        è vuoto se nessuna parola lo ha.
+        """
+        prefisso = self.piega(prefisso)
+        inizio = bisect_left(self.chiavi, prefisso)
+        if not prefisso:
+            return inizio, len(self.parole)
+        # Tutte le chiavi con il prefisso precedono il prefisso "incrementato"
+        successivo = prefisso[:-1] + chr(ord(prefisso[-1]) + 1)
+        fine = bisect_left(self.chiavi, successivo, inizio)
+        return inizio, fine
+
+    def has_prefix_between(self, prefisso: str, min_word: str, max_word: str) -> bool:
+        """
+        Indica se esiste almeno una parola che inizia con il prefisso
+        e che è compresa tra min_word e max_word (estremi inclusi).
+        """
+        inizio, fine = self.prefix_bounds(prefisso)
+        r_inizio, r_fine = self.bounds(min_word, max_word)
+        return max(inizio, r_inizio) < min(fine, r_fine)
+
+    def completions(self, prefisso: str, min_word: str, max_word: str,
+                    limite: int, dopo: Optional[str] = None) -> Tuple[List[str], bool]:
+        """
+        Restituisce (in ordine) fino a `limite` parole che iniziano con il
+        prefisso e sono comprese tra min_word e max_word (estremi inclusi).
+
+        Args:
+            prefisso: Il prefisso da completare.
+            min_word: L'estremo inferiore del range (incluso).
+            max_word: L'estremo superiore del range (incluso).
+            limite: Il numero massimo di parole restituite.
+            dopo: Cursore di paginazione: se indicato, restituisce solo le
+                parole successive a questa.
+
+        Returns:
+            Una tupla (parole, altre) dove altre indica se ci sono altre
+            parole oltre quelle restituite.
+        """
+        inizio, fine = self.prefix_bounds(prefisso)
+        r_inizio, r_fine = self.bounds(min_word, max_word)
+        inizio, fine = max(inizio, r_inizio), min(fine, r_fine)
+        if dopo is not None:
+            inizio = max(inizio, bisect_right(self.chiavi, self.chiave(dopo), inizio, max(inizio, fine)))
+        stop = min(fine, inizio + limite)
+        return list(self.parole[inizio:stop]), stop < fine
+
+    def child_letters(self, prefisso: str, min_word: str, max_word: str,
+                      alfabeto: str = ALFABETO) -> List[str]:
+        """
+        Restituisce le lettere c (in ordine) tali che esiste almeno una parola
+        che inizia con prefisso + c e che è compresa tra min_word e max_word.
+
+        Il costo è O(k log N) per k figli, senza enumerare le parole.
+
+        Args:
+            prefisso: Il prefisso (nodo del trie) da espandere.
+            min_word: L'estremo inferiore del range (incluso).
+            max_word: L'estremo superiore del range (incluso).
+            alfabeto: Le lettere ammesse come figli.
+        """
+        inizio, fine = self.prefix_bounds(prefisso)
+        r_inizio, r_fine = self.bounds(min_word, max_word)
+        i, fine = max(inizio, r_inizio), min(fine, r_fine)
+        prefisso = self.piega(prefisso)
+        posizione = len(prefisso)
+        lettere = []
+        while i < fine:
+            chiave = self.chiavi[i]
+            if len(chiave) == posizione:
+                # La parola coincide con il prefisso: non ha una lettera figlia
+                i += 1
+                continue
+            lettera = chiave[posizione]
+            if lettera in alfabeto:
+                lettere.append(lettera)
+            # Salta direttamente al primo nodo fratello successivo
+            i = bisect_left(self.chiavi, prefisso + chr(ord(lettera) + 1), i + 1, fine)
+        return lettere
+
+class HintTable:
+    """
+    Tabella degli indizi: per ogni prefisso di ogni parola da indovinare,
+    la parola minima e massima del vocabolario che iniziano con quel prefisso.
+
+    I prefissi delle parole personalizzate (non presenti nella tabella)
+    vengono calcolati al primo uso e mantenuti in una cache LRU.
+    """
+
+    def __init__(self, vocabolario: VocabularyIndex, parole: Iterable[str], capacita_cache: int = 4096):
+        """
+        Precalcola la tabella.
+
+        Args:
+            vocabolario: L'indice del vocabolario.
+            parole: Le parole da indovinare.
+            capacita_cache: Il numero di prefissi personalizzati mantenuti in cache.
+        """
+        self.vocabolario = vocabolario
+        self._tabella: Dict[str, Tuple[str, str]] = {}
+        # I prefissi sono nella forma piegata dalla collazione, come quelli rivelati
+        for parola in map(vocabolario.piega, parole):
+            for i in range(1, len(parola) + 1):
+                prefisso = parola[:i]
+                if prefisso not in self._tabella:
+                    limiti = self._calcola(prefisso)
+                    if limiti is None:
+                        break
+                    self._tabella[prefisso] = limiti
+        self._personalizzati = LRUCache(capacita_cache)
+
+    def _calcola(self, prefisso: str) -> Optional[Tuple[str, str]]:
+        inizio, fine = self.vocabolario.prefix_bounds(prefisso)
+        if inizio >= fine:
+            return None
+        return self.vocabolario.parole[inizio], self.vocabolario.parole[fine - 1]
+
+    def limiti(self, prefisso: str) -> Optional[Tuple[str, str]]:
+        """
+        Restituisce la parola minima e massima del vocabolario che iniziano
+        con il prefisso, o None se nessuna parola lo ha.
+        """
+        limiti = self._tabella.get(prefisso)
+        if limiti is not None:
+            return limiti
+        limiti = self._personalizzati.get(prefisso, False)
+        if limiti is False:
+            limiti = self._calcola(prefisso)
+            self._personalizzati.put(prefisso, limiti)
+        return limiti
+
+    def __len__(self) -> int:
+        return len(self._tabella)
+
+def carica_vocabolario(file_path: str, collazione: str = COLLAZIONE_PREDEFINITA) -> VocabularyIndex:
+    """
+    Carica un elenco di parole da un file di testo (anche compresso con
+    gzip o xz), una parola per riga.
 
     Args:
         file_path: Il percorso del file di testo.
+        collazione: La collazione che determina l'ordine delle parole.
 
     Returns:
-        Un set di parole in minuscolo.
+        Un VocabularyIndex con le parole normalizzate (vedi normalizza_parola).
         
     Raises:
         FileNotFoundError: Se il file non viene trovato.
@@ -52,17 +360,569 @@ def carica_vocabolario(file_path: str) -> Set[str]:
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File del vocabolario non trovato in: {file_path}")
     
+    return VocabularyIndex(ingerisci(file_path), collazione=collazione)
+
+def _impronta(dati: bytes) -> str:
+    """Calcola l'impronta (esadecimale, 16 byte) di un contenuto."""
+    return hashlib.blake2b(dati, digest_size=16).hexdigest()
+
+class _ParoleMappate(Sequence):
+    """
+    Sequenza di parole ordinate lette direttamente da una sezione
+    del dizionario binario mappato in memoria.
+    """
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes], posizione: int, numero: int):
+        self._buffer = buffer
+        fine_offset = posizione + 4 * (numero + 1)
+        self._offset = memoryview(buffer)[posizione:fine_offset].cast('I')
+        self._blob = fine_offset
+        self._numero = numero
+        # Posizione del primo byte successivo alla sezione
+        self.fine = self._blob + self._offset[numero]
+
+    def __len__(self) -> int:
+        return self._numero
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._numero))]
+        if i < 0:
+            i += self._numero
+        if not 0 <= i < self._numero:
+            raise IndexError(i)
+        inizio = self._blob + self._offset[i]
+        fine = self._blob + self._offset[i + 1]
+        return self._buffer[inizio:fine].decode('utf-8')
+
+def _sezione_binaria(parole: List[str]) -> bytes:
+    """Codifica una lista ordinata di parole come sezione del formato binario."""
+    codificate = [p.encode('utf-8') for p in parole]
+    offset = [0]
+    for parola in codificate:
+        offset.append(offset[-1] + len(parola))
+    return struct.pack(f'<{len(offset)}I', *offset) + b''.join(codificate)
+
+def compila_dizionario(vocabolario_path: str, parole_path: str, output_path: str,
+                       collazione: str = COLLAZIONE_PREDEFINITA, ortografico_path: Optional[str] = None) -> str:
+    """
+    Compila il vocabolario e le parole da indovinare in un file binario
+    che può essere mappato in memoria da carica_dizionario_binario.
+
+    I worker ricaricano il dizionario quando cambia il file binario: l'indice
+    ortografico della nuova versione viene quindi scritto prima di pubblicarlo.
+
+    Args:
+        vocabolario_path: Il file di testo del vocabolario.
+        parole_path: Il file di testo delle parole da indovinare.
+        output_path: Il percorso del file binario da scrivere.
+        collazione: La collazione che determina l'ordine delle parole.
+        ortografico_path: Il percorso base dell'indice dei suggerimenti
+            ortografici (opzionale).
+
+    Returns:
+        La versione (impronta del contenuto) del vocabolario compilato.
+    """
+    id_collazione = _collazione(collazione)[0]
+    vocabolario = carica_vocabolario(vocabolario_path, collazione)
+    parole_da_indovinare = carica_parole_da_indovinare(parole_path)
+
+    sezione_vocabolario = _sezione_binaria(list(vocabolario.parole))
+    sezione_parole = _sezione_binaria(parole_da_indovinare)
+    posizione_vocabolario = _INTESTAZIONE.size
+    posizione_parole = posizione_vocabolario + len(sezione_vocabolario)
+    intestazione = _INTESTAZIONE.pack(
+        MAGIC_BINARIO, VERSIONE_FORMATO, id_collazione, bytes.fromhex(vocabolario.versione),
+        len(vocabolario), posizione_vocabolario,
+        len(parole_da_indovinare), posizione_parole,
+    )
+
+    # Scrittura atomica: i worker in esecuzione continuano a leggere il vecchio file
+    temporaneo = f"{output_path}.tmp"
+    with open(temporaneo, 'wb') as f:
+        f.write(intestazione)
+        f.write(sezione_vocabolario)
+        f.write(sezione_parole)
+        if vocabolario.chiavi is not vocabolario.parole:
+            # Chiavi precalcolate: il caricamento non deve ricalcolarle
+            f.write(_sezione_binaria(list(vocabolario.chiavi)))
+    if ortografico_path:
+        # Importato qui: spelling dipende a sua volta da questo modulo
+        from spelling import compila_indice_ortografico, elimina_indici_precedenti
+        compila_indice_ortografico(ortografico_path, vocabolario)
+    os.replace(temporaneo, output_path)
+    if ortografico_path:
+        elimina_indici_precedenti(ortografico_path, vocabolario)
+    return vocabolario.versione
+
+def carica_dizionario_binario(file_path: str, collazione: Optional[str] = None) -> Tuple[VocabularyIndex, List[str]]:
+    """
+    Mappa in memoria un dizionario compilato con compila_dizionario.
+
+    Le parole del vocabolario (e le loro chiavi di ordinamento) non vengono
+    copiate: le ricerche leggono direttamente le pagine del file, condivise
+    tra tutti i processi.
+
+    Args:
+        file_path: Il percorso del file binario.
+        collazione: La collazione richiesta; se None si accetta quella del file.
+
+    Returns:
+        Una tupla (vocabolario, parole da indovinare).
+
+    Raises:
+        FileNotFoundError: Se il file non viene trovato.
+        ValueError: Se il file non è un dizionario binario compatibile
+            o è stato compilato con un'altra collazione.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Dizionario binario non trovato in: {file_path}")
+    if sys.byteorder != 'little':
+        raise ValueError("Il dizionario binario richiede un'architettura little-endian.")
+
+    with open(file_path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < _INTESTAZIONE.size:
+        raise ValueError(f"Dizionario binario troncato: {file_path}")
+    (magic, versione_formato, id_collazione, digest,
+     n_vocabolario, posizione_vocabolario,
+     n_parole, posizione_parole) = _INTESTAZIONE.unpack_from(buffer)
+    if magic != MAGIC_BINARIO:
+        raise ValueError(f"{file_path} non è un dizionario binario.")
+    if versione_formato != VERSIONE_FORMATO:
+        raise ValueError(f"Versione del formato non supportata: {versione_formato}")
+    nome_collazione = next((nome for nome, (identificativo, _, _) in COLLAZIONI.items()
+                            if identificativo == id_collazione), None)
+    if nome_collazione is None:
+        raise ValueError(f"Collazione non supportata nel file: {id_collazione}")
+    if collazione is not None and collazione != nome_collazione:
+        raise ValueError(f"{file_path} è compilato con la collazione '{nome_collazione}', non '{collazione}'.")
+
+    parole = _ParoleMappate(buffer, posizione_vocabolario, n_vocabolario)
+    sezione_parole = _ParoleMappate(buffer, posizione_parole, n_parole)
+    chiavi = _ParoleMappate(buffer, sezione_parole.fine, n_vocabolario) if id_collazione else None
+    vocabolario = VocabularyIndex.from_sorted(parole, digest.hex(), chiavi, nome_collazione)
+    parole_da_indovinare = list(sezione_parole)
+    return vocabolario, parole_da_indovinare
+
+def carica_dizionario(vocabolario_path: str, parole_path: str, binario_path: Optional[str] = None,
+                      collazione: str = COLLAZIONE_PREDEFINITA) -> Tuple[VocabularyIndex, List[str]]:
+    """
+    Carica vocabolario e parole da indovinare, preferendo il dizionario
+    binario compilato e ripiegando sui file di testo se non è disponibile.
+
+    Args:
+        vocabolario_path: Il file di testo del vocabolario.
+        parole_path: Il file di testo delle parole da indovinare.
+        binario_path: Il dizionario binario compilato (opzionale).
+        collazione: La collazione che determina l'ordine delle parole; un
+            binario compilato con un'altra collazione viene ignorato.
+
+    Returns:
+        Una tupla (vocabolario, parole da indovinare).
+
+    Raises:
+        FileNotFoundError: Se i file di testo non vengono trovati.
+    """
+    if binario_path and os.path.exists(binario_path):
+        # Un binario più vecchio dei file di testo non è stato ricompilato dopo una modifica
+        aggiornato = all(
+            os.path.getmtime(binario_path) >= os.path.getmtime(sorgente)
+            for sorgente in (vocabolario_path, parole_path) if os.path.exists(sorgente)
+        )
+        if not aggiornato:
+            logger.warning("Dizionario binario ignorato: %s è più vecchio dei file di testo", binario_path)
+        else:
+            try:
+                return carica_dizionario_binario(binario_path, collazione)
+            except ValueError as e:
+                logger.warning("Dizionario binario ignorato: %s", e)
+    return carica_vocabolario(vocabolario_path, collazione), carica_parole_da_indovinare(parole_path)
+
+class DictionaryVersion:
+    """
+    Una versione caricata del dizionario, con le strutture che ne derivano.
+
+    Attributes:
+        dizionario (str): L'identificativo del dizionario.
+        versione (str): La versione (impronta) del vocabolario.
+        vocabolario (VocabularyIndex): L'indice del vocabolario.
+        parole_da_indovinare (List[str]): Le parole da indovinare.
+        estremi (Tuple[str, str]): L'intervallo iniziale delle partite.
+        tabella_indizi (HintTable): La tabella dei limiti dei prefissi.
+        indice_ortografico (Optional[SpellingIndex]): L'indice dei suggerimenti ortografici.
+        memoria (int): La stima in byte della memoria occupata.
+    """
+
+    def __init__(self, vocabolario: VocabularyIndex, parole_da_indovinare: List[str], indice_ortografico=None,
+                 estremi: Optional[Tuple[str, str]] = None, dizionario: str = DIZIONARIO_PREDEFINITO):
+        """
+        Costruisce le strutture derivate della versione.
+
+        Args:
+            vocabolario: L'indice del vocabolario.
+            parole_da_indovinare: Le parole da indovinare.
+            indice_ortografico: L'indice dei suggerimenti ortografici (opzionale).
+            estremi: L'intervallo iniziale delle partite; di default la prima
+                e l'ultima parola del vocabolario.
+            dizionario: L'identificativo del dizionario.
+        """
+        self.dizionario = dizionario
+        self.versione = vocabolario.versione
+        self.vocabolario = vocabolario
+        self.parole_da_indovinare = parole_da_indovinare
+        self.estremi = tuple(estremi) if estremi else (vocabolario.parole[0], vocabolario.parole[-1])
+        self.tabella_indizi = HintTable(vocabolario, parole_da_indovinare)
+        self.indice_ortografico = indice_ortografico
+        self.memoria = self._stima_memoria()
+
+    def _stima_memoria(self) -> int:
+        """Stima grossolana (in byte) della memoria occupata dalla versione."""
+        parole = self.vocabolario.parole
+        if isinstance(parole, _ParoleMappate):
+            # Le pagine del file mappato, condivise tra i processi
+            totale = len(parole._buffer)
+        else:
+            totale = sum(sys.getsizeof(parola) for parola in parole) + 8 * len(parole)
+            if self.vocabolario._insieme is not None:
+                totale += sys.getsizeof(self.vocabolario._insieme)
+        if self.indice_ortografico is not None:
+            totale += 8 * len(self.indice_ortografico)
+        # Voce del dizionario, tupla e chiave di ogni prefisso della tabella degli indizi
+        return totale + 200 * len(self.tabella_indizi)
+
+class VocabularyHolder:
+    """
+    Contenitore versionato del dizionario, ricaricabile a caldo.
+
+    Una nuova versione viene caricata in un thread in background e poi
+    sostituita atomicamente a quella corrente: le richieste in corso
+    continuano a usare la versione che avevano già letto. Le ultime
+    `max_versioni` versioni restano disponibili per le partite iniziate
+    prima del cambio, che restano legate alla propria versione.
+
+    Attributes:
+        corrente (DictionaryVersion): La versione usata per le nuove partite.
+        sorgenti (Tuple[str, ...]): I file controllati per ricaricare automaticamente.
+        max_versioni (int): Il numero di versioni mantenute in memoria.
+        intervallo_controllo (float): I secondi minimi tra due controlli dei file sorgente.
+    """
+
+    def __init__(self, caricatore: Callable[[], DictionaryVersion], sorgenti: Sequence[str] = (),
+                 max_versioni: int = 3, intervallo_controllo: float = 5.0):
+        """
+        Carica la prima versione.
+
+        Args:
+            caricatore: La funzione che carica una nuova versione del dizionario.
+            sorgenti: I file la cui modifica provoca una ricarica.
+            max_versioni: Il numero di versioni mantenute in memoria (almeno 1).
+            intervallo_controllo: I secondi minimi tra due controlli dei file sorgente.
+        """
+        self._caricatore = caricatore
+        self.sorgenti = tuple(sorgenti)
+        self.max_versioni = max(1, max_versioni)
+        self.intervallo_controllo = intervallo_controllo
+        self._versioni: 'OrderedDict[str, DictionaryVersion]' = OrderedDict()
+        self._ascoltatori: List[Callable[[DictionaryVersion, DictionaryVersion], None]] = []
+        self._lock = threading.Lock()
+        self._ricarica_in_corso = False
+        self._prossimo_controllo = time.monotonic() + intervallo_controllo
+
+        self._firma = self._firma_sorgenti()
+        self.corrente = caricatore()
+        self._versioni[self.corrente.versione] = self.corrente
+
+    def _firma_sorgenti(self) -> Tuple:
+        """Restituisce (mtime, dimensione) di ogni file sorgente."""
+        firma = []
+        for sorgente in self.sorgenti:
+            try:
+                info = os.stat(sorgente)
+                firma.append((info.st_mtime_ns, info.st_size))
+            except OSError:
+                firma.append(None)
+        return tuple(firma)
+
+    def versione(self, versione: str) -> Optional[DictionaryVersion]:
+        """Restituisce la versione indicata, se è ancora in memoria."""
+        return self._versioni.get(versione)
+
+    def versioni(self) -> List[str]:
+        """Restituisce le versioni in memoria, dalla più vecchia alla corrente."""
+        return list(self._versioni)
+
+    def memoria_stimata(self) -> int:
+        """Restituisce la stima in byte della memoria delle versioni mantenute."""
+        return sum(versione.memoria for versione in list(self._versioni.values()))
+
+    def al_cambio(self, ascoltatore: Callable[[DictionaryVersion, DictionaryVersion], None]):
+        """Registra una funzione chiamata con (nuova, precedente) dopo ogni sostituzione."""
+        self._ascoltatori.append(ascoltatore)
+
+    def ricarica(self) -> DictionaryVersion:
+        """
+        Carica una nuova versione e la rende corrente.
+
+        Il caricamento avviene senza lock; solo la sostituzione è atomica.
+
+        Returns:
+            La nuova versione corrente.
+        """
+        firma = self._firma_sorgenti()
+        nuova = self._caricatore()
+        with self._lock:
+            self._firma = firma
+            self._versioni.pop(nuova.versione, None)
+            self._versioni[nuova.versione] = nuova
+            while len(self._versioni) > self.max_versioni:
+                self._versioni.popitem(last=False)
+            precedente, self.corrente = self.corrente, nuova
+        for ascoltatore in self._ascoltatori:
+            ascoltatore(nuova, precedente)
+        return nuova
+
+    def ricarica_in_background(self) -> bool:
+        """
+        Avvia la ricarica in un thread in background.
+
+        Returns:
+            False se una ricarica è già in corso, True altrimenti.
+        """
+        with self._lock:
+            if self._ricarica_in_corso:
+                return False
+            self._ricarica_in_corso = True
+        threading.Thread(target=self._ricarica_protetta, name='vocabulary-reload', daemon=True).start()
+        return True
+
+    def _ricarica_protetta(self):
+        try:
+            self.ricarica()
+        except Exception as e:
+            # La versione corrente resta in uso
+            logger.error("Ricarica del vocabolario non riuscita: %s", e)
+        finally:
+            with self._lock:
+                self._ricarica_in_corso = False
+
+    def controlla_aggiornamenti(self) -> bool:
+        """
+        Controlla (al massimo ogni `intervallo_controllo` secondi) se i file
+        sorgente sono cambiati e in tal caso avvia la ricarica in background.
+
+        Returns:
+            True se è stata avviata una ricarica.
+        """
+        adesso = time.monotonic()
+        if adesso < self._prossimo_controllo:
+            return False
+        self._prossimo_controllo = adesso + self.intervallo_controllo
+        if self._firma_sorgenti() == self._firma:
+            return False
+        return self.ricarica_in_background()
+
+class DictionaryRegistry:
+    """
+    Registro dei dizionari disponibili (per esempio italiano, a tema, per
+    bambini, inglese).
+
+    Ogni dizionario viene caricato al primo uso in un VocabularyHolder
+    condiviso da tutte le sessioni. Quando la memoria stimata dei dizionari
+    caricati supera il budget, vengono scaricati quelli usati meno di
+    recente: saranno ricaricati alla richiesta successiva.
+
+    Attributes:
+        configurazione (Dict[str, dict]): I dizionari configurati, per identificativo.
+        predefinito (str): Il dizionario usato quando non ne viene indicato uno.
+        budget_memoria (int): La memoria massima stimata (byte) dei dizionari caricati.
+    """
+
+    def __init__(self, configurazione: Dict[str, dict], caricatore: Callable[[str, dict], DictionaryVersion],
+                 budget_memoria: int = 1 << 30, predefinito: str = DIZIONARIO_PREDEFINITO,
+                 max_versioni: int = 3, intervallo_controllo: float = 5.0):
+        """
+        Prepara il registro senza caricare alcun dizionario.
+
+        Args:
+            configurazione: Per ogni identificativo, i percorsi 'vocabolario' e
+                'parole' e, opzionali, 'binario', 'ortografico', 'nome' ed 'estremi'.
+            caricatore: La funzione (identificativo, configurazione) che carica
+                una versione del dizionario.
+            budget_memoria: La memoria massima stimata (byte) dei dizionari caricati.
+            predefinito: Il dizionario usato quando non ne viene indicato uno.
+            max_versioni: Le versioni mantenute per ogni dizionario.
+            intervallo_controllo: I secondi minimi tra due controlli dei file sorgente.
+
+        Raises:
+            ValueError: Se il dizionario predefinito non è configurato.
+        """
+        if predefinito not in configurazione:
+            raise ValueError(f"Il dizionario predefinito '{predefinito}' non è configurato.")
+        self.configurazione = dict(configurazione)
+        self.predefinito = predefinito
+        self.budget_memoria = budget_memoria
+        self._caricatore = caricatore
+        self._opzioni = {'max_versioni': max_versioni, 'intervallo_controllo': intervallo_controllo}
+        self._caricati: 'OrderedDict[str, VocabularyHolder]' = OrderedDict()
+        self._ascoltatori: List[Callable[[DictionaryVersion, DictionaryVersion], None]] = []
+        self._lock = threading.Lock()
+        # Un lock per dizionario: lo stesso dizionario non viene caricato due volte in parallelo
+        self._lock_caricamento = {dizionario: threading.Lock() for dizionario in self.configurazione}
+
+    def __contains__(self, dizionario: object) -> bool:
+        return dizionario in self.configurazione
+
+    def al_cambio(self, ascoltatore: Callable[[DictionaryVersion, DictionaryVersion], None]):
+        """Registra una funzione chiamata dopo ogni ricarica di un dizionario."""
+        with self._lock:
+            self._ascoltatori.append(ascoltatore)
+            for holder in self._caricati.values():
+                holder.al_cambio(ascoltatore)
+
+    def get(self, dizionario: Optional[str] = None) -> VocabularyHolder:
+        """
+        Restituisce il dizionario indicato, caricandolo se necessario.
+
+        Args:
+            dizionario: L'identificativo del dizionario (di default il predefinito).
+
+        Returns:
+            Il contenitore versionato del dizionario.
+
+        Raises:
+            KeyError: Se il dizionario non è configurato.
+            FileNotFoundError: Se i file del dizionario non vengono trovati.
+        """
+        dizionario = dizionario or self.predefinito
+        if dizionario not in self.configurazione:
+            raise KeyError(f"Dizionario sconosciuto: {dizionario}")
+
+        with self._lock:
+            holder = self._caricati.get(dizionario)
+            if holder is not None:
+                self._caricati.move_to_end(dizionario)
+                return holder
+
+        with self._lock_caricamento[dizionario]:
+            with self._lock:
+                holder = self._caricati.get(dizionario)
+            if holder is not None:
+                return holder
+
+            configurazione = self.configurazione[dizionario]
+            # Con un dizionario compilato si controlla solo il binario: una modifica
+            # ai file di testo viene pubblicata da python abaco_data.py compila,
+            # senza che ogni worker rilegga il testo e ricostruisca gli indici
+            if configurazione.get('binario'):
+                sorgenti = [configurazione['binario']]
+            else:
+                sorgenti = [configurazione[chiave] for chiave in ('vocabolario', 'parole')]
+            holder = VocabularyHolder(
+                partial(self._caricatore, dizionario, configurazione), sorgenti=sorgenti,
+                **self._opzioni,
+            )
+            with self._lock:
+                for ascoltatore in self._ascoltatori:
+                    holder.al_cambio(ascoltatore)
+                self._caricati[dizionario] = holder
+                self._rispetta_budget()
+        return holder
+
+    def _rispetta_budget(self):
+        """Scarica i dizionari usati meno di recente finché si rientra nel budget."""
+        # L'ultimo dizionario (quello appena usato) resta sempre caricato
+        while len(self._caricati) > 1 and self.memoria_stimata() > self.budget_memoria:
+            dizionario, _ = self._caricati.popitem(last=False)
+            logger.warning("Dizionario scaricato per rientrare nel budget di memoria: %s", dizionario)
+
+    def memoria_stimata(self) -> int:
+        """Restituisce la stima in byte della memoria dei dizionari caricati."""
+        return sum(holder.memoria_stimata() for holder in list(self._caricati.values()))
+
+    def caricati(self) -> List[str]:
+        """Restituisce i dizionari caricati, dal meno al più recentemente usato."""
+        with self._lock:
+            return list(self._caricati)
+
+    def controlla_aggiornamenti(self):
+        """Controlla i file sorgente dei dizionari caricati (vedi VocabularyHolder)."""
+        with self._lock:
+            holders = list(self._caricati.values())
+        for holder in holders:
+            holder.controlla_aggiornamenti()
+
+def carica_configurazione_dizionari(file_path: str) -> Dict[str, dict]:
+    """
+    Carica la configurazione dei dizionari da un file JSON nella forma
+    {"id": {"nome": ..., "vocabolario": ..., "parole": ..., ...}, ...}.
+
+    Args:
+        file_path: Il percorso del file di configurazione.
+
+    Returns:
+        La configurazione, per identificativo del dizionario.
+
+    Raises:
+        FileNotFoundError: Se il file non viene trovato.
+        ValueError: Se a un dizionario mancano i file obbligatori.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Configurazione dei dizionari non trovata in: {file_path}")
     with open(file_path, 'r', encoding='utf-8') as f:
-        # Rimuove spazi bianchi e converte in minuscolo
-        parole = {line.strip().lower() for line in f if line.strip()}
-    return parole
+        configurazione = json.load(f)
+    for dizionario, voce in configurazione.items():
+        if not isinstance(voce, dict) or not voce.get('vocabolario') or not voce.get('parole'):
+            raise ValueError(f"Il dizionario '{dizionario}' deve indicare 'vocabolario' e 'parole'.")
+    return configurazione
 
-def salva_punteggio(giocatori: List[dict]):
+def salva_punteggio(giocatori: List[dict], archivio=None):
     """
-    Salva i punteggi dei giocatori (funzionalità da implementare).
-    
+    Salva i punteggi dei giocatori nell'archivio dei punteggi.
+
+    Con un archivio aperto (come quello dell'app) la scrittura su disco
+    avviene in background (vedi scores.ScoreStore); senza, i risultati
+    vengono scritti nel database predefinito prima di tornare.
+
     Args:
-        giocatori: Una lista di dizionari rappresentanti i giocatori e i loro punteggi.
+        giocatori: Una lista di dizionari con le chiavi parola, tentativi,
+            indizi, tempo e, opzionalmente, arreso e personalizzata.
+        archivio: Lo ScoreStore in cui registrare i risultati (opzionale).
     """
-    # TODO: Implementare il salvataggio su file (es. JSON o CSV)
-    print("\n(Funzione di salvataggio punteggio non ancora implementata.)")
\ No newline at end of file
+    chiudi = archivio is None
+    if chiudi:
+        archivio = ScoreStore(os.environ.get('SCORES_DB', 'data/punteggi.db'))
+    try:
+        for giocatore in giocatori:
+            archivio.registra(
+                giocatore['parola'], giocatore['tentativi'], giocatore['indizi'], giocatore['tempo'],
+                arreso=giocatore.get('arreso', False), personalizzata=giocatore.get('personalizzata', False),
+            )
+    finally:
+        if chiudi:
+            archivio.chiudi()
+
+def main(argv: Optional[List[str]] = None):
+    """Punto di ingresso da riga di comando per gli strumenti sui dati."""
+    parser = argparse.ArgumentParser(description="Strumenti per i dati di Abaco Zuzzurellone.")
+    comandi = parser.add_subparsers(dest='comando', required=True)
+
+    compila = comandi.add_parser('compila', help="Compila il dizionario nel formato binario.")
+    compila.add_argument('--vocabolario', default='data/660000_parole_italiane.txt')
+    compila.add_argument('--parole', default='data/1000_parole_italiane_comuni.txt')
+    compila.add_argument('--output', default='data/vocabolario.bin')
+    compila.add_argument('--collazione', choices=sorted(COLLAZIONI), default=COLLAZIONE_PREDEFINITA,
+                         help="Ordine delle parole (default: variabile COLLAZIONE o 'codepoint').")
+    compila.add_argument('--ortografico', default='data/vocabolario.sym',
+                         help="Percorso base dell'indice dei suggerimenti ortografici, scritto con la "
+                              "versione e la collazione nel nome (vuoto per non generarlo).")
+
+    args = parser.parse_args(argv)
+    if args.comando == 'compila':
+        versione = compila_dizionario(args.vocabolario, args.parole, args.output, args.collazione,
+                                      args.ortografico)
+        print(f"Dizionario compilato in {args.output} (versione {versione})")
+
+if __name__ == '__main__':
+    main()
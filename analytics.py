@@ -0,0 +1,165 @@
+"""
+Analisi offline delle partite registrate nel registro degli eventi.
+
+Per ogni mossa (inizio partita, tentativo, indizio) calcola le parole
+ancora possibili nell'intervallo e l'informazione guadagnata dalla mossa
+(log2 della riduzione dell'intervallo). I conteggi vengono dalle posizioni
+degli estremi nel vocabolario ordinato: invece di una ricerca binaria per
+mossa, gli estremi di tutte le mosse vengono cercati insieme con
+numpy.searchsorted su un array di ranghi del vocabolario.
+
+NumPy è una dipendenza opzionale, richiesta solo da questo modulo:
+
+    pip install numpy
+    python analytics.py data/eventi-*.jsonl --csv mosse.csv
+"""
+import argparse
+import csv
+import json
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy è opzionale: serve solo all'analisi offline
+    np = None
+
+from abaco_data import VocabularyIndex, carica_dizionario
+from events import espandi_percorsi, leggi_eventi
+
+# Eventi che definiscono un intervallo della partita
+EVENTI_INTERVALLO = ('partita_iniziata', 'tentativo', 'indizio')
+
+class RankArray:
+    """
+    Le chiavi di collazione del vocabolario come array NumPy ordinato, per
+    calcolare i ranghi di molte parole con una sola chiamata vettoriale.
+
+    Le chiavi sono codificate in UTF-8: l'ordine dei byte coincide con
+    quello dei code point, quindi con quello dell'indice.
+
+    Attributes:
+        vocabolario (VocabularyIndex): Il vocabolario di riferimento.
+        chiavi (numpy.ndarray): Le chiavi ordinate, dtype bytes.
+    """
+
+    def __init__(self, vocabolario: VocabularyIndex):
+        if np is None:
+            raise ImportError("L'analisi vettoriale richiede NumPy: pip install numpy")
+        self.vocabolario = vocabolario
+        self.chiavi = np.array([chiave.encode('utf-8') for chiave in vocabolario.chiavi], dtype=bytes)
+
+    def _codifica(self, parole: Sequence[str]) -> 'np.ndarray':
+        chiave = self.vocabolario.chiave
+        return np.array([chiave(parola).encode('utf-8') for parola in parole], dtype=bytes)
+
+    def parole_comprese(self, minime: Sequence[str], massime: Sequence[str]) -> 'np.ndarray':
+        """
+        Conta, per ogni coppia di estremi, le parole del vocabolario comprese
+        tra i due (estremi inclusi), come VocabularyIndex.count_between.
+        """
+        inizio = np.searchsorted(self.chiavi, self._codifica(minime), side='left')
+        fine = np.searchsorted(self.chiavi, self._codifica(massime), side='right')
+        return np.maximum(fine - inizio, 0)
+
+def bit_guadagnati(prima: 'np.ndarray', dopo: 'np.ndarray') -> 'np.ndarray':
+    """Versione vettoriale di game_logic.bit_informazione: log2(prima / dopo), 0 se non definito."""
+    prima = np.asarray(prima, dtype=float)
+    dopo = np.asarray(dopo, dtype=float)
+    validi = (prima > 0) & (dopo > 0)
+    risultato = np.zeros(np.broadcast(prima, dopo).shape)
+    np.log2(prima / np.where(validi, dopo, 1.0), out=risultato, where=validi)
+    return risultato
+
+def analizza_mosse(eventi: Iterable[dict], ranghi: RankArray) -> Dict[str, 'np.ndarray']:
+    """
+    Calcola parole rimaste e bit guadagnati per ogni mossa registrata.
+
+    Gli eventi vengono letti in una passata, conservando solo le colonne
+    necessarie; le mosse sono poi ordinate per partita e per tempo. La
+    prima mossa registrata di ogni partita non ha un intervallo precedente
+    e ha 0 bit.
+
+    Args:
+        eventi: Gli eventi del registro (vedi events.leggi_eventi).
+        ranghi: L'array dei ranghi del vocabolario.
+
+    Returns:
+        Un dizionario di colonne: partita, evento, ts, parola_minima,
+        parola_massima, parole_rimaste, bit_guadagnati.
+    """
+    partite: List[str] = []
+    tipi: List[str] = []
+    tempi: List[float] = []
+    minime: List[str] = []
+    massime: List[str] = []
+    for evento in eventi:
+        if evento.get('evento') not in EVENTI_INTERVALLO or 'parola_minima' not in evento:
+            continue
+        partite.append(evento.get('partita') or '')
+        tipi.append(evento['evento'])
+        tempi.append(evento.get('ts', 0.0))
+        minime.append(evento['parola_minima'])
+        massime.append(evento['parola_massima'])
+
+    ordine = np.lexsort((np.array(tempi, dtype=float), np.array(partite, dtype=str)))
+    partite_ord = np.array(partite, dtype=str)[ordine]
+    minime_ord = [minime[i] for i in ordine]
+    massime_ord = [massime[i] for i in ordine]
+
+    rimaste = ranghi.parole_comprese(minime_ord, massime_ord)
+    # Intervallo precedente della stessa partita (nessuno per la prima mossa)
+    prima = np.zeros_like(rimaste)
+    stessa_partita = np.zeros(len(rimaste), dtype=bool)
+    if len(rimaste) > 1:
+        stessa_partita[1:] = partite_ord[1:] == partite_ord[:-1]
+        prima[1:] = rimaste[:-1]
+    prima[~stessa_partita] = 0
+
+    return {
+        'partita': partite_ord,
+        'evento': np.array(tipi, dtype=object)[ordine],
+        'ts': np.array(tempi, dtype=float)[ordine],
+        'parola_minima': np.array(minime_ord, dtype=object),
+        'parola_massima': np.array(massime_ord, dtype=object),
+        'parole_rimaste': rimaste,
+        'bit_guadagnati': bit_guadagnati(prima, rimaste),
+    }
+
+def riepilogo(mosse: Dict[str, 'np.ndarray']) -> Dict[str, object]:
+    """Riassume le mosse: numero e bit medi per tipo di mossa."""
+    risultato: Dict[str, object] = {'mosse': int(len(mosse['evento'])),
+                                    'partite': int(len(np.unique(mosse['partita'])))}
+    for tipo in ('tentativo', 'indizio'):
+        selezione = mosse['evento'] == tipo
+        numero = int(selezione.sum())
+        risultato[tipo] = {
+            'numero': numero,
+            'bit_medi': float(mosse['bit_guadagnati'][selezione].mean()) if numero else None,
+        }
+    return risultato
+
+def main(argv: Optional[List[str]] = None):
+    """Punto di ingresso da riga di comando dell'analisi delle partite."""
+    parser = argparse.ArgumentParser(description="Analizza le partite registrate nel registro degli eventi.")
+    parser.add_argument('file', nargs='+', help="File del registro degli eventi (anche con caratteri jolly).")
+    parser.add_argument('--vocabolario', default='data/660000_parole_italiane.txt')
+    parser.add_argument('--parole', default='data/1000_parole_italiane_comuni.txt')
+    parser.add_argument('--binario', default='data/vocabolario.bin')
+    parser.add_argument('--csv', default=None, help="Scrive le singole mosse in un file CSV.")
+    args = parser.parse_args(argv)
+
+    vocabolario, _ = carica_dizionario(args.vocabolario, args.parole, args.binario)
+    mosse = analizza_mosse(leggi_eventi(espandi_percorsi(args.file)), RankArray(vocabolario))
+
+    if args.csv:
+        campi = list(mosse)
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(campi)
+            writer.writerows(zip(*(mosse[campo].tolist() for campo in campi)))
+    json.dump(riepilogo(mosse), sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
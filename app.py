@@ -1,66 +1,318 @@
+import os
+import atexit
+import math
 import random
+import hashlib
 import time
 import secrets
-from flask import Flask, render_template, request, jsonify, session
-from game_logic import AbacoGame
-from abaco_data import carica_vocabolario, carica_parole_da_indovinare
+import signal
+import threading
+from flask import Flask, render_template, request, jsonify, session, g
+from jinja2.utils import htmlsafe_json_dumps
+from werkzeug.middleware.proxy_fix import ProxyFix
+from assets import ASSET_MAX_AGE, AssetManifest
+from game_logic import AbacoGame, bit_informazione
+from game_store import crea_game_store
+from cache import LRUCache
+from metrics import Registry
+from scores import ScoreStore
+from events import EventLog, id_partita
+from ratelimit import crea_rate_limiter, leggi_limite
+from abaco_data import (
+    COLLAZIONE_PREDEFINITA, DictionaryRegistry, DictionaryVersion, DIZIONARIO_PREDEFINITO,
+    carica_configurazione_dizionari, carica_dizionario, salva_punteggio,
+)
+from ingestion import normalizza_parola
+from spelling import carica_indice_ortografico
 
 app = Flask(__name__)
-# Chiave segreta per le sessioni (necessaria per sicurezza)
-app.secret_key = secrets.token_hex(32)
-
-# Caricamento dati (questi possono rimanere globali perché sono solo dati di lettura)
-try:
-    vocabolario = carica_vocabolario('data/660000_parole_italiane.txt')
-    parole_da_indovinare = carica_parole_da_indovinare('data/1000_parole_italiane_comuni.txt')
-    print(f"Vocabolario caricato: {len(vocabolario)} parole")
+# Chiave segreta per le sessioni (necessaria per sicurezza). Con più worker
+# che condividono il game store deve essere la stessa: va impostata SECRET_KEY
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
+
+# File statici con impronta del contenuto, compressi una volta all'avvio
+asset_statici = AssetManifest(os.path.join(app.root_path, 'static'))
+app.jinja_env.globals['asset_url'] = asset_statici.url
+
+# Pagina principale renderizzata una sola volta: a ogni richiesta si
+# inserisce solo lo stato della partita al posto del segnaposto
+SEGNAPOSTO_STATO = '__STATO_INIZIALE__'
+_pagina_principale = None
+
+# Numero di proxy fidati davanti all'app (ad esempio 1 su Render): l'IP del
+# client viene preso da X-Forwarded-For solo per quei passaggi
+PROXY_FIDATI = int(os.environ.get('PROXY_FIDATI', 0))
+if PROXY_FIDATI:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_FIDATI, x_proto=PROXY_FIDATI)
+
+# Stato delle partite lato server: il cookie contiene solo il game_id
+game_store = crea_game_store()
+
+# Cache dei prefissi dell'alfabeto ausiliario, per (versione vocabolario, min, max)
+prefissi_cache = LRUCache(int(os.environ.get('PREFIX_CACHE_SIZE', 4096)))
+# Durata (secondi) per cui browser e proxy possono riusare la risposta GET
+PREFIXES_MAX_AGE = 3600
+
+# Suggerimenti restituiti per pagina da /suggest (predefiniti e massimi)
+SUGGEST_K = 8
+SUGGEST_MAX_K = 50
+
+# Suggerimenti "forse cercavi" restituiti per una parola non valida
+SUGGERIMENTI_ORTOGRAFICI = 5
+
+# Azioni massime per richiesta a /batch
+BATCH_MAX_AZIONI = 10
+
+# Limiti di frequenza (token bucket, 'capacità:gettoni al secondo') per
+# sessione e per IP. Disattivati di default: RATE_LIMIT_STORE=memory li attiva
+# per processo, sqlite:///percorso.db li condivide tra i worker. Il limite per
+# IP è ampio perché più giocatori possono condividere un indirizzo (NAT)
+limitatore = crea_rate_limiter()
+LIMITE_SESSIONE = leggi_limite(os.environ.get('RATE_LIMIT_SESSIONE', '60:2'))
+LIMITE_IP = leggi_limite(os.environ.get('RATE_LIMIT_IP', '300:10'))
+# Gettoni consumati per route (1 se non indicata); le route escluse non consumano
+COSTI_ROUTE = {
+    'index': 2, 'hint': 5, 'get_alphabet_prefixes': 3, 'restart': 10, 'set_custom_word': 10,
+}
+COSTI_AZIONI_BATCH = {'guess': 1, 'hint': 5, 'prefixes': 3, 'status': 1}
+ESCLUSE_DAI_LIMITI = frozenset({'static', 'asset', 'metrics'})
+
+# Token delle route di amministrazione (se non impostato le route sono disattivate)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Punteggi delle partite concluse: scritti su SQLite in background,
+# classifiche servite dalla memoria e ricostruite periodicamente dal database
+# (SCORES_DB va condiviso tra i worker)
+archivio_punteggi = ScoreStore(os.environ.get('SCORES_DB', 'data/punteggi.db'))
+atexit.register(archivio_punteggi.chiudi)
+
+# Registro degli eventi di gioco (righe JSON scritte in background)
+registro_eventi = EventLog()
+atexit.register(registro_eventi.chiudi)
+
+# Metriche in formato Prometheus su /metrics; con METRICS_DIR (cartella condivisa)
+# la route aggrega i valori di tutti i worker gunicorn
+metriche = Registry(os.environ.get('METRICS_DIR'))
+durata_richieste = metriche.histogram(
+    'abaco_request_duration_seconds', "Durata delle richieste HTTP.", ['endpoint', 'method', 'status'])
+durata_sezioni = metriche.histogram(
+    'abaco_section_duration_seconds', "Durata delle sezioni interne critiche.", ['section'])
+vocabolario_parole = metriche.gauge(
+    'abaco_vocabulary_words', "Numero di parole del vocabolario caricato.", ['dictionary'])
+vocabolario_caricamento = metriche.gauge(
+    'abaco_vocabulary_load_seconds', "Durata dell'ultimo caricamento del vocabolario.", ['dictionary'])
+dizionari_memoria = metriche.gauge(
+    'abaco_dictionaries_memory_bytes', "Memoria stimata dei dizionari caricati.")
+prefissi_cache_eventi = metriche.counter(
+    'abaco_prefix_cache_total', "Letture della cache dei prefissi.", ['result'])
+richieste_limitate = metriche.counter(
+    'abaco_rate_limited_total', "Richieste respinte dai limiti di frequenza.", ['endpoint', 'scope'])
+
+# Dizionari disponibili: di default solo l'italiano. DIZIONARI_CONFIG indica un
+# file JSON con altri dizionari (a tema, per bambini, inglese...), ciascuno
+# compilabile con python abaco_data.py compila --vocabolario ... --output ...
+DIZIONARI_BASE = {
+    DIZIONARIO_PREDEFINITO: {
+        'nome': 'Italiano',
+        'vocabolario': 'data/660000_parole_italiane.txt',
+        'parole': 'data/1000_parole_italiane_comuni.txt',
+        'binario': 'data/vocabolario.bin',
+        'ortografico': 'data/vocabolario.sym',
+        'estremi': ['abaco', 'zuzzurellone'],
+    },
+}
+
+def carica_versione(dizionario_id: str, configurazione: dict) -> DictionaryVersion:
+    """Carica una versione di un dizionario con le strutture derivate."""
+    inizio_caricamento = time.perf_counter()
+    # Il dizionario binario (python abaco_data.py compila) viene mappato in memoria
+    # e condiviso tra i worker; in sua assenza si caricano i file di testo
+    vocabolario, parole_da_indovinare = carica_dizionario(
+        configurazione['vocabolario'], configurazione['parole'], configurazione.get('binario'),
+        configurazione.get('collazione', COLLAZIONE_PREDEFINITA),
+    )
+    # Indice delle cancellazioni per i suggerimenti "forse cercavi", compilato
+    # da python abaco_data.py compila (None se manca: nessun suggerimento)
+    indice_ortografico = carica_indice_ortografico(configurazione.get('ortografico'), vocabolario)
+    # La tabella dei limiti dei prefissi per /hint viene costruita dalla versione
+    dizionario = DictionaryVersion(
+        vocabolario, parole_da_indovinare, indice_ortografico,
+        estremi=configurazione.get('estremi'), dizionario=dizionario_id,
+    )
+
+    vocabolario_caricamento.imposta(time.perf_counter() - inizio_caricamento, dizionario_id)
+    vocabolario_parole.imposta(len(vocabolario), dizionario_id)
+    print(f"Vocabolario '{dizionario_id}' caricato: {len(vocabolario)} parole (versione {vocabolario.versione})")
     print(f"Parole da indovinare: {len(parole_da_indovinare)} parole")
+    return dizionario
 
-except FileNotFoundError as e:
+# Caricamento dati: i dizionari sono di sola lettura, caricati al primo uso e
+# sostituiti a caldo quando i file cambiano, con POST /admin/ricarica-vocabolario
+# o con SIGUSR2. All'avvio si carica solo il dizionario predefinito
+try:
+    configurazione_dizionari = dict(DIZIONARI_BASE)
+    if os.environ.get('DIZIONARI_CONFIG'):
+        configurazione_dizionari.update(carica_configurazione_dizionari(os.environ['DIZIONARI_CONFIG']))
+    dizionari = DictionaryRegistry(
+        configurazione_dizionari,
+        carica_versione,
+        budget_memoria=int(os.environ.get('DIZIONARI_MEMORIA_MB', 1024)) * 1024 * 1024,
+        predefinito=os.environ.get('DIZIONARIO_PREDEFINITO', DIZIONARIO_PREDEFINITO),
+        max_versioni=int(os.environ.get('VOCABOLARIO_VERSIONI', 3)),
+    )
+    dizionari.get()
+
+except (FileNotFoundError, ValueError) as e:
     print(f"Errore: {e}")
     print("Assicurati che i file del dizionario si trovino nella cartella 'data'.")
     exit()
 
+def al_cambio_vocabolario(nuova: DictionaryVersion, precedente: DictionaryVersion):
+    # Le voci della cache sono indicizzate per versione: le vecchie non verrebbero più lette
+    prefissi_cache.clear()
+    print(f"Vocabolario '{nuova.dizionario}' aggiornato: {precedente.versione} -> {nuova.versione}")
+
+dizionari.al_cambio(al_cambio_vocabolario)
+
+def ricarica_dizionari_caricati():
+    for dizionario_id in dizionari.caricati():
+        dizionari.get(dizionario_id).ricarica_in_background()
+
+# kill -USR2 <pid del worker> ricarica i dizionari di quel worker. Il gestore
+# avvia solo un thread: i lock del registro non vengono mai presi nel gestore
+try:
+    signal.signal(signal.SIGUSR2, lambda *_: threading.Thread(target=ricarica_dizionari_caricati).start())
+except (AttributeError, ValueError):
+    # Piattaforma senza SIGUSR2 o modulo importato fuori dal thread principale
+    pass
+
+def dizionario_di(game: AbacoGame) -> DictionaryVersion:
+    """Restituisce la versione del dizionario a cui è legata la partita."""
+    holder = dizionari.get(game.dizionario)
+    return holder.versione(game.vocabolario.versione) or holder.corrente
+
+def partita_salvata():
+    """Ricostruisce la partita della sessione corrente, o None se non ne esiste una valida."""
+    game_id = session.get('game_id')
+    stato = game_store.get(game_id) if game_id else None
+    if stato is None:
+        return None
+
+    # Ricostruisce il gioco dallo stato memorizzato sul server
+    try:
+        with durata_sezioni.time('get_game'):
+            # La partita resta legata al dizionario e alla versione del
+            # vocabolario con cui è iniziata; se la versione non è più in
+            # memoria passa a quella corrente
+            dizionario_id, versione = AbacoGame.versione_stato(stato)
+            holder = dizionari.get(dizionario_id)
+            dizionario = holder.versione(versione) or holder.corrente
+            return AbacoGame.from_state(stato, dizionario.vocabolario)
+    except (TypeError, ValueError, KeyError):
+        # Stato salvato da una versione incompatibile: si ricomincia
+        return None
+
 def get_game():
     """Ottiene o crea una nuova istanza di gioco per la sessione corrente."""
-    if 'game_id' not in session or 'game_data' not in session:
-        # Nuova partita
-        parola_segreta = random.choice(parole_da_indovinare)
-        game = AbacoGame(parola_segreta, vocabolario)
-        session['game_id'] = secrets.token_hex(16)
-        session['game_data'] = {
-            'parola_segreta': parola_segreta,
-            'parola_minima': game.parola_minima,
-            'parola_massima': game.parola_massima,
-            'numero_tentativi': game.numero_tentativi,
-            'game_over': game.game_over,
-            'vincitore': game.vincitore,
-            'start_time': time.time()
-        }
-        print(f"Nuova partita per sessione {session['game_id']}: {parola_segreta}")
+    game = partita_salvata()
+    if game is not None:
         return game
 
-    # Ricostruisce il gioco dalla sessione
-    data = session['game_data']
-    game = AbacoGame(data['parola_segreta'], vocabolario)
-    game.parola_minima = data['parola_minima']
-    game.parola_massima = data['parola_massima']
-    game.numero_tentativi = data['numero_tentativi']
-    game.game_over = data['game_over']
-    game.vincitore = data['vincitore']
+    # Nuova partita, con il dizionario scelto nella sessione
+    dizionario_id = session.get('dizionario')
+    dizionario = dizionari.get(dizionario_id if dizionario_id in dizionari else None).corrente
+    parola_segreta = random.choice(dizionario.parole_da_indovinare)
+    game = AbacoGame(
+        parola_segreta, dizionario.vocabolario, estremi=dizionario.estremi, dizionario=dizionario.dizionario,
+    )
+    session['game_id'] = secrets.token_hex(16)
+    save_game(game)
+    registra_evento(
+        'partita_iniziata', dizionario=game.dizionario, versione=game.vocabolario.versione,
+        parola_minima=game.parola_minima, parola_massima=game.parola_massima,
+    )
     return game
 
 def save_game(game):
-    """Salva lo stato del gioco nella sessione."""
-    session['game_data'] = {
-        'parola_segreta': game.parola_segreta,
-        'parola_minima': game.parola_minima,
-        'parola_massima': game.parola_massima,
-        'numero_tentativi': game.numero_tentativi,
-        'game_over': game.game_over,
-        'vincitore': game.vincitore,
-        'start_time': session.get('game_data', {}).get('start_time', time.time())
-    }
+    """Salva lo stato del gioco nel game store, associato alla sessione."""
+    with durata_sezioni.time('save_game'):
+        game_store.put(session['game_id'], game.to_state())
+
+def registra_evento(evento, **campi):
+    """Accoda un evento della partita della sessione corrente (mai il game_id in chiaro)."""
+    registro_eventi.registra(evento, id_partita(session['game_id']), **campi)
+
+@app.before_request
+def inizia_misura():
+    g.inizio_richiesta = time.perf_counter()
+
+@app.before_request
+def limita_richieste():
+    """
+    Respinge con 429 e Retry-After le richieste oltre i limiti della
+    sessione o dell'IP, prima di caricare la partita o toccare il vocabolario.
+    Il secchio dell'IP viene addebitato solo se la sessione ammette la
+    richiesta: le richieste respinte per sessione non consumano quello
+    condiviso dagli altri giocatori dello stesso indirizzo.
+    """
+    endpoint = request.endpoint
+    if limitatore is None or endpoint is None or endpoint in ESCLUSE_DAI_LIMITI:
+        return None
+    costo = costo_richiesta(endpoint)
+    ambito = 'session'
+    attesa = 0.0
+    game_id = session.get('game_id')
+    if game_id:
+        attesa = limitatore.consuma(f"sessione:{id_partita(game_id)}", costo, LIMITE_SESSIONE)
+    if not attesa:
+        ambito = 'ip'
+        attesa = limitatore.consuma(f"ip:{request.remote_addr}", costo, LIMITE_IP)
+    if not attesa:
+        return None
+
+    richieste_limitate.incrementa(endpoint, ambito)
+    secondi = math.ceil(attesa)
+    response = jsonify({'error': f'Troppe richieste: riprova tra {secondi} secondi.'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(secondi)
+    return response
+
+def costo_richiesta(endpoint):
+    """Restituisce i gettoni consumati dalla richiesta (per /batch, la somma delle azioni)."""
+    if endpoint == 'batch':
+        dati = request.get_json(silent=True)
+        azioni = dati.get('azioni') if isinstance(dati, dict) else None
+        if isinstance(azioni, list):
+            return max(1, sum(
+                COSTI_AZIONI_BATCH.get(azione.get('azione'), 1) if isinstance(azione, dict) else 1
+                for azione in azioni[:BATCH_MAX_AZIONI]
+            ))
+    return COSTI_ROUTE.get(endpoint, 1)
+
+@app.before_request
+def controlla_vocabolario():
+    # Al massimo ogni pochi secondi: se i file dei dizionari caricati sono
+    # cambiati li ricarica in background
+    dizionari.controlla_aggiornamenti()
+
+@app.after_request
+def registra_misura(response):
+    inizio = g.get('inizio_richiesta')
+    if inizio is not None:
+        durata_richieste.osserva(
+            time.perf_counter() - inizio,
+            request.endpoint or 'sconosciuto', request.method, str(response.status_code),
+        )
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Espone le metriche nel formato testuale di Prometheus."""
+    statistiche = prefissi_cache.stats()
+    prefissi_cache_eventi.imposta(statistiche['hits'], 'hit')
+    prefissi_cache_eventi.imposta(statistiche['misses'], 'miss')
+    dizionari_memoria.imposta(dizionari.memoria_stimata())
+    return app.response_class(metriche.esporta(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
@@ -71,30 +323,89 @@ def index():
         'parola_massima': game.parola_massima,
         'tentativi_rimasti': game.tentativi_rimasti,
         'numero_tentativi': game.numero_tentativi,
+        'parole_rimaste': game.parole_rimaste(),
         'game_over': game.game_over,
-        'elapsed_time': 0
+        'dizionario': game.dizionario,
+        'versione': game.vocabolario.versione,
+        # Il client fa scorrere il timer da qui, senza interrogare /status
+        'elapsed_time': 0 if game.game_over else time.time() - game.start_time
     }
-    return render_template('index.html', stato=stato_iniziale)
+    response = app.response_class(pagina_principale(stato_iniziale), mimetype='text/html')
+    # La pagina contiene lo stato della partita: va sempre riconvalidata
+    response.cache_control.no_cache = True
+    return response
+
+def pagina_principale(stato):
+    """Restituisce la pagina principale con lo stato della partita dato."""
+    global _pagina_principale
+    if _pagina_principale is None or app.debug:
+        _pagina_principale = render_template('index.html', stato=SEGNAPOSTO_STATO)
+    return _pagina_principale.replace(SEGNAPOSTO_STATO, str(htmlsafe_json_dumps(stato)), 1)
+
+@app.route('/assets/<path:nome>')
+def asset(nome):
+    """
+    Serve un file statico con impronta dalla memoria, con la codifica
+    migliore accettata dal client (brotli, gzip o nessuna) e cache immutable.
+    """
+    file_statico = asset_statici.get(nome)
+    if file_statico is None:
+        return app.response_class('Not Found', status=404, mimetype='text/plain')
+
+    codifica = file_statico.codifica_per(request.accept_encodings)
+    # ETag distinto per codifica: le rappresentazioni hanno byte diversi
+    etag = f"{file_statico.etag}-{codifica}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(file_statico.codifiche[codifica], mimetype=file_statico.mimetype)
+        if codifica != 'identity':
+            response.content_encoding = codifica
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = ASSET_MAX_AGE
+    response.cache_control.immutable = True
+    return response
 
 @app.route('/guess', methods=['POST'])
 def guess():
     """Gestisce il tentativo dell'utente."""
+    dati = request.get_json() or {}
+    if not isinstance(dati, dict):
+        return jsonify({'error': 'Il corpo della richiesta deve essere un oggetto JSON.'}), 400
     game = get_game()
-
+    risposta, codice = esegui_tentativo(game, dati.get('parola'))
+    if codice == 200:
+        save_game(game)
+    return jsonify(risposta), codice
+
+def esegui_tentativo(game, parola):
+    """
+    Applica un tentativo alla partita (senza salvarla).
+
+    Args:
+        game: La partita.
+        parola: La parola proposta, così come inviata dal client.
+
+    Returns:
+        Una tupla (risposta, codice HTTP); con codice 200 la partita è cambiata.
+    """
     if game.game_over:
-        return jsonify({'error': 'La partita è terminata.'}), 400
+        return {'error': 'La partita è terminata.'}, 400
 
-    data = request.get_json()
-    parola_proposta = data.get('parola')
+    # Forma canonica del vocabolario: NFC, minuscole, "citta'" -> "città"
+    parola_proposta = normalizza_parola(parola) if isinstance(parola, str) else ''
 
     if not parola_proposta:
-        return jsonify({'error': 'Nessuna parola fornita.'}), 400
+        return {'error': 'Nessuna parola fornita.'}, 400
 
-    risultato = game.processa_tentativo(parola_proposta, 'Player 1')
-    save_game(game)
+    prima = game.parole_rimaste()
+    with durata_sezioni.time('processa_tentativo'):
+        risultato = game.processa_tentativo(parola_proposta, 'Player 1')
+    dopo = game.parole_rimaste()
 
-    start_time = session['game_data']['start_time']
-    elapsed_time = time.time() - start_time
+    elapsed_time = time.time() - game.start_time
 
     stato_partita = {
         'risultato': risultato,
@@ -104,10 +415,34 @@ def guess():
         'numero_tentativi': game.numero_tentativi,
         'game_over': game.game_over,
         'vincitore': game.vincitore,
-        'elapsed_time': elapsed_time
+        'elapsed_time': elapsed_time,
+        'parole_rimaste': dopo,
+        'bit_guadagnati': round(bit_informazione(prima, dopo), 3),
     }
 
+    valida = parola_proposta in game.vocabolario
+    registra_evento(
+        'tentativo', parola=parola_proposta, valida=valida, numero_tentativi=game.numero_tentativi,
+        parola_minima=game.parola_minima, parola_massima=game.parola_massima,
+    )
+
+    # Parola fuori vocabolario: suggerisce le parole valide più vicine (se
+    # l'indice ortografico di questa versione è stato compilato)
+    indice_ortografico = dizionario_di(game).indice_ortografico
+    if not valida and indice_ortografico is not None:
+        stato_partita['suggerimenti'] = indice_ortografico.suggerimenti(
+            parola_proposta, game.parola_minima, game.parola_massima, SUGGERIMENTI_ORTOGRAFICI
+        )
+
     if game.vincitore:
+        salva_punteggio([{
+            'parola': game.parola_segreta, 'tentativi': game.numero_tentativi,
+            'indizi': game.indizi_usati, 'tempo': elapsed_time, 'personalizzata': game.personalizzata,
+        }], archivio_punteggi)
+        registra_evento(
+            'vittoria', parola=game.parola_segreta, tentativi=game.numero_tentativi,
+            indizi=game.indizi_usati, tempo=round(elapsed_time, 3), personalizzata=game.personalizzata,
+        )
         minutes, seconds = divmod(elapsed_time, 60)
         if minutes > 0:
             tempo_impiegato = f"{int(minutes)} minuti e {int(seconds)} secondi"
@@ -115,14 +450,25 @@ def guess():
             tempo_impiegato = f"{int(seconds)} secondi"
         stato_partita['risultato'] = f"{risultato}<br>Tempo: {tempo_impiegato}<br>Tentativi: {game.numero_tentativi}"
 
-    return jsonify(stato_partita)
+    return stato_partita, 200
 
 @app.route('/restart', methods=['POST'])
 def restart():
-    """Resetta il gioco con una nuova parola."""
+    """Resetta il gioco con una nuova parola (opzionalmente di un altro dizionario)."""
     try:
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Il corpo della richiesta deve essere un oggetto JSON.'}), 400
+        dizionario = data.get('dizionario') or session.get('dizionario')
+        if dizionario is not None and dizionario not in dizionari:
+            return jsonify({'error': f'Dizionario sconosciuto: {dizionario}'}), 400
+
         # Cancella la sessione corrente per forzare una nuova partita
+        if 'game_id' in session:
+            game_store.delete(session['game_id'])
         session.clear()
+        if dizionario is not None:
+            session['dizionario'] = dizionario
         game = get_game()  # Questo creerà una nuova partita
 
         stato_iniziale = {
@@ -130,7 +476,10 @@ def restart():
             'parola_massima': game.parola_massima,
             'tentativi_rimasti': game.tentativi_rimasti,
             'numero_tentativi': game.numero_tentativi,
+            'parole_rimaste': game.parole_rimaste(),
             'game_over': game.game_over,
+            'dizionario': game.dizionario,
+            'versione': game.vocabolario.versione,
             'elapsed_time': 0
         }
         return jsonify(stato_iniziale)
@@ -138,69 +487,140 @@ def restart():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/dizionari')
+def elenco_dizionari():
+    """Elenca i dizionari disponibili, indicando quelli già caricati."""
+    caricati = set(dizionari.caricati())
+    return jsonify({
+        'predefinito': dizionari.predefinito,
+        'dizionari': [
+            {'id': dizionario, 'nome': configurazione.get('nome', dizionario), 'caricato': dizionario in caricati}
+            for dizionario, configurazione in dizionari.configurazione.items()
+        ],
+    })
+
 @app.route('/status')
 def status():
-    """Restituisce lo stato attuale del gioco, incluso il tempo trascorso."""
-    game = get_game()
+    """
+    Restituisce lo stato attuale del gioco, incluso il tempo trascorso.
+
+    La pagina non interroga più questa route a ogni secondo (il timer scorre
+    sul client); resta disponibile come riferimento autorevole del server.
+    """
+    return jsonify(stato_tempo(get_game()))
+
+def stato_tempo(game):
+    """Restituisce il tempo trascorso e se la partita è terminata."""
     if not game.game_over:
-        start_time = session.get('game_data', {}).get('start_time', time.time())
-        elapsed_time = time.time() - start_time
-        return jsonify({'elapsed_time': elapsed_time, 'game_over': False})
-    return jsonify({'elapsed_time': 0, 'game_over': True})
+        return {'elapsed_time': time.time() - game.start_time, 'game_over': False}
+    return {'elapsed_time': 0, 'game_over': True}
 
 @app.route('/hint', methods=['POST'])
 def hint():
     """Fornisce un indizio basato sul prefisso comune tra i due estremi."""
     game = get_game()
+    risposta, codice = esegui_indizio(game)
+    if codice == 200:
+        save_game(game)
+    return jsonify(risposta), codice
+
+def esegui_indizio(game):
+    """
+    Rivela la lettera successiva della parola segreta (senza salvare la partita).
+
+    Returns:
+        Una tupla (risposta, codice HTTP); con codice 200 la partita è cambiata.
+    """
     if game.game_over:
-        return jsonify({'error': 'La partita è già terminata.'}), 400
-
-    # Prendi i due estremi attuali
-    min_word = game.parola_minima
-    max_word = game.parola_massima
-    parola_segreta = game.parola_segreta
-
-    # Trova il prefisso comune tra i due estremi
-    lcp_len = 0
-    while (lcp_len < len(min_word) and
-           lcp_len < len(max_word) and
-           min_word[lcp_len] == max_word[lcp_len]):
-        lcp_len += 1
+        return {'error': 'La partita è già terminata.'}, 400
 
-    # Determina quale lettera rivelare basandosi sul prefisso comune
-    if lcp_len < len(parola_segreta):
-        lettera_da_rivelare = parola_segreta[lcp_len]
-        posizione = lcp_len + 1
+    # Rivela la lettera successiva al prefisso comune tra i due estremi;
+    # i limiti del nuovo prefisso vengono dalla tabella precalcolata
+    prima = game.parole_rimaste()
+    with durata_sezioni.time('hint_lookup'):
+        nuovo_prefisso = game.rivela_lettera(dizionario_di(game).tabella_indizi.limiti)
+    if nuovo_prefisso is None:
+        return {'error': 'Non ci sono più lettere da rivelare!'}, 400
+    registra_evento(
+        'indizio', prefisso=nuovo_prefisso, parola_minima=game.parola_minima, parola_massima=game.parola_massima,
+    )
 
-        # Aggiorna il range basandosi sulla lettera rivelata
-        nuovo_prefisso = parola_segreta[:lcp_len + 1]
+    dopo = game.parole_rimaste()
 
-        # Trova le parole nel vocabolario che iniziano con questo prefisso
-        parole_con_prefisso = [w for w in vocabolario if w.startswith(nuovo_prefisso)]
-
-        if parole_con_prefisso:
-            # Trova la parola minima e massima che inizia con questo prefisso
-            # e che è ancora nel range corrente
-            nuova_minima = max(game.parola_minima, min(parole_con_prefisso))
-            nuova_massima = min(game.parola_massima, max(parole_con_prefisso))
-
-            # Aggiorna il range del gioco
-            game.parola_minima = nuova_minima
-            game.parola_massima = nuova_massima
-            save_game(game)
-    else:
-        return jsonify({'error': 'Non ci sono più lettere da rivelare!'}), 400
+    lettera_da_rivelare = nuovo_prefisso[-1]
+    posizione = len(nuovo_prefisso)
 
     # Formatta il messaggio senza apici e con lettera in bold (HTML)
     messaggio = f"La {posizione}ª lettera è: &nbsp;&nbsp;<strong>{lettera_da_rivelare}</strong>"
 
-    return jsonify({
+    return {
         'messaggio': messaggio,
         'prefisso_rivelato': nuovo_prefisso,
         'parola_minima': game.parola_minima,
         'parola_massima': game.parola_massima,
-        'numero_tentativi': game.numero_tentativi
-    })
+        'numero_tentativi': game.numero_tentativi,
+        'parole_rimaste': dopo,
+        'bit_guadagnati': round(bit_informazione(prima, dopo), 3),
+    }, 200
+
+def prefissi_partita(game, azione):
+    """
+    Restituisce i prefissi dell'alfabeto ausiliario per gli estremi indicati
+    nell'azione o, se mancano, per il range corrente della partita.
+    """
+    min_word = str(azione.get('min_word') or game.parola_minima).lower()
+    max_word = str(azione.get('max_word') or game.parola_massima).lower()
+    return {
+        'parola_minima': min_word,
+        'parola_massima': max_word,
+        'prefixes': prefissi_in_cache(min_word, max_word, game.vocabolario),
+    }, 200
+
+# Azioni di /batch: ognuna riceve la partita e l'azione e restituisce
+# (risposta, codice HTTP, se la partita va salvata)
+AZIONI_BATCH = {
+    'guess': lambda game, azione: (*esegui_tentativo(game, azione.get('parola')), True),
+    'hint': lambda game, azione: (*esegui_indizio(game), True),
+    'prefixes': lambda game, azione: (*prefissi_partita(game, azione), False),
+    'status': lambda game, azione: (stato_tempo(game), 200, False),
+}
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    """
+    Esegue in ordine una lista di azioni sulla stessa partita, caricata e
+    salvata una sola volta, e restituisce tutti i risultati insieme.
+
+    Corpo: {"azioni": [{"azione": "guess", "parola": "casa"}, {"azione": "prefixes"}]}.
+    Le azioni sono guess, hint, prefixes (di default sul range aggiornato
+    dalle azioni precedenti) e status. Un'azione non valida non interrompe
+    le successive: il suo risultato riporta l'errore e il relativo status.
+    """
+    dati = request.get_json(silent=True) or {}
+    if not isinstance(dati, dict):
+        return jsonify({'error': 'Il corpo della richiesta deve essere un oggetto JSON.'}), 400
+    azioni = dati.get('azioni')
+    if not isinstance(azioni, list) or not azioni:
+        return jsonify({'error': 'Nessuna azione fornita.'}), 400
+    if len(azioni) > BATCH_MAX_AZIONI:
+        return jsonify({'error': f'Al massimo {BATCH_MAX_AZIONI} azioni per richiesta.'}), 400
+
+    game = get_game()
+    modificata = False
+    risultati = []
+    for azione in azioni:
+        tipo = azione.get('azione') if isinstance(azione, dict) else None
+        esegui = AZIONI_BATCH.get(tipo)
+        if esegui is None:
+            risultati.append({'azione': tipo, 'status': 400, 'error': f'Azione sconosciuta: {tipo}'})
+            continue
+        risposta, codice, salva = esegui(game, azione)
+        modificata = modificata or (salva and codice == 200)
+        risultati.append({'azione': tipo, 'status': codice, **risposta})
+
+    if modificata:
+        save_game(game)
+    return jsonify({'risultati': risultati})
 
 @app.route('/surrender', methods=['POST'])
 def surrender():
@@ -211,31 +631,147 @@ def surrender():
 
     game.game_over = True
     save_game(game)
+    tempo = time.time() - game.start_time
+    salva_punteggio([{
+        'parola': game.parola_segreta, 'tentativi': game.numero_tentativi, 'indizi': game.indizi_usati,
+        'tempo': tempo, 'arreso': True, 'personalizzata': game.personalizzata,
+    }], archivio_punteggi)
+    registra_evento(
+        'resa', parola=game.parola_segreta, tentativi=game.numero_tentativi,
+        indizi=game.indizi_usati, tempo=round(tempo, 3),
+    )
     return jsonify({
         'risultato': f"Ti sei arreso! La parola segreta era '{game.parola_segreta}'.",
         'parola_segreta': game.parola_segreta,
         'game_over': True
     })
 
-@app.route('/get-alphabet-prefixes', methods=['POST'])
+@app.route('/suggest')
+def suggest():
+    """
+    Suggerisce le parole del vocabolario che iniziano con ?q= e sono comprese
+    nell'intervallo corrente della partita, con paginazione a cursore
+    (?cursor= è l'ultima parola della pagina precedente). Senza una partita
+    nella sessione non ci sono suggerimenti (e non si crea una partita).
+    """
+    prefisso = normalizza_parola(request.args.get('q', ''))
+    if not prefisso:
+        return jsonify({'suggerimenti': [], 'cursor': None})
+    cursore = request.args.get('cursor') or None
+    k = max(1, min(request.args.get('k', SUGGEST_K, type=int), SUGGEST_MAX_K))
+
+    game = partita_salvata()
+    if game is None:
+        return jsonify({'suggerimenti': [], 'cursor': None})
+    parole, altre = game.vocabolario.completions(prefisso, game.parola_minima, game.parola_massima, k, cursore)
+    return jsonify({'suggerimenti': parole, 'cursor': parole[-1] if altre else None})
+
+@app.route('/admin/ricarica-vocabolario', methods=['POST'])
+def ricarica_vocabolario():
+    """
+    Avvia in background la ricarica del vocabolario (?dizionario=..., di default
+    il predefinito) di questo worker. Richiede l'intestazione Authorization: Bearer <ADMIN_TOKEN>.
+    """
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not ADMIN_TOKEN or not secrets.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Non autorizzato.'}), 403
+
+    dizionario = request.args.get('dizionario') or None
+    if dizionario is not None and dizionario not in dizionari:
+        return jsonify({'error': f'Dizionario sconosciuto: {dizionario}'}), 400
+    holder = dizionari.get(dizionario)
+    avviata = holder.ricarica_in_background()
+    return jsonify({
+        'ricarica_avviata': avviata,
+        'versione_corrente': holder.corrente.versione,
+        'versioni': holder.versioni(),
+    }), 202
+
+@app.route('/classifica')
+def classifica():
+    """
+    Restituisce la classifica globale o, con ?parola=..., quella di una parola.
+    La classifica globale non riporta le parole segrete.
+    """
+    parola = normalizza_parola(request.args.get('parola', '')) or None
+    massimo = archivio_punteggi.leaderboard.k
+    k = max(1, min(request.args.get('k', massimo, type=int), massimo))
+    voci = archivio_punteggi.classifica(parola, k)
+    if parola is None:
+        voci = [{campo: valore for campo, valore in voce.items() if campo != 'parola'} for voce in voci]
+    return jsonify({'parola': parola, 'classifica': voci})
+
+@app.route('/get-alphabet-prefixes', methods=['GET', 'POST'])
 def get_alphabet_prefixes():
-    """Genera i prefissi filtrati per l'alfabeto ausiliario."""
+    """
+    Genera i prefissi filtrati per l'alfabeto ausiliario.
+
+    Il vocabolario è quello della versione indicata (?versione=..., inviata
+    dal client) o, in sua assenza, quella a cui è legata la partita della
+    sessione: dopo una ricarica a caldo le partite già iniziate continuano a
+    ricevere i prefissi della propria versione.
+
+    La variante GET (?min_word=...&max_word=...&dizionario=...&versione=...) è
+    memorizzabile da browser e proxy: la risposta dipende solo dal dizionario,
+    dalla versione e dagli estremi, che insieme formano l'URL e l'ETag. Senza
+    versione nell'URL la risposta dipende dalla sessione ed è solo privata.
+    """
     try:
-        data = request.get_json()
+        if request.method == 'GET':
+            data = request.args
+        else:
+            data = request.get_json()
         min_word = data.get('min_word', '').lower()
         max_word = data.get('max_word', '').lower()
 
         if not min_word or not max_word:
             return jsonify({'prefixes': []})
 
-        # Genera prefissi intelligenti basati sul vocabolario
-        prefixes = genera_prefissi_filtrati(min_word, max_word, vocabolario)
-
-        return jsonify({'prefixes': prefixes})
+        dizionario = data.get('dizionario') or None
+        if dizionario is not None and dizionario not in dizionari:
+            return jsonify({'error': f'Dizionario sconosciuto: {dizionario}'}), 400
+        versione = data.get('versione') or None
+        game = partita_salvata() if versione is None else None
+        if game is not None and dizionario in (None, game.dizionario):
+            versione_dizionario = dizionario_di(game)
+        else:
+            holder = dizionari.get(dizionario)
+            versione_dizionario = (versione and holder.versione(versione)) or holder.corrente
+        vocabolario = versione_dizionario.vocabolario
+        etag = hashlib.blake2b(
+            f"{versione_dizionario.dizionario}\0{vocabolario.versione}\0{min_word}\0{max_word}".encode('utf-8'),
+            digest_size=12,
+        ).hexdigest()
+        if request.method == 'GET' and request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            # Genera prefissi intelligenti basati sul vocabolario
+            prefixes = prefissi_in_cache(min_word, max_word, vocabolario)
+            response = jsonify({'prefixes': prefixes})
+
+        if request.method == 'GET':
+            response.set_etag(etag)
+            if versione is not None:
+                response.cache_control.public = True
+            else:
+                response.cache_control.private = True
+                response.vary.add('Cookie')
+            response.cache_control.max_age = PREFIXES_MAX_AGE
+        return response
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def prefissi_in_cache(min_word, max_word, vocabolario):
+    """Restituisce i prefissi filtrati per il range, usando la cache LRU."""
+    chiave = (vocabolario.versione, min_word, max_word)
+    prefixes = prefissi_cache.get(chiave)
+    if prefixes is None:
+        with durata_sezioni.time('genera_prefissi_filtrati'):
+            prefixes = tuple(genera_prefissi_filtrati(min_word, max_word, vocabolario))
+        prefissi_cache.put(chiave, prefixes)
+    return prefixes
+
 def genera_prefissi_filtrati(min_word, max_word, vocab):
     """Genera prefissi con la logica originale ma filtrati per esistenza nel vocabolario."""
 
@@ -243,6 +779,14 @@ def genera_prefissi_filtrati(min_word, max_word, vocab):
     if min_word == 'abaco' and max_word == 'zuzzurellone':
         return [f'{letter}...' for letter in 'abcdefghijklmnopqrstuvwxyz']
 
+    # I prefissi si generano sulla forma piegata dalla collazione (con 'italiano'
+    # senza accenti); gli estremi originali delimitano l'intervallo
+    limite_min, limite_max = min_word, max_word
+    min_word, max_word = vocab.piega(min_word), vocab.piega(max_word)
+    # Un intervallo di una sola parola (ad esempio a partita vinta) non ha prefissi intermedi
+    if min_word >= max_word:
+        return []
+
     # Prima genera i prefissi candidati con la logica originale
     candidate_prefixes = []
 
@@ -308,15 +852,14 @@ def genera_prefissi_filtrati(min_word, max_word, vocab):
         valid_prefixes = candidate_prefixes
     else:
         # Ora filtra: mantieni solo i prefissi che hanno almeno una parola nel vocabolario
-        # Per efficienza, crea un set delle parole nel range
-        words_in_range = {w for w in vocab if min_word <= w <= max_word}
+        # compresa nel range (ricerca binaria sull'indice ordinato)
 
         # Funzione helper per filtrare i prefissi
         def filter_prefixes(prefixes_to_check):
             valid = []
             for prefix in sorted(set(prefixes_to_check)):
                 # Controlla se esiste almeno una parola che inizia con questo prefisso
-                has_word = any(word.startswith(prefix) for word in words_in_range)
+                has_word = vocab.has_prefix_between(prefix, limite_min, limite_max)
                 if has_word:
                     valid.append(prefix)
             return valid
@@ -333,23 +876,19 @@ def genera_prefissi_filtrati(min_word, max_word, vocab):
     # Solo se non siamo già a prefissi di una lettera
     if not (valid_prefixes and len(valid_prefixes[0]) == 1):
         while len(valid_prefixes) <= 2 and expansion_level < max_expansions:
-            longer_candidates = []
-            for prefix in set(current_prefixes):
-                for c in 'abcdefghijklmnopqrstuvwxyz':
-                    longer_candidates.append(prefix + c)
-
-            # Filtra i nuovi prefissi più lunghi
-            if 'filter_prefixes' in locals():
-                valid_prefixes = filter_prefixes(longer_candidates)
-            else:
-                # Se siamo arrivati qui da prefissi di 1 lettera, non filtrare
-                valid_prefixes = longer_candidates
+            # Scende di un livello nel trie implicito del vocabolario: per ogni
+            # prefisso considera solo le lettere figlie che esistono nel range
+            valid_prefixes = sorted(
+                prefix + c
+                for prefix in set(current_prefixes)
+                for c in vocab.child_letters(prefix, limite_min, limite_max)
+            )
 
             # Se abbiamo trovato abbastanza prefissi o siamo al limite, fermati
             if len(valid_prefixes) > 2:
                 break
 
-            current_prefixes = longer_candidates if longer_candidates else current_prefixes
+            current_prefixes = valid_prefixes
             expansion_level += 1
 
     # Formatta i prefissi per la visualizzazione
@@ -360,35 +899,43 @@ def set_custom_word():
     """Imposta una parola segreta personalizzata scelta dall'utente."""
     try:
         data = request.get_json()
-        parola_personalizzata = data.get('parola', '').strip().lower()
+        parola_personalizzata = normalizza_parola(data.get('parola', ''))
 
         if not parola_personalizzata:
             return jsonify({'error': 'Nessuna parola fornita.'}), 400
 
+        # La partita personalizzata usa il dizionario scelto nella sessione
+        dizionario_id = session.get('dizionario')
+        dizionario = dizionari.get(dizionario_id if dizionario_id in dizionari else None).corrente
+        vocabolario = dizionario.vocabolario
         if parola_personalizzata not in vocabolario:
             return jsonify({'error': f'"{parola_personalizzata}" non è una parola valida nel vocabolario.'}), 400
 
         # Crea una nuova partita con la parola personalizzata
+        if 'game_id' in session:
+            game_store.delete(session['game_id'])
         session.clear()
-        game = AbacoGame(parola_personalizzata, vocabolario)
+        session['dizionario'] = dizionario.dizionario
+        game = AbacoGame(
+            parola_personalizzata, vocabolario, personalizzata=True,
+            estremi=dizionario.estremi, dizionario=dizionario.dizionario,
+        )
         session['game_id'] = secrets.token_hex(16)
-        session['game_data'] = {
-            'parola_segreta': parola_personalizzata,
-            'parola_minima': game.parola_minima,
-            'parola_massima': game.parola_massima,
-            'numero_tentativi': game.numero_tentativi,
-            'game_over': game.game_over,
-            'vincitore': game.vincitore,
-            'start_time': time.time()
-        }
-        print(f"Nuova partita personalizzata per sessione {session['game_id']}: {parola_personalizzata}")
+        save_game(game)
+        registra_evento(
+            'partita_iniziata', dizionario=game.dizionario, versione=game.vocabolario.versione,
+            parola_minima=game.parola_minima, parola_massima=game.parola_massima, personalizzata=True,
+        )
 
         stato_iniziale = {
             'parola_minima': game.parola_minima,
             'parola_massima': game.parola_massima,
             'tentativi_rimasti': game.tentativi_rimasti,
             'numero_tentativi': game.numero_tentativi,
+            'parole_rimaste': game.parole_rimaste(),
             'game_over': game.game_over,
+            'dizionario': game.dizionario,
+            'versione': game.vocabolario.versione,
             'elapsed_time': 0
         }
         return jsonify(stato_iniziale)
@@ -398,7 +945,6 @@ def set_custom_word():
 
 
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 8080))
     debug_mode = os.environ.get('DEBUG', 'False').lower() == 'true'
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
\ No newline at end of file
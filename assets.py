@@ -0,0 +1,99 @@
+"""
+Modulo per i file statici con impronta del contenuto.
+
+All'avvio ogni file della cartella static viene letto una volta, gli viene
+assegnato un nome con l'impronta del contenuto (style.css ->
+style.3f2a9c1e.css) e viene compresso con gzip e, se il pacchetto brotli è
+installato, con brotli. Le risposte sono servite dalla memoria con la
+codifica migliore accettata dal client, ETag e Cache-Control immutable: un
+nome con impronta non cambia mai contenuto, quindi il browser non ha
+bisogno di riconvalidarlo e un file modificato ottiene un nome nuovo.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli è opzionale: senza, si servono gzip e identità
+    brotli = None
+
+# Durata della cache per i file con impronta (un anno)
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# Sotto questa dimensione la compressione non conviene
+DIMENSIONE_MINIMA_COMPRESSIONE = 512
+
+class Asset:
+    """
+    Un file statico con impronta, con le sue versioni compresse.
+
+    Attributes:
+        nome (str): Il nome originale del file (relativo alla cartella).
+        nome_impronta (str): Il nome con l'impronta del contenuto.
+        etag (str): L'impronta del contenuto.
+        mimetype (str): Il tipo MIME del file.
+        codifiche (Dict[str, bytes]): Il contenuto per codifica ('identity', 'gzip', 'br').
+    """
+
+    def __init__(self, nome: str, dati: bytes):
+        self.nome = nome
+        self.etag = hashlib.blake2b(dati, digest_size=8).hexdigest()
+        radice, estensione = os.path.splitext(nome)
+        self.nome_impronta = f"{radice}.{self.etag}{estensione}"
+        self.mimetype = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+        self.codifiche: Dict[str, bytes] = {'identity': dati}
+        if len(dati) >= DIMENSIONE_MINIMA_COMPRESSIONE:
+            compresso = gzip.compress(dati, compresslevel=9, mtime=0)
+            if len(compresso) < len(dati):
+                self.codifiche['gzip'] = compresso
+            if brotli is not None:
+                compresso = brotli.compress(dati, quality=11)
+                if len(compresso) < len(dati):
+                    self.codifiche['br'] = compresso
+
+    def codifica_per(self, accept_encoding) -> str:
+        """Sceglie la codifica migliore tra quelle accettate dal client."""
+        for codifica in ('br', 'gzip'):
+            if codifica in self.codifiche and accept_encoding[codifica]:
+                return codifica
+        return 'identity'
+
+class AssetManifest:
+    """
+    Raccolta dei file statici con impronta, letti e compressi all'avvio.
+
+    Attributes:
+        cartella (str): La cartella dei file statici.
+        prefisso_url (str): Il prefisso degli URL dei file con impronta.
+    """
+
+    def __init__(self, cartella: str, prefisso_url: str = '/assets'):
+        self.cartella = cartella
+        self.prefisso_url = prefisso_url
+        self._per_nome: Dict[str, Asset] = {}
+        self._per_impronta: Dict[str, Asset] = {}
+        for radice, _, file in os.walk(cartella):
+            for nome_file in sorted(file):
+                percorso = os.path.join(radice, nome_file)
+                nome = os.path.relpath(percorso, cartella).replace(os.sep, '/')
+                with open(percorso, 'rb') as f:
+                    asset = Asset(nome, f.read())
+                self._per_nome[nome] = asset
+                self._per_impronta[asset.nome_impronta] = asset
+
+    def url(self, nome: str) -> str:
+        """
+        Restituisce l'URL con impronta di un file statico.
+
+        Raises:
+            KeyError: Se il file non esiste nella cartella.
+        """
+        return f"{self.prefisso_url}/{self._per_nome[nome].nome_impronta}"
+
+    def get(self, nome_impronta: str) -> Optional[Asset]:
+        """Restituisce il file con il nome con impronta dato, o None."""
+        return self._per_impronta.get(nome_impronta)
+
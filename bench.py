@@ -0,0 +1,437 @@
+"""
+Benchmark e test di carico degli endpoint di Abaco Zuzzurellone.
+
+Gioca sessioni realistiche (pagina iniziale, tentativi con l'alfabeto
+ausiliario dopo ognuno, indizi, stato, resa, nuove partite, parole
+personalizzate) e misura throughput e latenze p50/p95/p99 per route.
+
+Due modalità:
+    flask     usa il test client di Flask nello stesso processo
+    gunicorn  avvia gunicorn in locale e lo interroga via HTTP, misurando
+              anche il tempo di avvio e la memoria (RSS) di ogni worker
+
+Esempi:
+    python bench.py --modalita flask --sessioni 200
+    python bench.py --modalita gunicorn --worker 2 --concorrenza 8
+    python bench.py --salva-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json --tolleranza 0.2
+
+Con --baseline il comando termina con codice 1 se una route peggiora oltre
+la tolleranza (p95 più alto o throughput più basso della baseline). Il tempo
+di avvio è confrontato solo in modalità gunicorn e con un margine assoluto
+(AVVIO_MARGINE_S): in modalità flask misura l'import dell'app, troppo breve
+e variabile per fare da soglia.
+
+Le misure dipendono dalla macchina e dal vocabolario: una baseline va
+registrata su ogni macchina e per ogni dataset. bench_baseline.json
+(modalità flask, 200 sessioni) vale solo per il vocabolario ridotto incluso
+nel repository; il confronto si rifiuta se il vocabolario è diverso e
+avvisa se la macchina è diversa.
+
+Il benchmark disattiva i limiti di frequenza (RATE_LIMIT_STORE=off, se non
+impostato) e scrive partite, punteggi ed eventi in una cartella temporanea;
+con gunicorn i worker condividono SECRET_KEY e un game store SQLite, così
+una sessione resta valida su qualunque worker.
+"""
+import argparse
+import atexit
+import http.client
+import json
+import math
+import os
+import platform
+import random
+import signal
+import socket
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+# Parole comuni usate per i tentativi scriptati
+PAROLE_PATH = 'data/1000_parole_italiane_comuni.txt'
+# Vocabolario del dizionario predefinito, per riconoscere il dataset della baseline
+VOCABOLARIO_PATH = 'data/660000_parole_italiane.txt'
+BINARIO_PATH = 'data/vocabolario.bin'
+
+# Peggioramento minimo (secondi) del tempo di avvio considerato una regressione
+AVVIO_MARGINE_S = 0.5
+
+class Misure:
+    """Raccoglie le latenze (secondi) e le risposte 5xx/429 per route, in modo thread-safe."""
+
+    def __init__(self):
+        self.latenze: Dict[str, List[float]] = defaultdict(list)
+        self.errori: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def registra(self, route: str, durata: float, stato: int = 200):
+        with self._lock:
+            self.latenze[route].append(durata)
+            if stato >= 500 or stato == 429:
+                self.errori[route] += 1
+
+def _percentile(valori_ordinati: List[float], p: float) -> float:
+    """Percentile con il metodo nearest-rank su una lista già ordinata."""
+    rango = max(1, math.ceil(p / 100 * len(valori_ordinati)))
+    return valori_ordinati[rango - 1]
+
+class ClientFlask:
+    """Client basato sul test client di Flask (un cookie jar per sessione)."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def richiesta(self, metodo: str, percorso: str, dati: Optional[dict] = None) -> Tuple[int, dict]:
+        risposta = self._client.open(percorso, method=metodo, json=dati)
+        corpo = risposta.get_json(silent=True) or {}
+        return risposta.status_code, corpo
+
+class ClientHTTP:
+    """Client HTTP minimale con gestione del cookie di sessione."""
+
+    def __init__(self, host: str, porta: int):
+        self._connessione = http.client.HTTPConnection(host, porta, timeout=30)
+        self._cookie: Optional[str] = None
+
+    def richiesta(self, metodo: str, percorso: str, dati: Optional[dict] = None) -> Tuple[int, dict]:
+        intestazioni = {}
+        corpo = None
+        if dati is not None:
+            corpo = json.dumps(dati)
+            intestazioni['Content-Type'] = 'application/json'
+        if self._cookie:
+            intestazioni['Cookie'] = self._cookie
+        self._connessione.request(metodo, percorso, body=corpo, headers=intestazioni)
+        risposta = self._connessione.getresponse()
+        contenuto = risposta.read()
+        cookie = risposta.getheader('Set-Cookie')
+        if cookie:
+            self._cookie = cookie.split(';', 1)[0]
+        try:
+            return risposta.status, json.loads(contenuto)
+        except ValueError:
+            return risposta.status, {}
+
+    def chiudi(self):
+        self._connessione.close()
+
+def _esegui(client, misure: Misure, metodo: str, percorso: str, dati: Optional[dict] = None) -> Tuple[int, dict]:
+    route = percorso.split('?', 1)[0]
+    inizio = time.perf_counter()
+    stato, corpo = client.richiesta(metodo, percorso, dati)
+    misure.registra(route, time.perf_counter() - inizio, stato)
+    return stato, corpo
+
+def _prefissi(client, misure: Misure, minima: str, massima: str):
+    # Come la pagina: variante GET dell'alfabeto ausiliario
+    percorso = '/get-alphabet-prefixes?' + urlencode({'min_word': minima, 'max_word': massima})
+    _esegui(client, misure, 'GET', percorso)
+
+def _suggerimenti(client, misure: Misure, parola: str, rng: random.Random):
+    # Come l'autocompletamento mentre si digitano le prime lettere
+    percorso = '/suggest?' + urlencode({'q': parola[:rng.randint(1, 3)]})
+    _esegui(client, misure, 'GET', percorso)
+
+def gioca_sessione(client, misure: Misure, parole: List[str], rng: random.Random, max_tentativi: int = 25):
+    """
+    Gioca una sessione scriptata: pagina iniziale, eventuale parola
+    personalizzata, tentativi (con l'alfabeto ausiliario dopo ognuno),
+    indizi, interrogazioni di stato, resa o vittoria e nuova partita.
+    Come la pagina, metà dei tentativi passa da /batch insieme ai prefissi.
+    """
+    _esegui(client, misure, 'GET', '/')
+    if rng.random() < 0.2:
+        _esegui(client, misure, 'POST', '/set-custom-word', {'parola': rng.choice(parole)})
+
+    minima, massima = 'abaco', 'zuzzurellone'
+    _prefissi(client, misure, minima, massima)
+    for _ in range(max_tentativi):
+        if rng.random() < 0.1:
+            stato, corpo = _esegui(client, misure, 'POST', '/hint')
+            if stato == 200:
+                minima, massima = corpo['parola_minima'], corpo['parola_massima']
+                _prefissi(client, misure, minima, massima)
+        if rng.random() < 0.1:
+            _esegui(client, misure, 'GET', '/status')
+
+        # Come un giocatore umano: una parola comune a caso dentro il range
+        candidate = [p for p in parole if minima < p < massima] or [minima, massima]
+        parola = rng.choice(candidate)
+        if rng.random() < 0.3:
+            _suggerimenti(client, misure, parola, rng)
+        if rng.random() < 0.5:
+            stato, corpo = _esegui(client, misure, 'POST', '/batch', {
+                'azioni': [{'azione': 'guess', 'parola': parola}, {'azione': 'prefixes'}],
+            })
+            if stato != 200 or corpo['risultati'][0]['status'] != 200:
+                break
+            corpo = corpo['risultati'][0]
+        else:
+            stato, corpo = _esegui(client, misure, 'POST', '/guess', {'parola': parola})
+            if stato != 200:
+                break
+            _prefissi(client, misure, corpo['parola_minima'], corpo['parola_massima'])
+        minima, massima = corpo['parola_minima'], corpo['parola_massima']
+        if corpo.get('game_over'):
+            break
+    else:
+        _esegui(client, misure, 'POST', '/surrender')
+
+    _esegui(client, misure, 'POST', '/restart')
+
+def riepiloga(misure: Misure, durata: float) -> Dict[str, dict]:
+    """Calcola conteggi, errori, throughput e percentili (ms) per ogni route."""
+    riepilogo = {}
+    for route, latenze in sorted(misure.latenze.items()):
+        ordinate = sorted(latenze)
+        riepilogo[route] = {
+            'richieste': len(ordinate),
+            'errori': misure.errori.get(route, 0),
+            'throughput': len(ordinate) / durata if durata else 0.0,
+            'p50_ms': _percentile(ordinate, 50) * 1000,
+            'p95_ms': _percentile(ordinate, 95) * 1000,
+            'p99_ms': _percentile(ordinate, 99) * 1000,
+        }
+    return riepilogo
+
+def _ambiente_bench(cartella: str) -> Dict[str, str]:
+    """
+    Restituisce le variabili d'ambiente del server sotto benchmark: limiti di
+    frequenza disattivati (salvo diversa indicazione), chiave di sessione e
+    game store condivisi dai worker, file di dati nella cartella temporanea.
+    """
+    return {
+        'RATE_LIMIT_STORE': os.environ.get('RATE_LIMIT_STORE', 'off'),
+        'SECRET_KEY': os.environ.get('SECRET_KEY') or secrets.token_hex(32),
+        'GAME_STORE': os.environ.get('GAME_STORE') or f"sqlite:///{os.path.join(cartella, 'partite.db')}",
+        'SCORES_DB': os.path.join(cartella, 'punteggi.db'),
+        'EVENTI_LOG': os.path.join(cartella, 'eventi-{pid}.jsonl'),
+    }
+
+def _carica_parole() -> List[str]:
+    from abaco_data import carica_parole_da_indovinare
+    return sorted(carica_parole_da_indovinare(PAROLE_PATH))
+
+def _dataset() -> dict:
+    """Dimensione e versione del vocabolario predefinito usato dal benchmark."""
+    from abaco_data import carica_dizionario
+    vocabolario, _ = carica_dizionario(VOCABOLARIO_PATH, PAROLE_PATH, BINARIO_PATH)
+    return {'parole': len(vocabolario), 'versione': vocabolario.versione}
+
+def _macchina() -> dict:
+    """La macchina su cui gira il benchmark."""
+    return {'host': platform.node(), 'cpu': platform.machine(), 'core': os.cpu_count(),
+            'python': platform.python_version()}
+
+def bench_flask(sessioni: int, seme: int) -> dict:
+    """Esegue le sessioni con il test client di Flask, nello stesso processo."""
+    cartella = tempfile.mkdtemp(prefix='abaco-bench-')
+    # Rimossa all'uscita, dopo la chiusura dei registri dell'app (atexit è LIFO)
+    atexit.register(shutil.rmtree, cartella, True)
+    # Un solo processo: il game store in memoria basta
+    ambiente = _ambiente_bench(cartella)
+    ambiente['GAME_STORE'] = os.environ.get('GAME_STORE', 'memory')
+    os.environ.update(ambiente)
+    inizio = time.perf_counter()
+    import app as modulo_app
+    avvio = time.perf_counter() - inizio
+
+    parole = _carica_parole()
+    misure = Misure()
+    rng = random.Random(seme)
+    inizio = time.perf_counter()
+    for _ in range(sessioni):
+        gioca_sessione(ClientFlask(modulo_app.app), misure, parole, rng)
+    durata = time.perf_counter() - inizio
+    return {'modalita': 'flask', 'avvio_s': avvio, 'durata_s': durata, 'route': riepiloga(misure, durata)}
+
+def _porta_libera() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _rss_kb(pid: int) -> Optional[int]:
+    """Legge la memoria residente (VmRSS, in kB) di un processo da /proc."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for riga in f:
+                if riga.startswith('VmRSS:'):
+                    return int(riga.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _figli(pid: int) -> List[int]:
+    """Restituisce i pid dei processi figli diretti (da /proc)."""
+    figli = []
+    for voce in os.listdir('/proc'):
+        if not voce.isdigit():
+            continue
+        try:
+            with open(f'/proc/{voce}/stat') as f:
+                campi = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(campi[1]) == pid:
+            figli.append(int(voce))
+    return figli
+
+def bench_gunicorn(sessioni: int, seme: int, worker: int, concorrenza: int, timeout_avvio: float = 120.0) -> dict:
+    """Avvia gunicorn in locale e gioca le sessioni via HTTP con più thread."""
+    porta = _porta_libera()
+    cartella = tempfile.mkdtemp(prefix='abaco-bench-')
+    ambiente = {**os.environ, **_ambiente_bench(cartella)}
+    inizio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-b', f'127.0.0.1:{porta}', '-w', str(worker)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=ambiente,
+    )
+    try:
+        # Avvio: fino alla prima risposta valida, con una pausa tra i tentativi
+        while True:
+            if processo.poll() is not None:
+                raise RuntimeError("gunicorn è terminato durante l'avvio.")
+            if time.perf_counter() - inizio > timeout_avvio:
+                raise RuntimeError("gunicorn non ha risposto entro il tempo massimo di avvio.")
+            client = ClientHTTP('127.0.0.1', porta)
+            try:
+                if client.richiesta('GET', '/status')[0] == 200:
+                    break
+            except OSError:
+                pass
+            finally:
+                client.chiudi()
+            time.sleep(0.05)
+        avvio = time.perf_counter() - inizio
+
+        parole = _carica_parole()
+        misure = Misure()
+        contatore = iter(range(sessioni))
+        lock = threading.Lock()
+
+        def lavora(indice: int):
+            rng = random.Random(f"{seme}:{indice}")
+            while True:
+                with lock:
+                    if next(contatore, None) is None:
+                        return
+                client = ClientHTTP('127.0.0.1', porta)
+                try:
+                    gioca_sessione(client, misure, parole, rng)
+                finally:
+                    client.chiudi()
+
+        inizio = time.perf_counter()
+        threads = [threading.Thread(target=lavora, args=(i,)) for i in range(concorrenza)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        durata = time.perf_counter() - inizio
+
+        rss = {str(pid): _rss_kb(pid) for pid in _figli(processo.pid)}
+        return {
+            'modalita': 'gunicorn', 'worker': worker, 'concorrenza': concorrenza,
+            'avvio_s': avvio, 'durata_s': durata, 'rss_worker_kb': rss,
+            'route': riepiloga(misure, durata),
+        }
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        try:
+            processo.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+        shutil.rmtree(cartella, ignore_errors=True)
+
+def confronta(risultati: dict, baseline: dict, tolleranza: float) -> List[str]:
+    """
+    Confronta i risultati con la baseline e restituisce le regressioni
+    (p95 più alto o throughput più basso oltre la tolleranza, oppure
+    risposte 5xx/429 dove la baseline non ne aveva). L'avvio conta solo
+    in modalità gunicorn e oltre AVVIO_MARGINE_S.
+    """
+    regressioni = []
+    for route, base in baseline.get('route', {}).items():
+        attuale = risultati['route'].get(route)
+        if attuale is None:
+            continue
+        if attuale['p95_ms'] > base['p95_ms'] * (1 + tolleranza):
+            regressioni.append(f"{route}: p95 {attuale['p95_ms']:.2f} ms (baseline {base['p95_ms']:.2f} ms)")
+        if attuale.get('errori', 0) > base.get('errori', 0):
+            regressioni.append(f"{route}: {attuale['errori']} risposte 5xx/429 (baseline {base.get('errori', 0)})")
+        if attuale['throughput'] < base['throughput'] * (1 - tolleranza):
+            regressioni.append(f"{route}: throughput {attuale['throughput']:.1f}/s (baseline {base['throughput']:.1f}/s)")
+    if risultati['modalita'] == 'gunicorn' and 'avvio_s' in baseline:
+        limite = max(baseline['avvio_s'] * (1 + tolleranza), baseline['avvio_s'] + AVVIO_MARGINE_S)
+        if risultati['avvio_s'] > limite:
+                regressioni.append(f"avvio: {risultati['avvio_s']:.2f} s (baseline {baseline['avvio_s']:.2f} s)")
+    return regressioni
+
+def stampa(risultati: dict):
+    """Stampa una tabella leggibile dei risultati."""
+    print(f"Modalità: {risultati['modalita']}  avvio: {risultati['avvio_s']:.2f} s  durata: {risultati['durata_s']:.2f} s")
+    if 'dataset' in risultati:
+        print(f"Vocabolario: {risultati['dataset']['parole']} parole (versione {risultati['dataset']['versione']})")
+    for pid, rss in sorted(risultati.get('rss_worker_kb', {}).items()):
+        print(f"  worker {pid}: RSS {rss} kB")
+    print(f"{'route':<26}{'richieste':>10}{'errori':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, r in risultati['route'].items():
+        print(f"{route:<26}{r['richieste']:>10}{r.get('errori', 0):>8}{r['throughput']:>10.1f}"
+              f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punto di ingresso da riga di comando del benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark degli endpoint di Abaco Zuzzurellone.")
+    parser.add_argument('--modalita', choices=['flask', 'gunicorn'], default='flask')
+    parser.add_argument('--sessioni', type=int, default=100)
+    parser.add_argument('--seme', type=int, default=0)
+    parser.add_argument('--worker', type=int, default=1, help="Worker gunicorn.")
+    parser.add_argument('--concorrenza', type=int, default=4, help="Client concorrenti (gunicorn).")
+    parser.add_argument('--output', help="Salva i risultati in JSON.")
+    parser.add_argument('--baseline', help="Confronta con una baseline JSON salvata.")
+    parser.add_argument('--tolleranza', type=float, default=0.25, help="Peggioramento ammesso (0.25 = 25%%).")
+    parser.add_argument('--salva-baseline', help="Salva i risultati come nuova baseline.")
+    args = parser.parse_args(argv)
+
+    if args.modalita == 'flask':
+        risultati = bench_flask(args.sessioni, args.seme)
+    else:
+        risultati = bench_gunicorn(args.sessioni, args.seme, args.worker, args.concorrenza)
+    risultati['dataset'] = _dataset()
+    risultati['macchina'] = _macchina()
+    stampa(risultati)
+
+    for percorso in (args.output, args.salva_baseline):
+        if percorso:
+            with open(percorso, 'w', encoding='utf-8') as f:
+                json.dump(risultati, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('modalita') != risultati['modalita']:
+            print("La baseline è stata registrata con un'altra modalità.")
+            return 1
+        if baseline.get('dataset') != risultati['dataset']:
+            print("La baseline è stata registrata con un altro vocabolario: registrarne una per questo dataset.")
+            return 1
+        if baseline.get('macchina') != risultati['macchina']:
+            print("Attenzione: la baseline è stata registrata su un'altra macchina, i tempi non sono confrontabili.")
+        regressioni = confronta(risultati, baseline, args.tolleranza)
+        if regressioni:
+            print("Regressioni rispetto alla baseline:")
+            for regressione in regressioni:
+                print(f"  {regressione}")
+            return 1
+        print("Nessuna regressione rispetto alla baseline.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
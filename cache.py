@@ -0,0 +1,61 @@
+"""
+Modulo con una cache LRU limitata e thread-safe, con contatori di hit e miss.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+class LRUCache:
+    """
+    Cache con capacità massima: quando è piena viene rimossa la voce
+    usata meno di recente.
+
+    Attributes:
+        capacita (int): Il numero massimo di voci mantenute.
+        hits (int): Il numero di letture trovate in cache.
+        misses (int): Il numero di letture non trovate in cache.
+    """
+
+    def __init__(self, capacita: int = 1024):
+        self.capacita = capacita
+        self.hits = 0
+        self.misses = 0
+        self._voci: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chiave: Hashable, default: Any = None) -> Any:
+        """Restituisce il valore associato alla chiave, o default se assente."""
+        with self._lock:
+            try:
+                valore = self._voci[chiave]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._voci.move_to_end(chiave)
+            self.hits += 1
+            return valore
+
+    def put(self, chiave: Hashable, valore: Any):
+        """Inserisce o aggiorna una voce, rimuovendo la meno recente se necessario."""
+        with self._lock:
+            self._voci[chiave] = valore
+            self._voci.move_to_end(chiave)
+            while len(self._voci) > self.capacita:
+                self._voci.popitem(last=False)
+
+    def clear(self):
+        """Svuota la cache (i contatori vengono mantenuti)."""
+        with self._lock:
+            self._voci.clear()
+
+    def __len__(self) -> int:
+        return len(self._voci)
+
+    def stats(self) -> Dict[str, int]:
+        """Restituisce dimensione, capacità e contatori della cache."""
+        return {
+            'size': len(self._voci),
+            'capacity': self.capacita,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# test_live.py è uno script manuale che interroga un server in esecuzione
+# su localhost:8080: non va raccolto da pytest
+collect_ignore = ['test_live.py']
+
+# I test dell'app scrivono punteggi ed eventi in una cartella temporanea
+_cartella = tempfile.mkdtemp(prefix='abaco-test-')
+os.environ.setdefault('SCORES_DB', os.path.join(_cartella, 'punteggi.db'))
+os.environ.setdefault('EVENTI_LOG', os.path.join(_cartella, 'eventi-{pid}.jsonl'))
+os.environ.setdefault('RATE_LIMIT_STORE', 'off')
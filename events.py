@@ -0,0 +1,265 @@
+"""
+Modulo per il registro strutturato degli eventi di gioco.
+
+Gli eventi (partita iniziata, tentativo, indizio, resa, vittoria) vengono
+accodati dal thread della richiesta e scritti da un thread in background
+come righe JSON compatte su un file con rotazione per dimensione: la
+richiesta non attende mai l'I/O su disco. Il campionamento è deciso per
+partita, così una partita campionata è sempre registrata per intero.
+
+Le partite sono identificate da un'impronta del game_id, mai dal game_id
+stesso (che vale come credenziale della sessione); la parola segreta
+compare solo negli eventi di fine partita.
+
+Ogni worker scrive un proprio file (il pid nel nome) con al più
+EVENTI_BACKUP file ruotati da EVENTI_MAX_MB. All'avvio i file lasciati dai
+worker terminati vengono eliminati, dai più vecchi, finché i registri nel
+loro insieme non rientrano in EVENTI_MAX_TOTALE_MB: lo spazio su disco resta
+limitato anche dopo molti riavvii (i file dei worker attivi non vengono
+mai toccati).
+
+Il lettore scorre i file in streaming, senza caricarli interi in memoria:
+
+    python events.py statistiche data/eventi-*.jsonl
+    python events.py partita <id partita> data/eventi-*.jsonl
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# File del registro ({pid} distingue i worker gunicorn, che non possono
+# ruotare lo stesso file), dimensione massima e numero di file ruotati
+EVENTI_LOG = os.environ.get('EVENTI_LOG', 'data/eventi-{pid}.jsonl')
+EVENTI_MAX_MB = float(os.environ.get('EVENTI_MAX_MB', 20))
+EVENTI_BACKUP = int(os.environ.get('EVENTI_BACKUP', 5))
+# Spazio massimo occupato dai registri di tutti i worker, attivi e terminati
+EVENTI_MAX_TOTALE_MB = float(os.environ.get('EVENTI_MAX_TOTALE_MB', 500))
+# Frazione delle partite registrate (da 0 a 1)
+EVENTI_CAMPIONAMENTO = float(os.environ.get('EVENTI_CAMPIONAMENTO', 1.0))
+
+def id_partita(game_id: str) -> str:
+    """Restituisce l'identificativo della partita nel registro (impronta del game_id)."""
+    return hashlib.blake2b(game_id.encode('utf-8'), digest_size=8).hexdigest()
+
+class _CodaEventi(QueueHandler):
+    """QueueHandler che accoda il record così com'è: la serializzazione avviene nel thread di scrittura."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class _FormatoJSON(logging.Formatter):
+    """Formatta un evento come una riga JSON compatta."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(
+            {'ts': round(record.created, 3), **record.msg}, ensure_ascii=False, separators=(',', ':'),
+        )
+
+class EventLog:
+    """
+    Registro degli eventi con scrittura in background.
+
+    Attributes:
+        path (str): Il percorso del file del registro.
+        campionamento (float): La frazione delle partite registrate.
+    """
+
+    def __init__(self, path: str = EVENTI_LOG, max_mb: float = EVENTI_MAX_MB,
+                 backup: int = EVENTI_BACKUP, campionamento: float = EVENTI_CAMPIONAMENTO,
+                 max_totale_mb: float = EVENTI_MAX_TOTALE_MB):
+        self.path = path.format(pid=os.getpid())
+        self.campionamento = min(max(campionamento, 0.0), 1.0)
+        cartella = os.path.dirname(self.path)
+        if cartella:
+            os.makedirs(cartella, exist_ok=True)
+        if '{pid}' in path:
+            pota_registri(path, int(max_totale_mb * 1024 * 1024))
+
+        scrittore = RotatingFileHandler(
+            self.path, maxBytes=int(max_mb * 1024 * 1024), backupCount=backup, encoding='utf-8',
+        )
+        scrittore.setFormatter(_FormatoJSON())
+        coda: 'queue.Queue[logging.LogRecord]' = queue.Queue()
+        self._listener = QueueListener(coda, scrittore)
+
+        # Logger dedicato, senza propagazione verso il logger radice
+        self._logger = logging.getLogger(f'abaco.eventi.{id(self)}')
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.addHandler(_CodaEventi(coda))
+        self._listener.start()
+        self._chiuso = False
+
+    def campionata(self, partita: Optional[str]) -> bool:
+        """Indica se gli eventi della partita vanno registrati (decisione stabile per partita)."""
+        if partita is None or self.campionamento >= 1.0:
+            return True
+        return int(partita[:8], 16) / 0xFFFFFFFF < self.campionamento
+
+    def registra(self, evento: str, partita: Optional[str] = None, **campi):
+        """
+        Accoda un evento, se la partita rientra nel campionamento.
+
+        Args:
+            evento: Il tipo di evento (ad esempio 'tentativo').
+            partita: L'identificativo della partita (vedi id_partita).
+            **campi: I dati dell'evento, serializzabili in JSON.
+        """
+        if not self.campionata(partita):
+            return
+        self._logger.info({'evento': evento, 'partita': partita, **campi})
+
+    def chiudi(self):
+        """Scrive gli eventi ancora in coda e ferma il thread di scrittura."""
+        if self._chiuso:
+            return
+        self._chiuso = True
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+def _processo_attivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Il processo esiste ma appartiene a un altro utente
+        return True
+    return True
+
+def pota_registri(modello: str, max_totale: int) -> List[str]:
+    """
+    Elimina i file dei worker terminati, dai meno recenti, finché i registri
+    che corrispondono al modello (con {pid}) non occupano al più `max_totale`
+    byte. I file dei processi attivi non vengono eliminati.
+
+    Returns:
+        I file eliminati.
+    """
+    schema = re.compile(re.escape(modello).replace(re.escape('{pid}'), r'(\d+)') + r'(?:\.\d+)?')
+    registri = []
+    for file_path in glob.glob(glob.escape(modello).replace(glob.escape('{pid}'), '*') + '*'):
+        trovato = schema.fullmatch(file_path)
+        if trovato is None:
+            continue
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        registri.append((stat.st_mtime, stat.st_size, int(trovato.group(1)), file_path))
+
+    totale = sum(dimensione for _, dimensione, _, _ in registri)
+    eliminati = []
+    for _, dimensione, pid, file_path in sorted(registri):
+        if totale <= max_totale:
+            break
+        if pid == os.getpid() or _processo_attivo(pid):
+            continue
+        try:
+            os.remove(file_path)
+        except OSError:
+            continue
+        totale -= dimensione
+        eliminati.append(file_path)
+    return eliminati
+
+def file_del_registro(path: str) -> List[str]:
+    """Restituisce i file di un registro, dai ruotati più vecchi al corrente."""
+    ruotati = []
+    n = 1
+    while os.path.exists(f"{path}.{n}"):
+        ruotati.append(f"{path}.{n}")
+        n += 1
+    return ruotati[::-1] + ([path] if os.path.exists(path) else [])
+
+def leggi_eventi(percorsi: Iterable[str]) -> Iterator[dict]:
+    """
+    Legge in streaming gli eventi dai file dati (con i rispettivi file
+    ruotati), saltando le righe non valide come una riga troncata.
+    """
+    for path in percorsi:
+        for file_path in file_del_registro(path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for riga in f:
+                    try:
+                        evento = json.loads(riga)
+                    except ValueError:
+                        continue
+                    if isinstance(evento, dict):
+                        yield evento
+
+def eventi_partita(eventi: Iterable[dict], partita: str) -> List[dict]:
+    """Restituisce gli eventi di una partita in ordine cronologico."""
+    return sorted((e for e in eventi if e.get('partita') == partita), key=lambda e: e.get('ts', 0))
+
+def statistiche(eventi: Iterable[dict]) -> Dict[str, object]:
+    """
+    Aggrega in una passata gli eventi: conteggi per tipo, partite iniziate,
+    vinte e arrese, medie di tentativi, indizi e tempo delle vittorie.
+    """
+    conteggi: Dict[str, int] = {}
+    vittorie = tentativi = indizi = 0
+    tempo = 0.0
+    for evento in eventi:
+        tipo = evento.get('evento')
+        conteggi[tipo] = conteggi.get(tipo, 0) + 1
+        if tipo == 'vittoria':
+            vittorie += 1
+            tentativi += evento.get('tentativi', 0)
+            indizi += evento.get('indizi', 0)
+            tempo += evento.get('tempo', 0.0)
+    return {
+        'eventi': conteggi,
+        'partite_iniziate': conteggi.get('partita_iniziata', 0),
+        'vittorie': vittorie,
+        'rese': conteggi.get('resa', 0),
+        'tentativi_medi': tentativi / vittorie if vittorie else None,
+        'indizi_medi': indizi / vittorie if vittorie else None,
+        'tempo_medio': tempo / vittorie if vittorie else None,
+    }
+
+def espandi_percorsi(percorsi: List[str]) -> List[str]:
+    """Espande i pattern e riduce i file ruotati (.1, .2, ...) al file base."""
+    basi = []
+    for pattern in percorsi:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            base, _, suffisso = path.rpartition('.')
+            path = base if suffisso.isdigit() else path
+            if path not in basi:
+                basi.append(path)
+    return basi
+
+def main(argv: Optional[List[str]] = None):
+    """Punto di ingresso da riga di comando del lettore del registro."""
+    parser = argparse.ArgumentParser(description="Legge il registro degli eventi di Abaco Zuzzurellone.")
+    comandi = parser.add_subparsers(dest='comando', required=True)
+    stats = comandi.add_parser('statistiche', help="Aggrega le statistiche degli eventi.")
+    stats.add_argument('file', nargs='+')
+    replay = comandi.add_parser('partita', help="Ripercorre gli eventi di una partita.")
+    replay.add_argument('partita')
+    replay.add_argument('file', nargs='+')
+    args = parser.parse_args(argv)
+
+    eventi = leggi_eventi(espandi_percorsi(args.file))
+    if args.comando == 'statistiche':
+        json.dump(statistiche(eventi), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for evento in eventi_partita(eventi, args.partita):
+            ora = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(evento.pop('ts', 0)))
+            tipo = evento.pop('evento', '?')
+            evento.pop('partita', None)
+            print(f"{ora}  {tipo:<16} {json.dumps(evento, ensure_ascii=False)}")
+
+if __name__ == '__main__':
+    main()
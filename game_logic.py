@@ -1,7 +1,20 @@
 """
 Modulo contenente la logica principale del gioco Abaco Zuzzurellone.
 """
-from typing import Set, Optional
+import math
+import time
+from typing import Callable, Optional, Tuple
+from abaco_data import DIZIONARIO_PREDEFINITO, VocabularyIndex
+from ingestion import normalizza_parola
+
+# Stato serializzabile di una partita (vedi AbacoGame.to_state). Il primo
+# elemento è la versione del formato, l'ultimo la versione del vocabolario
+# con cui è iniziata la partita
+GameState = Tuple[int, str, str, str, Optional[int], Optional[int], Optional[str], bool, int, float, int, bool, str, str]
+
+# Versione del formato dello stato: da incrementare quando cambia to_state
+# (gli stati salvati con un altro formato vengono scartati)
+FORMATO_STATO = 1
 
 class AbacoGame:
     """
@@ -9,7 +22,7 @@ class AbacoGame:
 
     Attributes:
         parola_segreta (str): La parola che i giocatori devono indovinare.
-        vocabolario (Set[str]): Il set di parole valide per il gioco.
+        vocabolario (VocabularyIndex): L'indice delle parole valide per il gioco.
         parola_minima (str): L'estremo inferiore corrente dell'intervallo di ricerca.
         parola_massima (str): L'estremo superiore corrente dell'intervallo di ricerca.
         max_tentativi (Optional[int]): Il numero massimo di tentativi permessi.
@@ -17,28 +30,44 @@ class AbacoGame:
         vincitore (Optional[str]): Il nome del giocatore che ha vinto.
         game_over (bool): Flag che indica se la partita è terminata.
         numero_tentativi (int): Contatore dei tentativi effettuati.
+        start_time (float): Il momento (epoch) di inizio della partita.
+        indizi_usati (int): Il numero di lettere rivelate con gli indizi.
+        personalizzata (bool): Flag che indica se la parola segreta è stata scelta da un utente.
+        dizionario (str): L'identificativo del dizionario della partita.
     """
 
-    def __init__(self, parola_segreta: str, vocabolario: Set[str], max_tentativi: Optional[int] = None):
+    __slots__ = (
+        'parola_segreta', 'vocabolario', 'parola_minima', 'parola_massima',
+        'max_tentativi', 'tentativi_rimasti', 'vincitore', 'game_over',
+        'numero_tentativi', 'start_time', 'indizi_usati', 'personalizzata', 'dizionario',
+    )
+
+    def __init__(self, parola_segreta: str, vocabolario: VocabularyIndex, max_tentativi: Optional[int] = None,
+                 personalizzata: bool = False, estremi: Tuple[str, str] = ("abaco", "zuzzurellone"),
+                 dizionario: str = DIZIONARIO_PREDEFINITO):
         """
         Inizializza una nuova partita.
 
         Args:
             parola_segreta: La parola da indovinare.
-            vocabolario: Il set di parole valide.
+            vocabolario: L'indice delle parole valide.
             max_tentativi: Numero massimo di tentativi. Se None, i tentativi sono illimitati.
+            personalizzata: Se la parola segreta è stata scelta da un utente.
+            estremi: L'intervallo iniziale (parola minima e massima).
+            dizionario: L'identificativo del dizionario della partita.
         
         Raises:
             ValueError: Se la parola segreta non è nel vocabolario.
         """
-        if parola_segreta.lower() not in vocabolario:
+        parola_segreta = normalizza_parola(parola_segreta)
+        if parola_segreta not in vocabolario:
             raise ValueError("La parola segreta deve essere presente nel vocabolario.")
 
-        self.parola_segreta: str = parola_segreta.lower()
-        self.vocabolario: Set[str] = vocabolario
+        self.parola_segreta: str = parola_segreta
+        self.vocabolario: VocabularyIndex = vocabolario
         
-        self.parola_minima: str = "abaco"
-        self.parola_massima: str = "zuzzurellone"
+        self.parola_minima: str = estremi[0]
+        self.parola_massima: str = estremi[1]
         
         self.max_tentativi: Optional[int] = max_tentativi
         self.tentativi_rimasti: Optional[int] = max_tentativi
@@ -46,6 +75,72 @@ class AbacoGame:
         self.vincitore: Optional[str] = None
         self.game_over: bool = False
         self.numero_tentativi: int = 0
+        self.start_time: float = time.time()
+        self.indizi_usati: int = 0
+        self.personalizzata: bool = personalizzata
+        self.dizionario: str = dizionario
+
+    def to_state(self) -> GameState:
+        """
+        Restituisce lo stato della partita come tupla compatta di valori
+        primitivi (senza il vocabolario), adatta a essere memorizzata.
+        """
+        return (
+            FORMATO_STATO, self.parola_segreta, self.parola_minima, self.parola_massima,
+            self.max_tentativi, self.tentativi_rimasti, self.vincitore,
+            self.game_over, self.numero_tentativi, self.start_time,
+            self.indizi_usati, self.personalizzata, self.dizionario, self.vocabolario.versione,
+        )
+
+    @classmethod
+    def from_state(cls, stato: GameState, vocabolario: VocabularyIndex) -> 'AbacoGame':
+        """
+        Ricostruisce una partita da uno stato prodotto da to_state,
+        senza ripetere la validazione della parola segreta.
+
+        Args:
+            stato: Lo stato serializzato della partita.
+            vocabolario: L'indice delle parole valide. Se la versione non è
+                quella della partita, la parola segreta deve esserne parte.
+
+        Raises:
+            ValueError: Se lo stato ha un altro formato o non è compatibile
+                con il vocabolario.
+        """
+        if not AbacoGame.formato_valido(stato):
+            raise ValueError("Stato della partita salvato con un formato diverso.")
+        game = cls.__new__(cls)
+        game.vocabolario = vocabolario
+        (_, game.parola_segreta, game.parola_minima, game.parola_massima,
+         game.max_tentativi, game.tentativi_rimasti, game.vincitore,
+         game.game_over, game.numero_tentativi, game.start_time,
+         game.indizi_usati, game.personalizzata, game.dizionario, versione) = stato
+        if versione != vocabolario.versione and game.parola_segreta not in vocabolario:
+            raise ValueError("La parola segreta non è presente in questa versione del vocabolario.")
+        return game
+
+    @staticmethod
+    def formato_valido(stato: GameState) -> bool:
+        """Indica se lo stato salvato è nel formato corrente."""
+        return len(stato) == len(GameState.__args__) and stato[0] == FORMATO_STATO
+
+    @staticmethod
+    def versione_stato(stato: GameState) -> Tuple[Optional[str], Optional[str]]:
+        """Restituisce (dizionario, versione del vocabolario) di uno stato salvato."""
+        if not AbacoGame.formato_valido(stato):
+            return None, None
+        return stato[-2], stato[-1]
+
+    def parole_rimaste(self) -> int:
+        """
+        Conta le parole del vocabolario comprese nell'intervallo corrente
+        (estremi inclusi), in O(log N) dalle posizioni nell'indice ordinato.
+        Indovinata la parola ne resta una sola: il tentativo vincente non
+        restringe l'intervallo ma azzera l'incertezza.
+        """
+        if self.vincitore:
+            return 1
+        return self.vocabolario.count_between(self.parola_minima, self.parola_massima)
 
     def processa_tentativo(self, parola_proposta: str, nome_giocatore: str) -> str:
         """
@@ -58,7 +153,7 @@ class AbacoGame:
         Returns:
             Una stringa che descrive il risultato del tentativo.
         """
-        parola = parola_proposta.lower()
+        parola = normalizza_parola(parola_proposta)
 
         if self.game_over:
             return "La partita è già terminata."
@@ -67,7 +162,10 @@ class AbacoGame:
         if parola not in self.vocabolario:
             return f"'{parola}' non è una parola valida nel vocabolario."
 
-        if not (self.parola_minima <= parola <= self.parola_massima):
+        # I confronti usano le chiavi della collazione del vocabolario
+        chiave = self.vocabolario.chiave
+        chiave_parola = chiave(parola)
+        if not (chiave(self.parola_minima) <= chiave_parola <= chiave(self.parola_massima)):
             return f"'{parola}' non è compresa tra '{self.parola_minima}' e '{self.parola_massima}' (estremi inclusi)."
 
         # Incrementa il numero di tentativi solo se la parola è valida e nel range
@@ -83,10 +181,10 @@ class AbacoGame:
             return f"Hai indovinato! La parola era '{self.parola_segreta}'. Complimenti!"
 
         # 3. Aggiornamento intervallo
-        if parola < self.parola_segreta:
+        if chiave_parola < chiave(self.parola_segreta):
             self.parola_minima = parola
             risultato = "DOPO. La parola segreta viene dopo."
-        else: # parola > self.parola_segreta
+        else: # la parola viene dopo la parola segreta
             self.parola_massima = parola
             risultato = "PRIMA. La parola segreta viene prima."
             
@@ -97,3 +195,48 @@ class AbacoGame:
 
         return risultato
 
+    def rivela_lettera(self, limiti_prefisso: Callable[[str], Optional[Tuple[str, str]]]) -> Optional[str]:
+        """
+        Rivela la lettera della parola segreta che segue il prefisso comune
+        tra i due estremi e restringe l'intervallo alle parole del vocabolario
+        che iniziano con il prefisso rivelato.
+
+        Args:
+            limiti_prefisso: Funzione che dato un prefisso restituisce la parola
+                minima e massima del vocabolario con quel prefisso (o None).
+
+        Returns:
+            Il prefisso rivelato, o None se non ci sono più lettere da rivelare.
+        """
+        # Trova il prefisso comune tra i due estremi, nella forma piegata dalla
+        # collazione (con 'italiano' le lettere accentate valgono come le semplici)
+        piega = self.vocabolario.piega
+        min_word, max_word = piega(self.parola_minima), piega(self.parola_massima)
+        segreta = piega(self.parola_segreta)
+        lcp_len = 0
+        while (lcp_len < len(min_word) and
+               lcp_len < len(max_word) and
+               min_word[lcp_len] == max_word[lcp_len]):
+            lcp_len += 1
+
+        if lcp_len >= len(segreta):
+            return None
+
+        nuovo_prefisso = segreta[:lcp_len + 1]
+        limiti = limiti_prefisso(nuovo_prefisso)
+        if limiti is not None:
+            # Mantiene il range corrente se è già più stretto
+            chiave = self.vocabolario.chiave
+            self.parola_minima = max(self.parola_minima, limiti[0], key=chiave)
+            self.parola_massima = min(self.parola_massima, limiti[1], key=chiave)
+        self.indizi_usati += 1
+        return nuovo_prefisso
+
+def bit_informazione(prima: int, dopo: int) -> float:
+    """
+    Restituisce l'informazione guadagnata (in bit) da una mossa che riduce
+    le parole possibili da `prima` a `dopo`: log2(prima / dopo).
+    """
+    if prima <= 0 or dopo <= 0:
+        return 0.0
+    return math.log2(prima / dopo)
@@ -0,0 +1,157 @@
+"""
+Modulo per la memorizzazione lato server dello stato delle partite.
+
+Il cookie di sessione contiene solo l'identificativo della partita; lo stato
+(vedi AbacoGame.to_state) vive in un GameStore. Sono disponibili un backend
+in memoria (LRU con scadenza, per un singolo processo) e un backend SQLite
+in modalità WAL, condivisibile tra più worker gunicorn.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from game_logic import GameState
+
+# Scadenza predefinita di una partita inattiva (secondi)
+TTL_PREDEFINITO = 6 * 60 * 60
+
+class GameStore(ABC):
+    """Interfaccia comune dei backend di memorizzazione delle partite."""
+
+    @abstractmethod
+    def get(self, game_id: str) -> Optional[GameState]:
+        """Restituisce lo stato della partita, o None se assente o scaduta."""
+
+    @abstractmethod
+    def put(self, game_id: str, stato: GameState):
+        """Salva (o sostituisce) lo stato della partita."""
+
+    @abstractmethod
+    def delete(self, game_id: str):
+        """Rimuove la partita, se presente."""
+
+class MemoryGameStore(GameStore):
+    """
+    Backend in memoria del processo, con eviction LRU e scadenza.
+
+    Attributes:
+        max_partite (int): Il numero massimo di partite mantenute.
+        ttl (float): I secondi di inattività dopo cui una partita scade.
+    """
+
+    def __init__(self, max_partite: int = 10000, ttl: float = TTL_PREDEFINITO):
+        self.max_partite = max_partite
+        self.ttl = ttl
+        self._partite: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, game_id: str) -> Optional[GameState]:
+        with self._lock:
+            voce = self._partite.get(game_id)
+            if voce is None:
+                return None
+            stato, scadenza = voce
+            if scadenza < time.monotonic():
+                del self._partite[game_id]
+                return None
+            self._partite.move_to_end(game_id)
+            return stato
+
+    def put(self, game_id: str, stato: GameState):
+        with self._lock:
+            self._partite[game_id] = (stato, time.monotonic() + self.ttl)
+            self._partite.move_to_end(game_id)
+            while len(self._partite) > self.max_partite:
+                self._partite.popitem(last=False)
+
+    def delete(self, game_id: str):
+        with self._lock:
+            self._partite.pop(game_id, None)
+
+    def __len__(self) -> int:
+        return len(self._partite)
+
+class SQLiteGameStore(GameStore):
+    """
+    Backend SQLite in modalità WAL, condiviso tra i processi che usano
+    lo stesso file. Le partite inattive oltre il ttl vengono eliminate
+    periodicamente.
+
+    Attributes:
+        path (str): Il percorso del database.
+        ttl (float): I secondi di inattività dopo cui una partita scade.
+    """
+
+    # Ogni quante scritture eliminare le partite scadute
+    PULIZIA_OGNI = 1000
+
+    def __init__(self, path: str, ttl: float = TTL_PREDEFINITO):
+        self.path = path
+        self.ttl = ttl
+        self._locale = threading.local()
+        self._scritture = 0
+        with self._connessione() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS partite ("
+                " game_id TEXT PRIMARY KEY,"
+                " stato TEXT NOT NULL,"
+                " aggiornato REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS partite_aggiornato ON partite (aggiornato)")
+
+    def _connessione(self) -> sqlite3.Connection:
+        """Restituisce la connessione del thread corrente (una per thread)."""
+        conn = getattr(self._locale, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._locale.conn = conn
+        return conn
+
+    def get(self, game_id: str) -> Optional[GameState]:
+        riga = self._connessione().execute(
+            "SELECT stato FROM partite WHERE game_id = ? AND aggiornato >= ?",
+            (game_id, time.time() - self.ttl),
+        ).fetchone()
+        if riga is None:
+            return None
+        return tuple(json.loads(riga[0]))
+
+    def put(self, game_id: str, stato: GameState):
+        adesso = time.time()
+        with self._connessione() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO partite (game_id, stato, aggiornato) VALUES (?, ?, ?)",
+                (game_id, json.dumps(stato, separators=(',', ':')), adesso),
+            )
+            self._scritture += 1
+            if self._scritture % self.PULIZIA_OGNI == 0:
+                conn.execute("DELETE FROM partite WHERE aggiornato < ?", (adesso - self.ttl,))
+
+    def delete(self, game_id: str):
+        with self._connessione() as conn:
+            conn.execute("DELETE FROM partite WHERE game_id = ?", (game_id,))
+
+def crea_game_store(configurazione: Optional[str] = None) -> GameStore:
+    """
+    Crea il backend indicato dalla configurazione (di default la variabile
+    d'ambiente GAME_STORE): 'memory' oppure 'sqlite:///percorso/del/file.db'.
+
+    Raises:
+        ValueError: Se la configurazione non è riconosciuta.
+    """
+    if configurazione is None:
+        configurazione = os.environ.get('GAME_STORE', 'memory')
+    ttl = float(os.environ.get('GAME_TTL', TTL_PREDEFINITO))
+
+    if configurazione == 'memory':
+        return MemoryGameStore(int(os.environ.get('GAME_STORE_MAX', 10000)), ttl)
+    if configurazione.startswith('sqlite:///'):
+        return SQLiteGameStore(configurazione[len('sqlite:///'):], ttl)
+    raise ValueError(f"Backend GAME_STORE non riconosciuto: {configurazione}")
@@ -0,0 +1,204 @@
+"""
+Modulo per l'acquisizione degli elenchi di parole.
+
+Gli elenchi (testo semplice, gzip o xz, una parola per riga) vengono letti
+in streaming e attraversano in un'unica passata le fasi di normalizzazione
+(NFC, minuscole, forme con apostrofo), filtro, rimozione dei duplicati e
+ordinamento. L'ordinamento è esterno: le parole vengono accumulate in
+blocchi di dimensione limitata, ordinate, scritte su file temporanei e poi
+fuse, così anche elenchi di milioni di parole richiedono memoria limitata.
+
+Il risultato viene salvato in una cache indicizzata dall'impronta del file
+sorgente e dei parametri: un elenco invariato si ricarica dalla cache senza
+ripetere l'elaborazione.
+"""
+import gzip
+import hashlib
+import heapq
+import logging
+import lzma
+import os
+import tempfile
+import unicodedata
+from typing import IO, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Da incrementare quando cambiano le regole di normalizzazione (invalida la cache)
+VERSIONE_NORMALIZZAZIONE = 2
+
+# Cartella della cache degli elenchi elaborati
+CARTELLA_CACHE = os.environ.get('INGESTIONE_CACHE', 'data/cache')
+
+# Parole distinte ordinate in memoria prima di essere scritte su file temporaneo
+DIMENSIONE_BLOCCO = 500_000
+
+_MAGIC_GZIP = b'\x1f\x8b'
+_MAGIC_XZ = b'\xfd7zXZ\x00'
+
+# Varianti tipografiche dell'apostrofo
+_APOSTROFI = str.maketrans({'’': "'", '‘': "'", 'ʼ': "'", '`': "'", '´': "'"})
+
+# Vocale finale seguita da apostrofo scritta al posto della vocale accentata
+_ACCENTO_GRAVE = {'a': 'à', 'e': 'è', 'i': 'ì', 'o': 'ò', 'u': 'ù'}
+
+# Troncamenti veri, in cui l'apostrofo non sostituisce un accento
+TRONCAMENTI = frozenset({"po'", "mo'", "be'", "to'", "di'", "fa'", "va'", "sta'", "da'", "de'", "pie'"})
+
+def normalizza_parola(parola: str) -> str:
+    """
+    Riporta una parola alla forma canonica usata dal vocabolario: spazi
+    rimossi, minuscole, composizione Unicode NFC e accento al posto
+    dell'apostrofo finale ("citta'" -> "città", "perche'" -> "perché").
+
+    Args:
+        parola: La parola da normalizzare (anche inserita da un giocatore).
+
+    Returns:
+        La parola normalizzata.
+    """
+    parola = unicodedata.normalize('NFC', parola.strip().translate(_APOSTROFI).lower())
+    if len(parola) < 2 or parola[-1] != "'" or parola[-2] not in _ACCENTO_GRAVE or parola in TRONCAMENTI:
+        return parola
+    radice, vocale = parola[:-2], parola[-2]
+    # Accento acuto: -ché (perché, finché...), -tré (ventitré...), né e sé
+    if vocale == 'e' and (radice.endswith('ch') or (radice.endswith('tr') and len(radice) > 2)
+                          or radice in ('n', 's')):
+        return radice + 'é'
+    return radice + _ACCENTO_GRAVE[vocale]
+
+def apri_elenco(file_path: str) -> IO[str]:
+    """
+    Apre in lettura un elenco di parole, riconoscendo dal contenuto se è
+    compresso con gzip o xz.
+
+    Raises:
+        FileNotFoundError: Se il file non viene trovato.
+    """
+    with open(file_path, 'rb') as f:
+        inizio = f.read(len(_MAGIC_XZ))
+    if inizio.startswith(_MAGIC_GZIP):
+        return gzip.open(file_path, 'rt', encoding='utf-8')
+    if inizio.startswith(_MAGIC_XZ):
+        return lzma.open(file_path, 'rt', encoding='utf-8')
+    return open(file_path, 'r', encoding='utf-8')
+
+def parole_normalizzate(righe: Iterable[str]) -> Iterator[str]:
+    """Normalizza le righe di un elenco, saltando quelle vuote."""
+    for riga in righe:
+        parola = normalizza_parola(riga)
+        if parola:
+            yield parola
+
+def filtra_parole(parole: Iterable[str], lunghezza_minima: int = 1,
+                  escluse: Iterable[str] = ()) -> Iterator[str]:
+    """
+    Scarta le parole troppo corte, quelle escluse (ad esempio gli articoli)
+    e quelle che contengono caratteri diversi dalle lettere, salvo
+    l'apostrofo finale dei troncamenti (po', be'...).
+    """
+    escluse = frozenset(escluse)
+    for parola in parole:
+        if len(parola) >= lunghezza_minima and parola not in escluse and (parola.isalpha() or parola in TRONCAMENTI):
+            yield parola
+
+def _leggi_blocco(file_path: str) -> Iterator[str]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for riga in f:
+            yield riga[:-1]
+
+def ordina_senza_duplicati(parole: Iterable[str], dimensione_blocco: int = DIMENSIONE_BLOCCO) -> Iterator[str]:
+    """
+    Ordina le parole rimuovendo i duplicati, con memoria limitata a circa
+    `dimensione_blocco` parole: i blocchi ordinati vengono scritti su file
+    temporanei e fusi alla fine.
+
+    Args:
+        parole: Le parole, in qualsiasi ordine.
+        dimensione_blocco: Le parole distinte mantenute in memoria per blocco.
+
+    Returns:
+        Un iteratore sulle parole distinte in ordine crescente.
+    """
+    with tempfile.TemporaryDirectory(prefix='abaco-ordina-') as cartella:
+        blocchi: List[str] = []
+        corrente = set()
+        for parola in parole:
+            corrente.add(parola)
+            if len(corrente) >= dimensione_blocco:
+                blocchi.append(_scrivi_blocco(cartella, len(blocchi), corrente))
+                corrente = set()
+
+        if not blocchi:
+            # Tutto in un blocco: nessun file temporaneo
+            yield from sorted(corrente)
+            return
+        if corrente:
+            blocchi.append(_scrivi_blocco(cartella, len(blocchi), corrente))
+
+        precedente = None
+        for parola in heapq.merge(*(_leggi_blocco(blocco) for blocco in blocchi)):
+            if parola != precedente:
+                yield parola
+                precedente = parola
+
+def _scrivi_blocco(cartella: str, numero: int, parole: set) -> str:
+    percorso = os.path.join(cartella, f"{numero}.txt")
+    with open(percorso, 'w', encoding='utf-8') as f:
+        for parola in sorted(parole):
+            f.write(parola)
+            f.write('\n')
+    return percorso
+
+def impronta_sorgente(file_path: str) -> str:
+    """Calcola l'impronta del contenuto (compresso o no) di un file, a blocchi."""
+    impronta = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for blocco in iter(lambda: f.read(1 << 20), b''):
+            impronta.update(blocco)
+    return impronta.hexdigest()
+
+def ingerisci(file_path: str, lunghezza_minima: int = 1, escluse: Iterable[str] = (),
+              cartella_cache: Optional[str] = CARTELLA_CACHE) -> List[str]:
+    """
+    Legge un elenco di parole e restituisce le parole normalizzate, filtrate,
+    distinte e ordinate, usando la cache se il file non è cambiato.
+
+    Args:
+        file_path: Il percorso dell'elenco (testo semplice, gzip o xz).
+        lunghezza_minima: La lunghezza minima delle parole.
+        escluse: Le parole da scartare.
+        cartella_cache: La cartella della cache (None per non usarla).
+
+    Returns:
+        Le parole in ordine crescente, senza duplicati.
+
+    Raises:
+        FileNotFoundError: Se il file non viene trovato.
+    """
+    escluse = sorted(escluse)
+    chiave = hashlib.blake2b(
+        f"{VERSIONE_NORMALIZZAZIONE}\0{lunghezza_minima}\0{chr(1).join(escluse)}\0"
+        f"{impronta_sorgente(file_path)}".encode('utf-8'),
+        digest_size=16,
+    ).hexdigest()
+    percorso_cache = os.path.join(cartella_cache, f"{chiave}.txt") if cartella_cache else None
+
+    if percorso_cache and os.path.exists(percorso_cache):
+        with open(percorso_cache, 'r', encoding='utf-8') as f:
+            return f.read().split('\n') if os.path.getsize(percorso_cache) else []
+
+    with apri_elenco(file_path) as f:
+        parole = list(ordina_senza_duplicati(filtra_parole(parole_normalizzate(f), lunghezza_minima, escluse)))
+
+    if percorso_cache:
+        try:
+            os.makedirs(cartella_cache, exist_ok=True)
+            # Temporaneo per processo: più worker possono elaborare lo stesso elenco
+            temporaneo = f"{percorso_cache}.{os.getpid()}.tmp"
+            with open(temporaneo, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(parole))
+            os.replace(temporaneo, percorso_cache)
+        except OSError as e:
+            logger.warning("Impossibile salvare la cache dell'elenco %s: %s", file_path, e)
+    return parole
@@ -0,0 +1,242 @@
+"""
+Modulo per la strumentazione dell'applicazione: istogrammi di latenza,
+contatori e gauge esportati nel formato testuale di Prometheus.
+
+Ogni processo aggiorna un registro in memoria (costo di pochi microsecondi
+per osservazione). Se è configurata una cartella condivisa (METRICS_DIR),
+un thread in background di ogni worker vi scrive periodicamente
+un'istantanea del proprio registro, fuori dal percorso delle richieste, e la
+route /metrics aggrega le istantanee dei worker attivi: quelle non più
+aggiornate (worker terminati) vengono scartate e rimosse.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Limiti superiori (secondi) dei bucket degli istogrammi di latenza
+BUCKET_LATENZA = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+class Histogram:
+    """
+    Istogramma con bucket fissi, suddiviso per valori delle etichette.
+
+    Per ogni combinazione di etichette mantiene i conteggi per bucket
+    (non cumulativi, l'ultimo è +Inf), la somma e il numero di osservazioni.
+    """
+
+    tipo = 'histogram'
+
+    def __init__(self, nome: str, descrizione: str, etichette: Sequence[str] = (),
+                 bucket: Sequence[float] = BUCKET_LATENZA):
+        self.nome = nome
+        self.descrizione = descrizione
+        self.etichette = tuple(etichette)
+        self.bucket = tuple(bucket)
+        self.serie: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def osserva(self, valore: float, *valori_etichette: str):
+        """Registra un'osservazione per i valori di etichetta dati."""
+        indice = bisect_left(self.bucket, valore)
+        with self._lock:
+            serie = self.serie.get(valori_etichette)
+            if serie is None:
+                # Conteggi per bucket (+Inf incluso), poi somma e numero
+                serie = self.serie[valori_etichette] = [0] * (len(self.bucket) + 1) + [0.0, 0]
+            serie[indice] += 1
+            serie[-2] += valore
+            serie[-1] += 1
+
+    def time(self, *valori_etichette: str) -> '_Timer':
+        """Restituisce un context manager che misura la durata del blocco."""
+        return _Timer(self, valori_etichette)
+
+class _Timer:
+    """Context manager leggero che osserva la durata di un blocco."""
+
+    __slots__ = ('_istogramma', '_etichette', '_inizio')
+
+    def __init__(self, istogramma: Histogram, etichette: Tuple[str, ...]):
+        self._istogramma = istogramma
+        self._etichette = etichette
+
+    def __enter__(self):
+        self._inizio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._istogramma.osserva(time.perf_counter() - self._inizio, *self._etichette)
+        return False
+
+class Gauge:
+    """Valore istantaneo, suddiviso per valori delle etichette."""
+
+    tipo = 'gauge'
+
+    def __init__(self, nome: str, descrizione: str, etichette: Sequence[str] = ()):
+        self.nome = nome
+        self.descrizione = descrizione
+        self.etichette = tuple(etichette)
+        self.serie: Dict[Tuple[str, ...], float] = {}
+
+    def imposta(self, valore: float, *valori_etichette: str):
+        self.serie[valori_etichette] = valore
+
+class Counter(Gauge):
+    """Contatore monotono, suddiviso per valori delle etichette."""
+
+    tipo = 'counter'
+
+    def incrementa(self, *valori_etichette: str, valore: float = 1):
+        self.serie[valori_etichette] = self.serie.get(valori_etichette, 0) + valore
+
+# Intervalli di scrittura senza aggiornamenti dopo cui un'istantanea è
+# considerata di un worker terminato
+INTERVALLI_SCADENZA = 6
+
+class Registry:
+    """
+    Registro delle metriche di un processo, con aggregazione opzionale
+    tra i worker tramite istantanee su disco.
+
+    Attributes:
+        cartella (Optional[str]): La cartella condivisa delle istantanee.
+        intervallo (float): I secondi tra due istantanee dello stesso worker.
+    """
+
+    def __init__(self, cartella: Optional[str] = None, intervallo: float = 5.0):
+        self.cartella = cartella
+        self.intervallo = intervallo
+        self.metriche: Dict[str, object] = {}
+        self._lock_istantanea = threading.Lock()
+        if cartella:
+            os.makedirs(cartella, exist_ok=True)
+            self._avvia_scrittore()
+            # Un worker creato con fork (gunicorn --preload) non eredita il
+            # thread: ne avvia uno proprio
+            if hasattr(os, 'register_at_fork'):
+                os.register_at_fork(after_in_child=self._avvia_scrittore)
+
+    def _avvia_scrittore(self):
+        threading.Thread(target=self._scrivi_periodicamente, name='abaco-metriche', daemon=True).start()
+
+    def _scrivi_periodicamente(self):
+        while True:
+            time.sleep(self.intervallo)
+            try:
+                self.salva_istantanea()
+            except OSError:
+                # Cartella non scrivibile al momento: si riprova al giro successivo
+                pass
+
+    def _registra(self, metrica):
+        self.metriche[metrica.nome] = metrica
+        return metrica
+
+    def histogram(self, nome: str, descrizione: str, etichette: Sequence[str] = (),
+                  bucket: Sequence[float] = BUCKET_LATENZA) -> Histogram:
+        return self._registra(Histogram(nome, descrizione, etichette, bucket))
+
+    def gauge(self, nome: str, descrizione: str, etichette: Sequence[str] = ()) -> Gauge:
+        return self._registra(Gauge(nome, descrizione, etichette))
+
+    def counter(self, nome: str, descrizione: str, etichette: Sequence[str] = ()) -> Counter:
+        return self._registra(Counter(nome, descrizione, etichette))
+
+    def _istantanea(self) -> dict:
+        return {
+            nome: [[list(etichette), valore] for etichette, valore in list(metrica.serie.items())]
+            for nome, metrica in self.metriche.items()
+        }
+
+    def salva_istantanea(self):
+        """
+        Scrive l'istantanea di questo worker nella cartella condivisa. Il file
+        viene sostituito atomicamente da un temporaneo con nome univoco, sotto
+        un lock: scritture concorrenti dello stesso processo non si intralciano.
+        """
+        if not self.cartella:
+            return
+        percorso = os.path.join(self.cartella, f"{os.getpid()}.json")
+        with self._lock_istantanea:
+            with tempfile.NamedTemporaryFile(
+                'w', encoding='utf-8', dir=self.cartella, suffix='.tmp', delete=False,
+            ) as f:
+                json.dump(self._istantanea(), f, separators=(',', ':'))
+            os.replace(f.name, percorso)
+
+    def _aggrega(self) -> Dict[str, Dict[Tuple[str, ...], object]]:
+        """
+        Somma le istantanee dei worker attivi (i gauge prendono il massimo).
+        Le istantanee non aggiornate da INTERVALLI_SCADENZA intervalli sono
+        di worker terminati: vengono scartate e rimosse.
+        """
+        if not self.cartella:
+            return {nome: dict(metrica.serie) for nome, metrica in self.metriche.items()}
+
+        self.salva_istantanea()
+        scadenza = time.time() - INTERVALLI_SCADENZA * self.intervallo
+        aggregato: Dict[str, Dict[Tuple[str, ...], object]] = {nome: {} for nome in self.metriche}
+        for file in os.listdir(self.cartella):
+            if not file.endswith('.json'):
+                continue
+            percorso = os.path.join(self.cartella, file)
+            try:
+                if os.path.getmtime(percorso) < scadenza:
+                    os.remove(percorso)
+                    continue
+                with open(percorso, encoding='utf-8') as f:
+                    istantanea = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for nome, serie in istantanea.items():
+                metrica = self.metriche.get(nome)
+                if metrica is None:
+                    continue
+                destinazione = aggregato[nome]
+                for etichette, valore in serie:
+                    chiave = tuple(etichette)
+                    attuale = destinazione.get(chiave)
+                    if attuale is None:
+                        destinazione[chiave] = valore
+                    elif metrica.tipo == 'histogram':
+                        destinazione[chiave] = [a + b for a, b in zip(attuale, valore)]
+                    elif metrica.tipo == 'counter':
+                        destinazione[chiave] = attuale + valore
+                    else:
+                        destinazione[chiave] = max(attuale, valore)
+        return aggregato
+
+    def esporta(self) -> str:
+        """Restituisce tutte le metriche nel formato testuale di Prometheus."""
+        righe = []
+        for nome, serie in self._aggrega().items():
+            metrica = self.metriche[nome]
+            righe.append(f"# HELP {nome} {metrica.descrizione}")
+            righe.append(f"# TYPE {nome} {metrica.tipo}")
+            for etichette, valore in sorted(serie.items()):
+                coppie = [f'{e}="{_escape(v)}"' for e, v in zip(metrica.etichette, etichette)]
+                if metrica.tipo != 'histogram':
+                    righe.append(f"{nome}{_etichette(coppie)} {valore}")
+                    continue
+                cumulato = 0
+                for limite, conteggio in zip(list(metrica.bucket) + ['+Inf'], valore):
+                    cumulato += conteggio
+                    le = 'le="%s"' % limite
+                    righe.append(f"{nome}_bucket{_etichette(coppie + [le])} {cumulato}")
+                righe.append(f"{nome}_sum{_etichette(coppie)} {valore[-2]}")
+                righe.append(f"{nome}_count{_etichette(coppie)} {valore[-1]}")
+        return '\n'.join(righe) + '\n'
+
+def _escape(valore: str) -> str:
+    return str(valore).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _etichette(coppie: List[str]) -> str:
+    return '{' + ','.join(coppie) + '}' if coppie else ''
@@ -0,0 +1,175 @@
+"""
+Modulo per i limiti di frequenza delle richieste (token bucket).
+
+Ogni chiave (una sessione, un indirizzo IP) ha un secchio di gettoni che si
+ricarica a velocità costante fino alla capacità; ogni richiesta consuma un
+numero di gettoni pari al costo della route. Se i gettoni non bastano la
+richiesta viene respinta e il chiamante sa quanti secondi attendere.
+
+Sono disponibili un backend in memoria (per un singolo processo) e un
+backend SQLite in modalità WAL, che condivide i secchi tra i worker
+gunicorn con un'unica istruzione atomica per richiesta.
+"""
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Capacità e ricarica (gettoni al secondo) di un secchio
+Limite = Tuple[float, float]
+
+# Secondi di inattività dopo cui un secchio viene eliminato (a quel punto
+# è comunque pieno: eliminarlo equivale a lasciarlo com'è)
+SCADENZA_SECCHIO = 60 * 60
+
+def leggi_limite(testo: str) -> Limite:
+    """
+    Interpreta un limite nella forma 'capacità:ricarica' (ad esempio
+    '60:1', cioè 60 gettoni che si ricaricano al ritmo di uno al secondo).
+
+    Raises:
+        ValueError: Se il testo non è nella forma attesa.
+    """
+    capacita, _, ricarica = testo.partition(':')
+    limite = (float(capacita), float(ricarica))
+    if limite[0] <= 0 or limite[1] <= 0:
+        raise ValueError(f"Limite non valido: {testo}")
+    return limite
+
+class RateLimiter(ABC):
+    """Interfaccia comune dei backend dei limiti di frequenza."""
+
+    @abstractmethod
+    def consuma(self, chiave: str, costo: float, limite: Limite) -> float:
+        """
+        Prova a consumare `costo` gettoni dal secchio della chiave.
+
+        Args:
+            chiave: La chiave del secchio (ad esempio 'ip:1.2.3.4').
+            costo: I gettoni richiesti.
+            limite: La capacità e la ricarica del secchio.
+
+        Returns:
+            0 se la richiesta è ammessa, altrimenti i secondi da attendere
+            prima che i gettoni bastino.
+        """
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Backend in memoria del processo: ogni worker ha i propri secchi.
+
+    Attributes:
+        max_chiavi (int): Il numero massimo di secchi mantenuti (LRU).
+    """
+
+    def __init__(self, max_chiavi: int = 100000):
+        self.max_chiavi = max_chiavi
+        self._secchi: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consuma(self, chiave: str, costo: float, limite: Limite) -> float:
+        capacita, ricarica = limite
+        costo = min(costo, capacita)
+        adesso = time.time()
+        with self._lock:
+            gettoni, aggiornato = self._secchi.get(chiave, (capacita, adesso))
+            gettoni = min(capacita, gettoni + max(0.0, adesso - aggiornato) * ricarica)
+            if gettoni < costo:
+                return (costo - gettoni) / ricarica
+            self._secchi[chiave] = (gettoni - costo, adesso)
+            self._secchi.move_to_end(chiave)
+            while len(self._secchi) > self.max_chiavi:
+                self._secchi.popitem(last=False)
+        return 0.0
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    Backend SQLite in modalità WAL, condiviso tra i processi che usano lo
+    stesso file. I secchi inattivi vengono eliminati periodicamente.
+
+    Attributes:
+        path (str): Il percorso del database.
+    """
+
+    # Ogni quante richieste eliminare i secchi scaduti
+    PULIZIA_OGNI = 5000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._locale = threading.local()
+        self._richieste = 0
+        with self._connessione() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS secchi ("
+                " chiave TEXT PRIMARY KEY,"
+                " gettoni REAL NOT NULL,"
+                " aggiornato REAL NOT NULL)"
+            )
+
+    def _connessione(self) -> sqlite3.Connection:
+        """Restituisce la connessione del thread corrente (una per thread)."""
+        conn = getattr(self._locale, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # I contatori sono effimeri: perderne gli ultimi in un crash è innocuo
+            conn.execute("PRAGMA synchronous=OFF")
+            self._locale.conn = conn
+        return conn
+
+    def consuma(self, chiave: str, costo: float, limite: Limite) -> float:
+        capacita, ricarica = limite
+        parametri = {
+            'chiave': chiave, 'costo': min(costo, capacita), 'capacita': capacita,
+            'ricarica': ricarica, 'adesso': time.time(),
+        }
+        with self._connessione() as conn:
+            # Ricarica e consumo in un'unica istruzione atomica: l'aggiornamento
+            # avviene (e restituisce una riga) solo se i gettoni bastano
+            ammessa = conn.execute(
+                "INSERT INTO secchi (chiave, gettoni, aggiornato)"
+                " VALUES (:chiave, :capacita - :costo, :adesso)"
+                " ON CONFLICT (chiave) DO UPDATE SET"
+                "  gettoni = min(:capacita, gettoni + max(0, :adesso - aggiornato) * :ricarica) - :costo,"
+                "  aggiornato = :adesso"
+                " WHERE min(:capacita, gettoni + max(0, :adesso - aggiornato) * :ricarica) >= :costo"
+                " RETURNING gettoni",
+                parametri,
+            ).fetchone()
+            self._richieste += 1
+            if self._richieste % self.PULIZIA_OGNI == 0:
+                conn.execute("DELETE FROM secchi WHERE aggiornato < ?", (parametri['adesso'] - SCADENZA_SECCHIO,))
+            if ammessa is not None:
+                return 0.0
+            riga = conn.execute(
+                "SELECT min(:capacita, gettoni + max(0, :adesso - aggiornato) * :ricarica)"
+                " FROM secchi WHERE chiave = :chiave",
+                parametri,
+            ).fetchone()
+        # La riga esiste: l'aggiornamento è stato scartato perché i gettoni non
+        # bastavano (il minimo copre una ricarica avvenuta nel frattempo)
+        return max((parametri['costo'] - riga[0]) / ricarica, 0.001)
+
+def crea_rate_limiter(configurazione: Optional[str] = None) -> Optional[RateLimiter]:
+    """
+    Crea il backend indicato dalla configurazione (di default la variabile
+    d'ambiente RATE_LIMIT_STORE): 'memory', 'sqlite:///percorso/del/file.db'
+    oppure 'off' per disattivare i limiti (restituisce None). I limiti sono
+    disattivati se la variabile non è impostata.
+
+    Raises:
+        ValueError: Se la configurazione non è riconosciuta.
+    """
+    if configurazione is None:
+        configurazione = os.environ.get('RATE_LIMIT_STORE', 'off')
+
+    if configurazione == 'off':
+        return None
+    if configurazione == 'memory':
+        return MemoryRateLimiter()
+    if configurazione.startswith('sqlite:///'):
+        return SQLiteRateLimiter(configurazione[len('sqlite:///'):])
+    raise ValueError(f"Backend RATE_LIMIT_STORE non riconosciuto: {configurazione}")
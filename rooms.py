@@ -0,0 +1,259 @@
+"""
+Modalità multigiocatore: stanze in cui più giocatori condividono la stessa
+partita, servite da un server asyncio/WebSocket.
+
+Ogni stanza ha un'unica istanza di AbacoGame; i tentativi sono serializzati
+dal lock della stanza e ogni aggiornamento dell'intervallo viene diffuso a
+tutti i membri tramite un pub/sub locale al processo. Le connessioni inattive
+costano solo una coroutine, senza un thread per client.
+
+Avvio:
+    python rooms.py --porta 8765
+
+Il servizio non è ancora distribuito (render.yaml avvia solo l'app web):
+la pagina non ha un client per le stanze, che per ora si usano con un
+client WebSocket qualsiasi.
+
+Protocollo (messaggi JSON):
+    -> {"azione": "entra", "stanza": "amici", "nome": "Anna"}
+    -> {"azione": "tentativo", "parola": "casa"}
+    -> {"azione": "indizio"}
+    -> {"azione": "nuova"}
+    <- {"evento": "stato" | "tentativo" | "indizio" | "membri" | "errore", ...}
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+from typing import Dict, Optional, Set
+
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+from abaco_data import HintTable, VocabularyIndex, carica_dizionario
+from game_logic import AbacoGame
+from ingestion import normalizza_parola
+
+# Messaggi in attesa per iscritto oltre i quali un client lento viene disconnesso
+MAX_CODA_ISCRITTO = 256
+
+# Limiti delle stanze: lunghezza dei nomi e numero di stanze aperte
+MAX_NOME_STANZA = 40
+MAX_NOME_GIOCATORE = 30
+MAX_STANZE = 1000
+
+logger = logging.getLogger(__name__)
+
+class Broker:
+    """Pub/sub locale al processo: ogni iscritto riceve i messaggi in una coda."""
+
+    def __init__(self):
+        self._iscritti: Dict[str, Set[asyncio.Queue]] = {}
+
+    def iscrivi(self, argomento: str) -> asyncio.Queue:
+        coda: asyncio.Queue = asyncio.Queue(MAX_CODA_ISCRITTO)
+        self._iscritti.setdefault(argomento, set()).add(coda)
+        return coda
+
+    def disiscrivi(self, argomento: str, coda: asyncio.Queue):
+        iscritti = self._iscritti.get(argomento)
+        if iscritti is not None:
+            iscritti.discard(coda)
+            if not iscritti:
+                del self._iscritti[argomento]
+
+    def pubblica(self, argomento: str, messaggio: dict):
+        """Consegna il messaggio (serializzato una sola volta) a tutti gli iscritti."""
+        testo = json.dumps(messaggio)
+        for coda in list(self._iscritti.get(argomento, ())):
+            try:
+                coda.put_nowait(testo)
+            except asyncio.QueueFull:
+                # Client troppo lento: svuota la coda e segnala la chiusura
+                while not coda.empty():
+                    coda.get_nowait()
+                coda.put_nowait(None)
+                self.disiscrivi(argomento, coda)
+
+class Room:
+    """
+    Una stanza di gioco condivisa.
+
+    Attributes:
+        nome (str): Il nome della stanza.
+        game (AbacoGame): La partita condivisa dai membri.
+        membri (Set[str]): I nomi dei giocatori connessi.
+    """
+
+    def __init__(self, nome: str, game: AbacoGame):
+        self.nome = nome
+        self.game = game
+        self.membri: Set[str] = set()
+        self.lock = asyncio.Lock()
+
+    def stato(self) -> dict:
+        return {
+            'stanza': self.nome,
+            'parola_minima': self.game.parola_minima,
+            'parola_massima': self.game.parola_massima,
+            'numero_tentativi': self.game.numero_tentativi,
+            'game_over': self.game.game_over,
+            'vincitore': self.game.vincitore,
+            'membri': sorted(self.membri),
+        }
+
+class RoomServer:
+    """Gestisce le stanze e le connessioni WebSocket dei giocatori."""
+
+    def __init__(self, vocabolario: VocabularyIndex, parole_da_indovinare, tabella_indizi: HintTable):
+        self.vocabolario = vocabolario
+        self.parole_da_indovinare = parole_da_indovinare
+        self.tabella_indizi = tabella_indizi
+        self.stanze: Dict[str, Room] = {}
+        self.broker = Broker()
+
+    def _nuova_partita(self) -> AbacoGame:
+        return AbacoGame(random.choice(self.parole_da_indovinare), self.vocabolario)
+
+    def _stanza(self, nome: str) -> Optional[Room]:
+        """Restituisce la stanza, creandola se c'è posto; None se sono già aperte MAX_STANZE stanze."""
+        stanza = self.stanze.get(nome)
+        if stanza is None:
+            if len(self.stanze) >= MAX_STANZE:
+                return None
+            stanza = self.stanze[nome] = Room(nome, self._nuova_partita())
+        return stanza
+
+    async def gestisci(self, connessione: ServerConnection):
+        """Gestisce una connessione: ingresso in una stanza, poi le azioni del giocatore."""
+        try:
+            messaggio = json.loads(await connessione.recv())
+        except (ConnectionClosed, ValueError):
+            return
+        if not isinstance(messaggio, dict):
+            messaggio = {}
+        nome_stanza = str(messaggio.get('stanza', '')).strip()
+        nome = str(messaggio.get('nome', '')).strip()
+        if messaggio.get('azione') != 'entra' or not nome_stanza or not nome:
+            await connessione.send(json.dumps({'evento': 'errore', 'errore': "Indicare stanza e nome."}))
+            return
+        if len(nome_stanza) > MAX_NOME_STANZA or len(nome) > MAX_NOME_GIOCATORE:
+            await connessione.send(json.dumps({
+                'evento': 'errore',
+                'errore': f"Nomi troppo lunghi (stanza al massimo {MAX_NOME_STANZA} caratteri, "
+                          f"giocatore al massimo {MAX_NOME_GIOCATORE}).",
+            }))
+            return
+
+        stanza = self._stanza(nome_stanza)
+        if stanza is None:
+            await connessione.send(json.dumps({'evento': 'errore', 'errore': "Troppe stanze aperte, riprova più tardi."}))
+            return
+        if nome in stanza.membri:
+            await connessione.send(json.dumps({'evento': 'errore', 'errore': "Nome già in uso nella stanza."}))
+            return
+
+        coda = self.broker.iscrivi(nome_stanza)
+        stanza.membri.add(nome)
+        invio = asyncio.create_task(self._inoltra(connessione, coda))
+        invio.add_done_callback(_registra_errore)
+        try:
+            await connessione.send(json.dumps({'evento': 'stato', **stanza.stato()}))
+            self.broker.pubblica(nome_stanza, {'evento': 'membri', 'membri': sorted(stanza.membri)})
+            async for testo in connessione:
+                try:
+                    azione = json.loads(testo)
+                except ValueError:
+                    continue
+                if not isinstance(azione, dict):
+                    continue
+                errore = await self._esegui(stanza, nome, azione)
+                if errore:
+                    await connessione.send(json.dumps({'evento': 'errore', 'errore': errore}))
+        except ConnectionClosed:
+            pass
+        finally:
+            invio.cancel()
+            self.broker.disiscrivi(nome_stanza, coda)
+            stanza.membri.discard(nome)
+            if stanza.membri:
+                self.broker.pubblica(nome_stanza, {'evento': 'membri', 'membri': sorted(stanza.membri)})
+            else:
+                del self.stanze[nome_stanza]
+
+    async def _inoltra(self, connessione: ServerConnection, coda: asyncio.Queue):
+        """Inoltra al client i messaggi pubblicati nella sua stanza."""
+        while True:
+            testo = await coda.get()
+            if testo is None:
+                await connessione.close(code=1008, reason="Client troppo lento.")
+                return
+            await connessione.send(testo)
+
+    async def _esegui(self, stanza: Room, nome: str, azione: dict) -> Optional[str]:
+        """Esegue un'azione sulla partita della stanza; restituisce un eventuale errore."""
+        tipo = azione.get('azione')
+        # Le azioni sulla partita condivisa sono serializzate per stanza
+        async with stanza.lock:
+            game = stanza.game
+            if tipo == 'tentativo':
+                parola = normalizza_parola(str(azione.get('parola', '')))
+                if not parola:
+                    return "Nessuna parola fornita."
+                if game.game_over:
+                    return "La partita è terminata."
+                risultato = game.processa_tentativo(parola, nome)
+                self.broker.pubblica(stanza.nome, {
+                    'evento': 'tentativo', 'giocatore': nome, 'parola': parola,
+                    'risultato': risultato, **stanza.stato(),
+                })
+            elif tipo == 'indizio':
+                if game.game_over:
+                    return "La partita è già terminata."
+                prefisso = game.rivela_lettera(self.tabella_indizi.limiti)
+                if prefisso is None:
+                    return "Non ci sono più lettere da rivelare!"
+                self.broker.pubblica(stanza.nome, {
+                    'evento': 'indizio', 'giocatore': nome, 'prefisso_rivelato': prefisso, **stanza.stato(),
+                })
+            elif tipo == 'nuova':
+                stanza.game = self._nuova_partita()
+                self.broker.pubblica(stanza.nome, {'evento': 'stato', 'giocatore': nome, **stanza.stato()})
+            else:
+                return f"Azione sconosciuta: {tipo}"
+        return None
+
+def _registra_errore(task: asyncio.Task):
+    """Recupera e registra l'eccezione di un task di inoltro terminato."""
+    if task.cancelled():
+        return
+    errore = task.exception()
+    if errore is not None and not isinstance(errore, ConnectionClosed):
+        logger.error("Errore nell'inoltro dei messaggi della stanza", exc_info=errore)
+
+async def avvia(host: str, porta: int, server: RoomServer):
+    """Avvia il server WebSocket e resta in ascolto."""
+    async with serve(server.gestisci, host, porta):
+        print(f"Server delle stanze in ascolto su ws://{host}:{porta}")
+        await asyncio.Future()
+
+def main(argv=None):
+    """Punto di ingresso da riga di comando del server delle stanze."""
+    parser = argparse.ArgumentParser(description="Server multigiocatore di Abaco Zuzzurellone.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--porta', type=int, default=int(os.environ.get('PORT', 8765)))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    vocabolario, parole_da_indovinare = carica_dizionario(
+        'data/660000_parole_italiane.txt',
+        'data/1000_parole_italiane_comuni.txt',
+        'data/vocabolario.bin',
+    )
+    server = RoomServer(vocabolario, parole_da_indovinare, HintTable(vocabolario, parole_da_indovinare))
+    asyncio.run(avvia(args.host, args.porta, server))
+
+if __name__ == '__main__':
+    main()
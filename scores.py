@@ -0,0 +1,212 @@
+"""
+Modulo per il salvataggio dei punteggi e le classifiche.
+
+I risultati delle partite concluse vengono accodati e scritti a lotti su
+SQLite (modalità WAL) da un thread in background, così una vittoria non
+attende mai l'I/O su disco. Le classifiche (globale e per parola segreta)
+sono mantenute in memoria e ricostruite periodicamente dal database dallo
+stesso thread: il database è condiviso, quindi ogni worker serve anche i
+risultati registrati dagli altri, con qualche secondo di ritardo.
+"""
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from bisect import insort
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Dimensione delle classifiche mantenute in memoria
+TOP_K = 10
+
+# Secondi tra due ricostruzioni delle classifiche dal database condiviso
+AGGIORNAMENTO_CLASSIFICHE = 5.0
+
+# Ordine in classifica: meno tentativi, poi meno indizi, poi meno tempo
+ChiaveClassifica = Tuple[int, int, float, int]
+
+class Leaderboard:
+    """
+    Classifiche top-K in memoria: una globale e una per parola segreta.
+
+    Le partite arrese e quelle con parola personalizzata non entrano
+    in classifica.
+    """
+
+    def __init__(self, k: int = TOP_K):
+        self.k = k
+        self._globale: List[Tuple[ChiaveClassifica, dict]] = []
+        self._per_parola: Dict[str, List[Tuple[ChiaveClassifica, dict]]] = {}
+        self._progressivo = 0
+        self._lock = threading.Lock()
+
+    def aggiungi(self, risultato: dict):
+        """Inserisce un risultato nelle classifiche, se le merita."""
+        if risultato['arreso'] or risultato.get('personalizzata'):
+            return
+        with self._lock:
+            # Il progressivo rende la chiave unica (i dizionari non sono confrontabili)
+            self._progressivo += 1
+            voce = ((risultato['tentativi'], risultato['indizi'], risultato['tempo'], self._progressivo), risultato)
+            self._inserisci(self._globale, voce)
+            self._inserisci(self._per_parola.setdefault(risultato['parola'], []), voce)
+
+    def _inserisci(self, classifica: List[Tuple[ChiaveClassifica, dict]], voce):
+        if len(classifica) >= self.k and voce[0] >= classifica[-1][0]:
+            return
+        insort(classifica, voce)
+        del classifica[self.k:]
+
+    def classifica(self, parola: Optional[str] = None, k: Optional[int] = None) -> List[dict]:
+        """Restituisce la classifica globale o quella della parola data."""
+        with self._lock:
+            voci = self._globale if parola is None else self._per_parola.get(parola, [])
+            return [risultato for _, risultato in voci[:k or self.k]]
+
+class ScoreStore:
+    """
+    Archivio dei punteggi con scrittura differita (write-behind).
+
+    Attributes:
+        path (str): Il percorso del database SQLite.
+        leaderboard (Leaderboard): Le classifiche in memoria.
+        dimensione_lotto (int): Il numero massimo di risultati per transazione.
+        intervallo (float): I secondi massimi di attesa prima di scrivere un lotto.
+        aggiornamento (float): I secondi tra due ricostruzioni delle classifiche.
+    """
+
+    def __init__(self, path: str, k: int = TOP_K, dimensione_lotto: int = 200, intervallo: float = 1.0,
+                 aggiornamento: float = AGGIORNAMENTO_CLASSIFICHE):
+        self.path = path
+        self.dimensione_lotto = dimensione_lotto
+        self.intervallo = intervallo
+        self.aggiornamento = aggiornamento
+        self.leaderboard = Leaderboard(k)
+        self._coda: 'queue.Queue[Optional[dict]]' = queue.Queue()
+
+        conn = self._connetti()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS punteggi ("
+            " id INTEGER PRIMARY KEY,"
+            " parola TEXT NOT NULL,"
+            " tentativi INTEGER NOT NULL,"
+            " indizi INTEGER NOT NULL,"
+            " tempo REAL NOT NULL,"
+            " arreso INTEGER NOT NULL,"
+            " personalizzata INTEGER NOT NULL,"
+            " creato REAL NOT NULL)"
+        )
+        # Indice per la ricostruzione delle classifiche (solo le partite valide)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS punteggi_classifica"
+            " ON punteggi (parola, tentativi, indizi, tempo)"
+            " WHERE arreso = 0 AND personalizzata = 0"
+        )
+        conn.commit()
+        self._ricostruisci(conn)
+        conn.close()
+
+        self._thread = threading.Thread(target=self._scrivi_in_background, name='scores-writer', daemon=True)
+        self._thread.start()
+
+    def _connetti(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _ricostruisci(self, conn: sqlite3.Connection):
+        """
+        Ricarica le classifiche in memoria dai risultati salvati (anche
+        dagli altri worker). Basta leggere i migliori k di ogni parola: la
+        classifica globale è contenuta nella loro unione. Le classifiche
+        nuove sostituiscono le vecchie solo a lettura completata.
+        """
+        leaderboard = Leaderboard(self.leaderboard.k)
+        righe = conn.execute(
+            "SELECT parola, tentativi, indizi, tempo, creato FROM ("
+            " SELECT *, ROW_NUMBER() OVER ("
+            "  PARTITION BY parola ORDER BY tentativi, indizi, tempo) AS posizione"
+            " FROM punteggi WHERE arreso = 0 AND personalizzata = 0)"
+            " WHERE posizione <= ?",
+            (self.leaderboard.k,),
+        )
+        for parola, tentativi, indizi, tempo, creato in righe:
+            leaderboard.aggiungi({
+                'parola': parola, 'tentativi': tentativi, 'indizi': indizi,
+                'tempo': tempo, 'arreso': False, 'personalizzata': False, 'creato': creato,
+            })
+        self.leaderboard = leaderboard
+        self._ultimo_aggiornamento = time.monotonic()
+
+    def registra(self, parola: str, tentativi: int, indizi: int, tempo: float,
+                 arreso: bool = False, personalizzata: bool = False):
+        """
+        Registra il risultato di una partita conclusa. Aggiorna subito le
+        classifiche in memoria e accoda la scrittura su disco.
+        """
+        risultato = {
+            'parola': parola, 'tentativi': tentativi, 'indizi': indizi, 'tempo': tempo,
+            'arreso': arreso, 'personalizzata': personalizzata, 'creato': time.time(),
+        }
+        self.leaderboard.aggiungi(risultato)
+        self._coda.put(risultato)
+
+    def classifica(self, parola: Optional[str] = None, k: Optional[int] = None) -> List[dict]:
+        """Restituisce la classifica globale o quella della parola data."""
+        return self.leaderboard.classifica(parola, k)
+
+    def _scrivi_in_background(self):
+        conn = self._connetti()
+        fine = False
+        while not fine:
+            lotto = []
+            # Senza risultati da scrivere, si risveglia per aggiornare le classifiche
+            attesa = self._ultimo_aggiornamento + self.aggiornamento - time.monotonic()
+            try:
+                risultato = self._coda.get(timeout=max(attesa, 0.0))
+            except queue.Empty:
+                self._aggiorna_classifiche(conn)
+                continue
+            scadenza = time.monotonic() + self.intervallo
+            # Raccoglie altri risultati fino a riempire il lotto o allo scadere
+            # dell'intervallo; None segnala la chiusura
+            while True:
+                if risultato is None:
+                    fine = True
+                    break
+                lotto.append(risultato)
+                attesa = scadenza - time.monotonic()
+                if len(lotto) >= self.dimensione_lotto or attesa <= 0:
+                    break
+                try:
+                    risultato = self._coda.get(timeout=attesa)
+                except queue.Empty:
+                    break
+            if lotto:
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO punteggi (parola, tentativi, indizi, tempo, arreso, personalizzata, creato)"
+                            " VALUES (:parola, :tentativi, :indizi, :tempo, :arreso, :personalizzata, :creato)",
+                            lotto,
+                        )
+                except sqlite3.Error as e:
+                    logger.error("Errore nel salvataggio dei punteggi: %s", e)
+            if not fine and time.monotonic() - self._ultimo_aggiornamento >= self.aggiornamento:
+                self._aggiorna_classifiche(conn)
+        conn.close()
+
+    def _aggiorna_classifiche(self, conn: sqlite3.Connection):
+        try:
+            self._ricostruisci(conn)
+        except sqlite3.Error as e:
+            self._ultimo_aggiornamento = time.monotonic()
+            logger.error("Errore nell'aggiornamento delle classifiche: %s", e)
+
+    def chiudi(self, timeout: float = 5.0):
+        """Scrive i risultati ancora in coda e ferma il thread di scrittura."""
+        self._coda.put(None)
+        self._thread.join(timeout)
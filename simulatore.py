@@ -0,0 +1,280 @@
+"""
+Simulatore offline di partite di Abaco Zuzzurellone.
+
+Gioca partite simulate per ogni parola da indovinare con diverse strategie
+e calcola una tabella di difficoltà (media e 95° percentile dei tentativi
+per parola), utile per calibrare l'elenco delle parole.
+
+Le partite vengono distribuite a lotti su un pool di processi; ogni worker
+carica il dizionario una sola volta (mappandolo in memoria se compilato).
+
+Uso da riga di comando:
+    python simulatore.py --strategia comuni --partite 100 --output difficolta.csv
+"""
+import argparse
+import csv
+import math
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from abaco_data import VocabularyIndex, HintTable, carica_dizionario
+from game_logic import AbacoGame
+
+# Valore restituito da una strategia per chiedere un indizio invece di tentare una parola
+INDIZIO = object()
+
+# Limite di sicurezza al numero di mosse di una partita simulata
+MAX_MOSSE = 500
+
+# Oltre questo numero di parole nel range, la strategia con indizi chiede un indizio
+SOGLIA_INDIZIO = 2000
+
+class Contesto:
+    """
+    Dati di sola lettura condivisi dalle partite simulate di un processo.
+
+    Attributes:
+        vocabolario (VocabularyIndex): L'indice del vocabolario.
+        comuni (VocabularyIndex): L'indice delle parole da indovinare.
+        tabella_indizi (HintTable): La tabella dei limiti dei prefissi.
+    """
+
+    def __init__(self, vocabolario: VocabularyIndex, parole_da_indovinare: Sequence[str]):
+        self.vocabolario = vocabolario
+        self.comuni = VocabularyIndex(parole_da_indovinare, collazione=vocabolario.collazione)
+        self.tabella_indizi = HintTable(vocabolario, parole_da_indovinare)
+
+Strategia = Callable[[AbacoGame, Contesto, Set[str], random.Random], object]
+
+def _intervallo_libero(indice: VocabularyIndex, game: AbacoGame, provate: Set[str]) -> Tuple[int, int]:
+    """
+    Restituisce gli indici [inizio, fine) delle parole dell'indice nel range,
+    esclusi gli estremi (già provati o iniziali: tentarli non restringe il range).
+    """
+    estremi = {game.parola_minima, game.parola_massima}
+    inizio, fine = indice.bounds(game.parola_minima, game.parola_massima)
+    if inizio < fine and (indice.parole[inizio] in provate or indice.parole[inizio] in estremi):
+        inizio += 1
+    if inizio < fine and (indice.parole[fine - 1] in provate or indice.parole[fine - 1] in estremi):
+        fine -= 1
+    return inizio, fine
+
+def _mediana_in(indice: VocabularyIndex, game: AbacoGame, provate: Set[str]) -> Optional[str]:
+    """Restituisce la parola di rango mediano nel range non ancora provata."""
+    inizio, fine = _intervallo_libero(indice, game, provate)
+    if inizio >= fine:
+        return None
+    return indice.parole[(inizio + fine - 1) // 2]
+
+def bisettore_vocabolario(game: AbacoGame, contesto: Contesto, provate: Set[str], rng: random.Random):
+    """Tenta sempre la parola mediana del vocabolario nel range (ricerca binaria pura)."""
+    return _mediana_in(contesto.vocabolario, game, provate)
+
+def bisettore_comuni(game: AbacoGame, contesto: Contesto, provate: Set[str], rng: random.Random):
+    """
+    Simula un giocatore umano: tenta solo parole comuni, scelte a caso con
+    preferenza per il centro del range. Sono candidate solo le parole comuni
+    presenti nel vocabolario e non ancora provate, che la partita accetta
+    sempre come tentativo; se non ne restano, ripiega sulla mediana del
+    vocabolario.
+    """
+    inizio, fine = _intervallo_libero(contesto.comuni, game, provate)
+    candidate = [
+        parola for parola in contesto.comuni.parole[inizio:fine]
+        if parola not in provate and parola in contesto.vocabolario
+    ]
+    if not candidate:
+        return _mediana_in(contesto.vocabolario, game, provate)
+    i = int(rng.triangular(0, len(candidate), len(candidate) / 2))
+    return candidate[min(i, len(candidate) - 1)]
+
+def bisettore_con_indizi(game: AbacoGame, contesto: Contesto, provate: Set[str], rng: random.Random):
+    """
+    Chiede un indizio finché il range contiene più di SOGLIA_INDIZIO parole,
+    poi procede con la ricerca binaria sul vocabolario.
+    """
+    if contesto.vocabolario.count_between(game.parola_minima, game.parola_massima) > SOGLIA_INDIZIO:
+        return INDIZIO
+    return _mediana_in(contesto.vocabolario, game, provate)
+
+STRATEGIE: Dict[str, Strategia] = {
+    'bisettore': bisettore_vocabolario,
+    'comuni': bisettore_comuni,
+    'indizi': bisettore_con_indizi,
+}
+
+def gioca_partita(parola_segreta: str, contesto: Contesto, strategia: Strategia,
+                  rng: random.Random) -> Tuple[int, int, bool]:
+    """
+    Gioca una partita simulata fino alla vittoria, o finché la strategia non
+    ha più mosse o si raggiunge MAX_MOSSE.
+
+    Args:
+        parola_segreta: La parola da indovinare.
+        contesto: I dati condivisi del processo.
+        strategia: La funzione che sceglie la mossa successiva.
+        rng: Il generatore casuale della partita.
+
+    Returns:
+        Una tupla (tentativi, indizi usati, vinta).
+
+    Raises:
+        ValueError: Se la parola segreta non è nel vocabolario.
+    """
+    game = AbacoGame(parola_segreta, contesto.vocabolario)
+    provate: Set[str] = set()
+    for _ in range(MAX_MOSSE):
+        if game.game_over:
+            break
+        mossa = strategia(game, contesto, provate, rng)
+        if mossa is INDIZIO:
+            if game.rivela_lettera(contesto.tabella_indizi.limiti) is not None:
+                continue
+            # Nessuna lettera da rivelare: si passa alla ricerca binaria
+            mossa = _mediana_in(contesto.vocabolario, game, provate)
+        if mossa is None:
+            break
+        provate.add(mossa)
+        game.processa_tentativo(mossa, 'simulatore')
+    return game.numero_tentativi, game.indizi_usati, game.vincitore is not None
+
+# Contesto del processo worker, inizializzato una volta da _inizializza_worker
+_contesto: Optional[Contesto] = None
+
+def _inizializza_worker(vocabolario_path: str, parole_path: str, binario_path: Optional[str]):
+    global _contesto
+    vocabolario, parole_da_indovinare = carica_dizionario(vocabolario_path, parole_path, binario_path)
+    _contesto = Contesto(vocabolario, parole_da_indovinare)
+
+def _gioca_lotto(lotto: List[str], nome_strategia: str, partite: int, seme: int) -> List[Tuple[str, List[int], int]]:
+    """
+    Gioca `partite` partite per ogni parola del lotto (eseguito nel worker).
+    Tentativi e indizi sono quelli delle sole partite vinte; una parola che
+    non è nel vocabolario non viene giocata (nessuna partita vinta).
+    """
+    strategia = STRATEGIE[nome_strategia]
+    risultati = []
+    for parola in lotto:
+        rng = random.Random(f"{seme}:{parola}")
+        tentativi = []
+        indizi = 0
+        for _ in range(partite):
+            try:
+                t, i, vinta = gioca_partita(parola, _contesto, strategia, rng)
+            except ValueError:
+                break
+            if vinta:
+                tentativi.append(t)
+                indizi += i
+        risultati.append((parola, tentativi, indizi))
+    return risultati
+
+def _percentile(valori_ordinati: List[int], p: float) -> int:
+    """Percentile con il metodo nearest-rank su una lista già ordinata."""
+    rango = max(1, math.ceil(p / 100 * len(valori_ordinati)))
+    return valori_ordinati[rango - 1]
+
+def simula(vocabolario_path: str = 'data/660000_parole_italiane.txt',
+           parole_path: str = 'data/1000_parole_italiane_comuni.txt',
+           binario_path: Optional[str] = 'data/vocabolario.bin',
+           strategia: str = 'bisettore',
+           partite: int = 1,
+           processi: Optional[int] = None,
+           dimensione_lotto: int = 16,
+           seme: int = 0,
+           parole: Optional[Sequence[str]] = None) -> List[dict]:
+    """
+    Simula le partite e calcola la difficoltà di ogni parola.
+
+    Args:
+        vocabolario_path: Il file di testo del vocabolario.
+        parole_path: Il file di testo delle parole da indovinare.
+        binario_path: Il dizionario binario compilato (opzionale).
+        strategia: Il nome della strategia (vedi STRATEGIE).
+        partite: Il numero di partite per parola.
+        processi: Il numero di processi del pool (di default uno per CPU).
+        dimensione_lotto: Il numero di parole per lotto inviato a un worker.
+        seme: Il seme dei generatori casuali, per risultati riproducibili.
+        parole: Le parole da simulare (di default tutte le parole da indovinare).
+
+    Returns:
+        Una lista di dizionari (parola, partite, vinte, media, p95, massimo,
+        indizi_medi), ordinata dalla parola più difficile. Le statistiche
+        riguardano le sole partite vinte; le parole senza partite vinte (ad
+        esempio perché assenti dal vocabolario) hanno statistiche None e
+        sono in cima alla lista.
+
+    Raises:
+        ValueError: Se la strategia non esiste.
+    """
+    if strategia not in STRATEGIE:
+        raise ValueError(f"Strategia sconosciuta: {strategia}. Disponibili: {', '.join(STRATEGIE)}")
+
+    if parole is None:
+        _, parole_da_indovinare = carica_dizionario(vocabolario_path, parole_path, binario_path)
+        parole = sorted(parole_da_indovinare)
+    lotti = [list(parole[i:i + dimensione_lotto]) for i in range(0, len(parole), dimensione_lotto)]
+
+    tabella = []
+    with ProcessPoolExecutor(
+        max_workers=processi,
+        initializer=_inizializza_worker,
+        initargs=(vocabolario_path, parole_path, binario_path),
+    ) as pool:
+        futuri = [pool.submit(_gioca_lotto, lotto, strategia, partite, seme) for lotto in lotti]
+        for futuro in futuri:
+            for parola, tentativi, indizi in futuro.result():
+                tentativi.sort()
+                vinte = len(tentativi)
+                tabella.append({
+                    'parola': parola,
+                    'partite': partite,
+                    'vinte': vinte,
+                    'media': sum(tentativi) / vinte if vinte else None,
+                    'p95': _percentile(tentativi, 95) if vinte else None,
+                    'massimo': tentativi[-1] if vinte else None,
+                    'indizi_medi': indizi / vinte if vinte else None,
+                })
+
+    tabella.sort(key=lambda riga: (riga['vinte'] > 0, -(riga['media'] or 0), riga['parola']))
+    return tabella
+
+def main(argv: Optional[List[str]] = None):
+    """Punto di ingresso da riga di comando del simulatore."""
+    parser = argparse.ArgumentParser(description="Calcola la difficoltà delle parole con partite simulate.")
+    parser.add_argument('--strategia', choices=sorted(STRATEGIE), default='bisettore')
+    parser.add_argument('--partite', type=int, default=1, help="Partite simulate per parola.")
+    parser.add_argument('--processi', type=int, default=None, help="Processi del pool (default: CPU).")
+    parser.add_argument('--lotto', type=int, default=16, help="Parole per lotto inviato a un worker.")
+    parser.add_argument('--seme', type=int, default=0)
+    parser.add_argument('--vocabolario', default='data/660000_parole_italiane.txt')
+    parser.add_argument('--parole', default='data/1000_parole_italiane_comuni.txt')
+    parser.add_argument('--binario', default='data/vocabolario.bin')
+    parser.add_argument('--output', default=None, help="File CSV di output (default: stdout).")
+    args = parser.parse_args(argv)
+
+    tabella = simula(
+        args.vocabolario, args.parole, args.binario,
+        strategia=args.strategia, partite=args.partite, processi=args.processi,
+        dimensione_lotto=args.lotto, seme=args.seme,
+    )
+
+    campi = ['parola', 'partite', 'vinte', 'media', 'p95', 'massimo', 'indizi_medi']
+    output = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        writer = csv.DictWriter(output, fieldnames=campi)
+        writer.writeheader()
+        for riga in tabella:
+            if riga['vinte']:
+                riga = {**riga, 'media': f"{riga['media']:.2f}", 'indizi_medi': f"{riga['indizi_medi']:.2f}"}
+            else:
+                print(f"Attenzione: nessuna partita vinta per '{riga['parola']}'", file=sys.stderr)
+            writer.writerow(riga)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
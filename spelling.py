@@ -0,0 +1,273 @@
+"""
+Modulo per i suggerimenti "forse cercavi" sulle parole non valide.
+
+L'indice segue l'approccio SymSpell: per ogni parola del vocabolario si
+registrano la parola stessa e tutte le varianti ottenute cancellando un
+carattere. Una parola a distanza di modifica 1 dal tentativo (errore di
+battitura, accento mancante, lettere invertite) condivide sempre almeno
+una variante con esso, quindi la ricerca costa poche ricerche binarie e
+una verifica della distanza su una manciata di candidati, invece di una
+scansione dell'intero vocabolario.
+
+Le voci sono interi a 64 bit (crc32 della variante << 32 | indice della
+parola) in un array ordinato, salvato accanto al dizionario compilato in
+un file per versione e collazione del vocabolario e mappato in memoria: le
+pagine sono condivise tra i worker. L'indice si costruisce solo con
+python abaco_data.py compila, mai nei processi che servono le richieste.
+"""
+import glob
+import logging
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from typing import Iterator, List, Optional, Sequence, Set
+
+from abaco_data import VocabularyIndex
+
+logger = logging.getLogger(__name__)
+
+MAGIC_ORTOGRAFICO = b'ABACOSYM'
+VERSIONE_FORMATO = 1
+# Magic, versione del formato, distanza delle cancellazioni, riservato,
+# impronta del vocabolario, numero di voci; le voci seguono allineate a 8 byte
+_INTESTAZIONE = struct.Struct('<8sHHI16sQ')
+
+# Distanza massima delle cancellazioni indicizzate
+DISTANZA_INDICE = 1
+
+# Limite ai candidati verificati per ricerca (i crc32 possono collidere)
+MAX_CANDIDATI = 256
+
+def _varianti(parola: str) -> Set[str]:
+    """Restituisce la parola e tutte le sue cancellazioni di un carattere."""
+    varianti = {parola}
+    for i in range(len(parola)):
+        varianti.add(parola[:i] + parola[i + 1:])
+    return varianti
+
+def _hash(variante: str) -> int:
+    return zlib.crc32(variante.encode('utf-8'))
+
+def distanza_limitata(a: str, b: str, massimo: int) -> Optional[int]:
+    """
+    Calcola la distanza di Damerau-Levenshtein (con trasposizioni adiacenti)
+    tra due parole, interrompendosi appena supera il massimo.
+
+    Args:
+        a: La prima parola.
+        b: La seconda parola.
+        massimo: La distanza massima di interesse.
+
+    Returns:
+        La distanza, oppure None se è maggiore del massimo.
+    """
+    if abs(len(a) - len(b)) > massimo:
+        return None
+    precedente = None
+    riga = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        nuova = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = a[i - 1] != b[j - 1]
+            nuova[j] = min(riga[j] + 1, nuova[j - 1] + 1, riga[j - 1] + costo)
+            if (precedente is not None and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                nuova[j] = min(nuova[j], precedente[j - 2] + 1)
+        if min(nuova) > massimo:
+            return None
+        precedente, riga = riga, nuova
+    return riga[-1] if riga[-1] <= massimo else None
+
+class SpellingIndex:
+    """
+    Indice delle cancellazioni del vocabolario per i suggerimenti ortografici.
+
+    Attributes:
+        vocabolario (VocabularyIndex): Il vocabolario indicizzato.
+        voci (Sequence[int]): Le voci ordinate (hash << 32 | indice parola).
+    """
+
+    def __init__(self, vocabolario: VocabularyIndex, voci: Sequence[int]):
+        self.vocabolario = vocabolario
+        self.voci = voci
+
+    @classmethod
+    def costruisci(cls, vocabolario: VocabularyIndex) -> 'SpellingIndex':
+        """Costruisce l'indice in memoria a partire dal vocabolario."""
+        def genera() -> Iterator[int]:
+            for indice, parola in enumerate(vocabolario.parole):
+                for variante in _varianti(parola):
+                    yield (_hash(variante) << 32) | indice
+        return cls(vocabolario, array('Q', sorted(genera())))
+
+    def __len__(self) -> int:
+        return len(self.voci)
+
+    def salva(self, file_path: str):
+        """Scrive l'indice su disco (in modo atomico)."""
+        voci = self.voci if isinstance(self.voci, array) else array('Q', self.voci)
+        intestazione = _INTESTAZIONE.pack(
+            MAGIC_ORTOGRAFICO, VERSIONE_FORMATO, DISTANZA_INDICE, 0,
+            bytes.fromhex(self.vocabolario.versione), len(voci),
+        )
+        temporaneo = f"{file_path}.{os.getpid()}.tmp"
+        with open(temporaneo, 'wb') as f:
+            f.write(intestazione)
+            voci.tofile(f)
+        os.replace(temporaneo, file_path)
+
+    @classmethod
+    def carica(cls, file_path: str, vocabolario: VocabularyIndex) -> 'SpellingIndex':
+        """
+        Mappa in memoria un indice salvato con salva().
+
+        Args:
+            file_path: Il percorso del file dell'indice.
+            vocabolario: Il vocabolario a cui l'indice deve corrispondere.
+
+        Returns:
+            L'indice, con le voci lette direttamente dal file.
+
+        Raises:
+            FileNotFoundError: Se il file non viene trovato.
+            ValueError: Se il file non è compatibile o appartiene a un
+                vocabolario diverso.
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Indice ortografico non trovato in: {file_path}")
+        if sys.byteorder != 'little':
+            raise ValueError("L'indice ortografico richiede un'architettura little-endian.")
+
+        with open(file_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(buffer) < _INTESTAZIONE.size:
+            raise ValueError(f"Indice ortografico troncato: {file_path}")
+        magic, versione_formato, distanza, _, digest, numero = _INTESTAZIONE.unpack_from(buffer)
+        if magic != MAGIC_ORTOGRAFICO:
+            raise ValueError(f"{file_path} non è un indice ortografico.")
+        if versione_formato != VERSIONE_FORMATO or distanza != DISTANZA_INDICE:
+            raise ValueError(f"Versione del formato non supportata: {versione_formato}")
+        if digest.hex() != vocabolario.versione:
+            raise ValueError(f"{file_path} appartiene a un'altra versione del vocabolario.")
+        fine = _INTESTAZIONE.size + 8 * numero
+        if len(buffer) < fine:
+            raise ValueError(f"Indice ortografico troncato: {file_path}")
+        return cls(vocabolario, memoryview(buffer)[_INTESTAZIONE.size:fine].cast('Q'))
+
+    def _candidati(self, parola: str) -> Set[int]:
+        """Restituisce gli indici delle parole che condividono una variante con la parola."""
+        candidati: Set[int] = set()
+        for variante in _varianti(parola):
+            h = _hash(variante)
+            i = bisect_left(self.voci, h << 32)
+            fine = bisect_left(self.voci, (h + 1) << 32, i)
+            for voce in self.voci[i:min(fine, i + MAX_CANDIDATI)]:
+                candidati.add(voce & 0xFFFFFFFF)
+            if len(candidati) >= MAX_CANDIDATI:
+                break
+        return candidati
+
+    def suggerimenti(self, parola: str, min_word: Optional[str] = None, max_word: Optional[str] = None,
+                     limite: int = 5, distanza_massima: int = 2) -> List[str]:
+        """
+        Restituisce le parole del vocabolario più vicine alla parola data.
+
+        Le parole a distanza 1 vengono sempre trovate; quelle a distanza 2
+        solo se condividono una cancellazione con la parola.
+
+        Args:
+            parola: La parola (non valida) proposta dal giocatore.
+            min_word: L'estremo inferiore del range della partita (opzionale).
+            max_word: L'estremo superiore del range della partita (opzionale).
+            limite: Il numero massimo di suggerimenti.
+            distanza_massima: La distanza di modifica massima dei suggerimenti.
+
+        Returns:
+            I suggerimenti, prima quelli compresi nel range, poi per distanza
+            e in ordine alfabetico.
+        """
+        parola = parola.lower()
+        # Il range si confronta con le chiavi della collazione, come nella partita
+        chiave = self.vocabolario.chiave
+        chiave_min = chiave(min_word) if min_word is not None else None
+        chiave_max = chiave(max_word) if max_word is not None else None
+        classificati = []
+        for indice in self._candidati(parola):
+            candidato = self.vocabolario.parole[indice]
+            if candidato == parola:
+                continue
+            distanza = distanza_limitata(parola, candidato, distanza_massima)
+            if distanza is None:
+                continue
+            chiave_candidato = chiave(candidato)
+            fuori_range = ((chiave_min is not None and chiave_candidato < chiave_min)
+                           or (chiave_max is not None and chiave_candidato > chiave_max))
+            classificati.append((fuori_range, distanza, candidato))
+        classificati.sort()
+        return [candidato for _, _, candidato in classificati[:limite]]
+
+def percorso_indice(file_path: str, vocabolario: VocabularyIndex) -> str:
+    """
+    Restituisce il percorso dell'indice per la versione e la collazione del
+    vocabolario ('data/vocabolario.sym' -> 'data/vocabolario.<versione>.<collazione>.sym'):
+    una nuova versione non sovrascrive mai il file mappato dai worker in esecuzione.
+    """
+    radice, estensione = os.path.splitext(file_path)
+    return f"{radice}.{vocabolario.versione}.{vocabolario.collazione}{estensione}"
+
+def compila_indice_ortografico(file_path: str, vocabolario: VocabularyIndex) -> str:
+    """
+    Costruisce e salva l'indice ortografico del vocabolario (python abaco_data.py
+    compila, prima di pubblicare il dizionario binario).
+
+    Returns:
+        Il percorso dell'indice scritto.
+    """
+    destinazione = percorso_indice(file_path, vocabolario)
+    SpellingIndex.costruisci(vocabolario).salva(destinazione)
+    return destinazione
+
+def elimina_indici_precedenti(file_path: str, vocabolario: VocabularyIndex):
+    """
+    Elimina gli indici delle altre versioni del vocabolario: i worker che li
+    hanno già mappati continuano a leggerli finché non li chiudono.
+    """
+    corrente = percorso_indice(file_path, vocabolario)
+    radice, estensione = os.path.splitext(file_path)
+    for vecchio in glob.glob(f"{glob.escape(radice)}.*{estensione}"):
+        if vecchio != corrente:
+            try:
+                os.remove(vecchio)
+            except OSError:
+                pass
+
+def carica_indice_ortografico(file_path: Optional[str], vocabolario: VocabularyIndex) -> Optional[SpellingIndex]:
+    """
+    Mappa l'indice ortografico compilato per la versione e la collazione del
+    vocabolario. L'indice non viene mai costruito qui (richiederebbe secondi
+    e centinaia di MB in ogni worker): se manca, la partita non offre
+    suggerimenti finché non si esegue python abaco_data.py compila.
+
+    Args:
+        file_path: Il percorso base del file dell'indice (opzionale).
+        vocabolario: Il vocabolario a cui l'indice deve corrispondere.
+
+    Returns:
+        L'indice ortografico, oppure None se non è disponibile.
+    """
+    if not file_path:
+        return None
+    percorso = percorso_indice(file_path, vocabolario)
+    try:
+        return SpellingIndex.carica(percorso, vocabolario)
+    except FileNotFoundError:
+        logger.warning("Indice ortografico non compilato per la versione %s: suggerimenti disattivati",
+                       vocabolario.versione)
+    except ValueError as e:
+        logger.warning("Indice ortografico ignorato: %s", e)
+    return None
@@ -0,0 +1,431 @@
+document.addEventListener('DOMContentLoaded', function () {
+    const guessForm = document.getElementById('guess-form');
+    const parolaInput = document.getElementById('parola-input');
+    const risultatoContainer = document.getElementById('risultato-container');
+    const parolaMinimaElem = document.getElementById('parola-minima');
+    const parolaMassimaElem = document.getElementById('parola-massima');
+    const numeroTentativiElem = document.getElementById('numero-tentativi');
+    const paroleRimasteElem = document.getElementById('parole-rimaste');
+    const restartBtn = document.getElementById('restart-btn');
+    const surrenderBtn = document.getElementById('surrender-btn');
+    const hintBtn = document.getElementById('hint-btn');
+    const customWordLink = document.getElementById('custom-word-link');
+    const alphabetHelper = document.getElementById('alphabet-helper');
+    const timerElem = document.getElementById('timer');
+    const prefixText = document.getElementById('prefix-text');
+    // Stato della partita inserito dal server nella pagina (il resto è statico)
+    const statoIniziale = JSON.parse(document.getElementById('stato-iniziale').textContent);
+    let timerInterval = null;
+    let timerStart = null;
+    let currentHintPrefix = '';
+    let currentDictionary = statoIniziale.dizionario;
+    // Versione del vocabolario della partita: fa parte dell'URL dei prefissi
+    let currentVersion = statoIniziale.versione;
+    const dizionarioSelect = document.getElementById('dizionario-select');
+
+    // Mostra la scelta del dizionario solo se ne è configurato più di uno
+    fetch('/dizionari')
+        .then(response => response.json())
+        .then(data => {
+            if (data.dizionari.length < 2) return;
+            data.dizionari.forEach(dizionario => {
+                const option = document.createElement('option');
+                option.value = dizionario.id;
+                option.textContent = dizionario.nome;
+                option.selected = dizionario.id === currentDictionary;
+                dizionarioSelect.appendChild(option);
+            });
+            dizionarioSelect.classList.remove('d-none');
+        })
+        .catch(error => console.error('Errore nel caricamento dei dizionari:', error));
+
+    // --- Timer Functions ---
+    function formatTime(seconds) {
+        const mins = Math.floor(seconds / 60).toString().padStart(2, '0');
+        const secs = Math.floor(seconds % 60).toString().padStart(2, '0');
+        return `${mins}:${secs}`;
+    }
+
+    // Il timer scorre sul client a partire dal tempo trascorso indicato
+    // dal server, senza interrogarlo a ogni secondo
+    function startTimer(elapsedSeconds = 0) {
+        if (timerInterval) clearInterval(timerInterval);
+        timerStart = Date.now() - elapsedSeconds * 1000;
+        timerElem.textContent = formatTime(elapsedSeconds);
+        timerInterval = setInterval(() => {
+            timerElem.textContent = formatTime((Date.now() - timerStart) / 1000);
+        }, 1000);
+    }
+
+    // Ferma il timer; a fine partita mostra il tempo calcolato dal server
+    function stopTimer(elapsedSeconds) {
+        clearInterval(timerInterval);
+        timerInterval = null;
+        if (elapsedSeconds !== undefined) {
+            timerElem.textContent = formatTime(elapsedSeconds);
+        }
+    }
+
+    // --- Autocompletamento ---
+    // Chiede i suggerimenti solo quando l'utente smette di scrivere
+    // e annulla la richiesta precedente ancora in corso
+    const suggerimentiElem = document.getElementById('suggerimenti');
+    let suggestTimeout = null;
+    let suggestController = null;
+
+    parolaInput.addEventListener('input', function () {
+        clearTimeout(suggestTimeout);
+        const q = parolaInput.value.trim().toLowerCase();
+        if (!q) {
+            suggerimentiElem.innerHTML = '';
+            return;
+        }
+        suggestTimeout = setTimeout(() => fetchSuggestions(q), 150);
+    });
+
+    function fetchSuggestions(q) {
+        if (suggestController) suggestController.abort();
+        suggestController = new AbortController();
+        fetch(`/suggest?${new URLSearchParams({ q: q })}`, { signal: suggestController.signal })
+            .then(response => response.json())
+            .then(data => {
+                suggerimentiElem.innerHTML = '';
+                data.suggerimenti.forEach(parola => {
+                    const option = document.createElement('option');
+                    option.value = parola;
+                    suggerimentiElem.appendChild(option);
+                });
+            })
+            .catch(error => {
+                if (error.name !== 'AbortError') console.error('Errore nei suggerimenti:', error);
+            });
+    }
+
+    updateGameState(statoIniziale);
+    updateAlphabetHelper(statoIniziale.parola_minima, statoIniziale.parola_massima);
+    if (!statoIniziale.game_over) startTimer(statoIniziale.elapsed_time);
+
+    guessForm.addEventListener('submit', function (e) {
+        e.preventDefault();
+        const parola = parolaInput.value.trim().toLowerCase();
+        if (parola) submitGuess(parola);
+    });
+
+    restartBtn.addEventListener('click', function() {
+        const body = dizionarioSelect.value ? { dizionario: dizionarioSelect.value } : {};
+        fetch('/restart', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body),
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                alert('Errore nel riavvio: ' + data.error);
+                return;
+            }
+            updateGameState(data);
+            displayResult('Nuova partita iniziata!', 'alert-info');
+            parolaInput.value = '';
+            parolaInput.disabled = false;
+            guessForm.querySelector('button').disabled = false;
+            surrenderBtn.disabled = false;
+            hintBtn.disabled = false;
+            currentHintPrefix = ''; // Reset hint prefix
+            updateAlphabetHelper(data.parola_minima, data.parola_massima);
+            startTimer(0);
+        });
+    });
+
+    hintBtn.addEventListener('click', function() {
+        // Indizio e prefissi del nuovo range in un'unica richiesta
+        postBatch([{ azione: 'hint' }, ...prefixesAction()])
+        .then(([data, prefissi]) => {
+            if (data.error) {
+                displayResult(data.error, 'alert-danger');
+                return;
+            }
+            displayResult(data.messaggio, 'alert-info');
+
+            // Aggiorna il prefisso rivelato
+            if (data.prefisso_rivelato) {
+                currentHintPrefix = data.prefisso_rivelato;
+                updateCommonPrefix(data.parola_minima, data.parola_massima);
+            }
+
+            // Aggiorna il range del gioco
+            if (data.parola_minima && data.parola_massima) {
+                updateGameState(data);
+                // Aggiorna l'alfabeto ausiliario con il nuovo range
+                updateAlphabetHelper(data.parola_minima, data.parola_massima, prefissi);
+            }
+        })
+        .catch(error => displayResult(error.message, error.limiteFrequenza ? 'alert-warning' : 'alert-danger'));
+    });
+
+    surrenderBtn.addEventListener('click', function() {
+        fetch('/surrender', { method: 'POST' })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                displayResult(data.error, 'alert-danger');
+                return;
+            }
+            displayResult(data.risultato, 'alert-warning');
+            parolaInput.disabled = true;
+            guessForm.querySelector('button').disabled = true;
+            surrenderBtn.disabled = true;
+            hintBtn.disabled = true;
+            stopTimer();
+        });
+    });
+
+    const customWordModal = new bootstrap.Modal(document.getElementById('customWordModal'));
+    const customWordInput = document.getElementById('custom-word-input');
+    const confirmCustomWord = document.getElementById('confirm-custom-word');
+    const customWordError = document.getElementById('custom-word-error');
+
+    customWordLink.addEventListener('click', function(e) {
+        e.preventDefault();
+        customWordInput.value = '';
+        customWordError.classList.add('d-none');
+        customWordModal.show();
+    });
+
+    confirmCustomWord.addEventListener('click', function() {
+        const customWord = customWordInput.value.trim();
+        if (!customWord) {
+            customWordError.textContent = 'Per favore inserisci una parola.';
+            customWordError.classList.remove('d-none');
+            return;
+        }
+
+        fetch('/set-custom-word', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ parola: customWord.toLowerCase() }),
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                customWordError.textContent = data.error;
+                customWordError.classList.remove('d-none');
+                return;
+            }
+            customWordModal.hide();
+            updateGameState(data);
+            displayResult('Nuova partita con parola personalizzata iniziata!', 'alert-info');
+            parolaInput.value = '';
+            parolaInput.disabled = false;
+            guessForm.querySelector('button').disabled = false;
+            surrenderBtn.disabled = false;
+            hintBtn.disabled = false;
+            currentHintPrefix = ''; // Reset hint prefix
+            updateAlphabetHelper(data.parola_minima, data.parola_massima);
+            startTimer(0);
+        });
+    });
+
+    // Permetti di confermare con Enter nel modal
+    customWordInput.addEventListener('keypress', function(e) {
+        if (e.key === 'Enter') {
+            confirmCustomWord.click();
+        }
+    });
+
+    // Esegue più azioni sulla partita con una sola richiesta a /batch;
+    // restituisce i risultati nello stesso ordine delle azioni
+    function postBatch(azioni) {
+        return fetch('/batch', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ azioni: azioni }),
+        })
+        .then(response => {
+            // Limite di frequenza: invita a rallentare, con l'attesa indicata dal server
+            if (response.status === 429) {
+                const secondi = parseInt(response.headers.get('Retry-After'), 10);
+                const attesa = secondi > 0 ? `tra ${secondi} secondi` : 'tra qualche istante';
+                const errore = new Error(`Troppe richieste: rallenta e riprova ${attesa}.`);
+                errore.limiteFrequenza = true;
+                throw errore;
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.error) throw new Error(data.error);
+            return data.risultati;
+        });
+    }
+
+    // L'alfabeto ausiliario è sempre nella pagina, ma su mobile la sua colonna
+    // è nascosta (d-none d-lg-block): offsetParent è null se non è visualizzato
+    function alphabetHelperVisible() {
+        return alphabetHelper !== null && alphabetHelper.offsetParent !== null;
+    }
+
+    // I prefissi servono solo se l'alfabeto ausiliario è visibile (non su mobile)
+    function prefixesAction() {
+        return alphabetHelperVisible() ? [{ azione: 'prefixes' }] : [];
+    }
+
+    function submitGuess(parola) {
+        // Tentativo e prefissi del nuovo range in un'unica richiesta
+        postBatch([{ azione: 'guess', parola: parola }, ...prefixesAction()])
+        .then(([data, prefissi]) => {
+            if (data.error) {
+                displayResult(data.error, 'alert-danger');
+                return;
+            }
+
+            updateGameState(data);
+            displayResult(data.risultato, getAlertClass(data.risultato));
+            if (data.suggerimenti && data.suggerimenti.length) showSpellingSuggestions(data.suggerimenti);
+            updateAlphabetHelper(data.parola_minima, data.parola_massima, prefissi);
+
+            if (data.game_over) {
+                parolaInput.disabled = true;
+                guessForm.querySelector('button').disabled = true;
+                surrenderBtn.disabled = true;
+                stopTimer(data.elapsed_time);
+            } else {
+                // Riallinea il timer locale al tempo del server
+                startTimer(data.elapsed_time);
+            }
+            parolaInput.value = '';
+        })
+        .catch(error => {
+            console.error('Errore:', error);
+            if (error.limiteFrequenza) {
+                displayResult(error.message, 'alert-warning');
+            } else {
+                displayResult('Si è verificato un errore di comunicazione con il server.', 'alert-danger');
+            }
+        });
+    }
+
+    function updateGameState(data) {
+        parolaMinimaElem.textContent = data.parola_minima;
+        parolaMassimaElem.textContent = data.parola_massima;
+        numeroTentativiElem.textContent = data.numero_tentativi;
+        if (data.parole_rimaste !== undefined) paroleRimasteElem.textContent = data.parole_rimaste;
+        if (data.dizionario) currentDictionary = data.dizionario;
+        if (data.versione) currentVersion = data.versione;
+    }
+
+    function displayResult(message, alertClass) {
+        risultatoContainer.innerHTML = `<div class="alert ${alertClass} mb-0" role="alert">${message}</div>`;
+        // Rimuovi automaticamente il messaggio dopo 10 secondi per messaggi non critici
+        if (!message.includes('indovinato') && !message.includes('arreso')) {
+            setTimeout(() => {
+                if (risultatoContainer.innerHTML.includes(message)) {
+                    risultatoContainer.innerHTML = '';
+                }
+            }, 10000);
+        }
+    }
+
+    // Aggiunge al messaggio i suggerimenti "forse cercavi" cliccabili
+    function showSpellingSuggestions(suggerimenti) {
+        const alertElem = risultatoContainer.querySelector('.alert');
+        if (!alertElem) return;
+        const riga = document.createElement('div');
+        riga.className = 'mt-2';
+        riga.append('Forse cercavi: ');
+        suggerimenti.forEach(parola => {
+            const link = document.createElement('a');
+            link.href = '#';
+            link.className = 'me-2';
+            link.textContent = parola;
+            link.addEventListener('click', function (e) {
+                e.preventDefault();
+                parolaInput.value = parola;
+                parolaInput.focus();
+            });
+            riga.appendChild(link);
+        });
+        alertElem.appendChild(riga);
+    }
+
+    function getAlertClass(risultato) {
+        if (risultato.includes('indovinato')) return 'alert-success';
+        if (risultato.includes('non è una parola valida') || risultato.includes('non è compresa')) return 'alert-warning';
+        if (risultato.includes('esaurito i tentativi') || risultato.includes('arreso')) return 'alert-danger';
+        return 'alert-info';
+    }
+
+    // Con `prefissi` (risultato dell'azione prefixes di /batch) non serve
+    // un'altra richiesta; altrimenti li chiede a /get-alphabet-prefixes
+    function updateAlphabetHelper(minWord, maxWord, prefissi) {
+        console.log("Updating alphabet with:", minWord, maxWord);
+        const alphabetHelper = document.getElementById('alphabet-helper');
+
+        if (!alphabetHelperVisible()) return; // Alfabeto nascosto (mobile): niente richieste
+
+        // Calcola e mostra il prefisso comune
+        updateCommonPrefix(minWord, maxWord);
+
+        // Chiama l'API per ottenere i prefissi filtrati (in GET, così
+        // browser e proxy possono riusare le risposte)
+        const params = new URLSearchParams({
+            min_word: minWord, max_word: maxWord, dizionario: currentDictionary, versione: currentVersion,
+        });
+        const richiesta = prefissi && !prefissi.error
+            ? Promise.resolve(prefissi)
+            : fetch(`/get-alphabet-prefixes?${params}`).then(response => response.json());
+        richiesta
+        .then(data => {
+            let content = '<ul>';
+            content += `<li><strong class="word-bound">${minWord}</strong></li>`;
+
+            if (data.prefixes && data.prefixes.length > 0) {
+                data.prefixes.forEach(prefix => {
+                    content += `<li>  ${prefix}</li>`;
+                });
+            } else if (minWord !== maxWord) {
+                // Se non ci sono prefissi ma le parole sono diverse, mostra almeno qualcosa
+                content += '<li>  ...</li>';
+            }
+
+            content += `<li><strong class="word-bound">${maxWord}</strong></li>`;
+            content += '</ul>';
+            alphabetHelper.innerHTML = content;
+        })
+        .catch(error => {
+            console.error('Errore nel caricamento dei prefissi:', error);
+            // In caso di errore, mostra solo le parole limite
+            let content = '<ul>';
+            content += `<li><strong class="word-bound">${minWord}</strong></li>`;
+            content += '<li>  ...</li>';
+            content += `<li><strong class="word-bound">${maxWord}</strong></li>`;
+            content += '</ul>';
+            alphabetHelper.innerHTML = content;
+        });
+    }
+
+    function updateCommonPrefix(minWord, maxWord) {
+        if (!prefixText) return;
+
+        // Calcola il prefisso comune
+        let lcpLen = 0;
+        while (lcpLen < minWord.length && lcpLen < maxWord.length && minWord[lcpLen] === maxWord[lcpLen]) {
+            lcpLen++;
+        }
+
+        if (lcpLen > 0) {
+            // Combina il prefisso comune con eventuali lettere rivelate dall'indizio
+            let prefix = minWord.substring(0, lcpLen);
+            if (currentHintPrefix && currentHintPrefix.length > prefix.length) {
+                prefix = currentHintPrefix;
+            }
+            prefixText.textContent = prefix + '...';
+        } else {
+            // Reset if no common prefix (unless we have a hint)
+            if (currentHintPrefix) {
+                prefixText.textContent = currentHintPrefix + '...';
+            } else {
+                prefixText.textContent = '-';
+            }
+        }
+    }
+});
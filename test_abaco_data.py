@@ -0,0 +1,80 @@
+import pytest
+
+from abaco_data import (
+    DictionaryRegistry, DictionaryVersion, VocabularyHolder, VocabularyIndex, carica_dizionario_binario,
+    compila_dizionario,
+)
+
+PAROLE = ['abaco', 'casa', 'cassa', 'citta', 'città', 'cittadino', 'cosa', 'zuzzurellone']
+
+
+def test_indice_ricerche_per_intervallo_e_prefisso():
+    indice = VocabularyIndex(PAROLE, collazione='codepoint')
+    assert 'casa' in indice and 'caso' not in indice
+    assert indice.count_between('casa', 'cosa') == 6
+    assert indice.completions('ca', 'abaco', 'zuzzurellone', 1) == (['casa'], True)
+    assert indice.completions('ca', 'abaco', 'zuzzurellone', 5, dopo='casa') == (['cassa'], False)
+
+
+def test_collazione_italiana():
+    assert VocabularyIndex(PAROLE, collazione='codepoint').parole[3:6] == ['citta', 'cittadino', 'città']
+    indice = VocabularyIndex(PAROLE, collazione='italiano')
+    assert indice.parole[3:6] == ['citta', 'città', 'cittadino']
+    # Il prefisso senza accenti comprende anche le forme accentate
+    assert indice.completions('citta', 'abaco', 'zuzzurellone', 5)[0] == ['citta', 'città', 'cittadino']
+
+
+@pytest.mark.parametrize('collazione', ['codepoint', 'italiano'])
+def test_dizionario_binario(tmp_path, collazione):
+    vocabolario_path = tmp_path / 'vocabolario.txt'
+    vocabolario_path.write_text('\n'.join(PAROLE), encoding='utf-8')
+    parole_path = tmp_path / 'parole.txt'
+    parole_path.write_text('casa\ncosa\n', encoding='utf-8')
+    binario = str(tmp_path / 'vocabolario.bin')
+
+    versione = compila_dizionario(str(vocabolario_path), str(parole_path), binario, collazione)
+    vocabolario, parole_da_indovinare = carica_dizionario_binario(binario)
+    atteso = VocabularyIndex(PAROLE, collazione=collazione)
+    assert vocabolario.versione == versione == atteso.versione
+    assert list(vocabolario.parole) == atteso.parole
+    assert list(vocabolario.chiavi) == list(atteso.chiavi)
+    assert 'città' in vocabolario and 'citt' not in vocabolario
+    assert sorted(parole_da_indovinare) == ['casa', 'cosa']
+
+    altra = 'italiano' if collazione == 'codepoint' else 'codepoint'
+    with pytest.raises(ValueError):
+        carica_dizionario_binario(binario, altra)
+
+
+def test_dizionario_binario_troncato(tmp_path):
+    binario = tmp_path / 'vocabolario.bin'
+    binario.write_bytes(b'ABACO')
+    with pytest.raises(ValueError):
+        carica_dizionario_binario(str(binario))
+
+
+def test_ricarica_mantiene_le_versioni_precedenti():
+    elenchi = iter([PAROLE, PAROLE + ['mare'], PAROLE + ['mare', 'monte']])
+    holder = VocabularyHolder(
+        lambda: DictionaryVersion(VocabularyIndex(next(elenchi)), ['casa', 'cosa']), max_versioni=2,
+    )
+    prima = holder.corrente
+    nuova = holder.ricarica()
+    assert holder.corrente is nuova and nuova.versione != prima.versione
+    assert holder.versione(prima.versione) is prima
+    holder.ricarica()
+    # Oltre max_versioni la versione più vecchia esce dalla memoria
+    assert holder.versione(prima.versione) is None
+    assert holder.versioni() == [nuova.versione, holder.corrente.versione]
+
+
+def test_registro_controlla_solo_il_binario_compilato(tmp_path):
+    configurazione = {
+        'vocabolario': str(tmp_path / 'vocabolario.txt'), 'parole': str(tmp_path / 'parole.txt'),
+        'binario': str(tmp_path / 'vocabolario.bin'),
+    }
+    registro = DictionaryRegistry(
+        {'it': configurazione}, lambda _, __: DictionaryVersion(VocabularyIndex(PAROLE), ['casa']), predefinito='it',
+    )
+    # I file di testo modificati non ricaricano nulla finché compila non pubblica il binario
+    assert registro.get('it').sorgenti == (configurazione['binario'],)
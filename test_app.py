@@ -0,0 +1,130 @@
+import math
+
+import pytest
+
+import app as modulo_app
+from ratelimit import MemoryRateLimiter
+
+
+@pytest.fixture
+def client():
+    return modulo_app.app.test_client()
+
+
+@pytest.fixture
+def limiti(monkeypatch):
+    """Limiti di frequenza in memoria, stretti per la sessione e ampi per l'IP."""
+    limitatore = MemoryRateLimiter()
+    monkeypatch.setattr(modulo_app, 'limitatore', limitatore)
+    monkeypatch.setattr(modulo_app, 'LIMITE_SESSIONE', (3, 0.01))
+    monkeypatch.setattr(modulo_app, 'LIMITE_IP', (1000, 0.01))
+    return limitatore
+
+
+def test_limite_sessione_risponde_429(client, limiti):
+    client.get('/')
+    for _ in range(3):
+        assert client.get('/status').status_code == 200
+    risposta = client.get('/status')
+    assert risposta.status_code == 429
+    assert int(risposta.headers['Retry-After']) >= 1
+    assert 'error' in risposta.get_json()
+
+
+def test_ip_non_addebitato_se_la_sessione_respinge(client, limiti, monkeypatch):
+    monkeypatch.setattr(modulo_app, 'LIMITE_IP', (6, 0.01))
+    client.get('/')  # 2 gettoni dell'IP, nessuna sessione ancora
+    for _ in range(3):
+        client.get('/status')  # 3 gettoni dell'IP e della sessione
+    for _ in range(5):
+        assert client.get('/status').status_code == 429
+    # All'IP resta un gettone: un altro giocatore dello stesso indirizzo passa
+    assert modulo_app.app.test_client().get('/status').status_code == 200
+
+
+def test_route_escluse_dai_limiti(client, limiti, monkeypatch):
+    monkeypatch.setattr(modulo_app, 'LIMITE_IP', (1, 0.01))
+    for _ in range(3):
+        assert client.get('/metrics').status_code == 200
+
+
+def test_batch_esegue_le_azioni_in_ordine(client):
+    client.get('/')
+    risposta = client.post('/batch', json={'azioni': [
+        {'azione': 'guess', 'parola': 'casa'}, {'azione': 'prefixes'}, {'azione': 'volare'},
+    ]})
+    assert risposta.status_code == 200
+    tentativo, prefissi, sconosciuta = risposta.get_json()['risultati']
+    assert tentativo['status'] == 200 and tentativo['numero_tentativi'] == 1
+    # I prefissi sono calcolati sul range aggiornato dal tentativo
+    assert prefissi['parola_minima'] == tentativo['parola_minima']
+    assert prefissi['parola_massima'] == tentativo['parola_massima']
+    assert sconosciuta['status'] == 400
+    assert client.get('/status').status_code == 200
+
+
+def test_batch_rifiuta_troppe_azioni(client):
+    azioni = [{'azione': 'status'}] * (modulo_app.BATCH_MAX_AZIONI + 1)
+    assert client.post('/batch', json={'azioni': azioni}).status_code == 400
+    assert client.post('/batch', json={}).status_code == 400
+
+
+def test_corpo_json_non_oggetto_risponde_400(client, limiti, monkeypatch):
+    # Con i limiti attivi anche il costo di /batch legge il corpo
+    monkeypatch.setattr(modulo_app, 'LIMITE_SESSIONE', (100, 0.01))
+    client.get('/')
+    for route in ('/batch', '/restart', '/guess'):
+        risposta = client.post(route, json=[1])
+        assert risposta.status_code == 400 and 'error' in risposta.get_json()
+
+
+def test_tentativo_vincente_guadagna_i_bit_rimasti(client):
+    prima = client.post('/set-custom-word', json={'parola': 'casa'}).get_json()['parole_rimaste']
+    risposta = client.post('/guess', json={'parola': 'casa'}).get_json()
+    assert risposta['vincitore'] and risposta['parole_rimaste'] == 1
+    assert risposta['bit_guadagnati'] == round(math.log2(prima), 3) > 0
+
+
+def test_suggest_senza_sessione_non_crea_partite(client):
+    risposta = client.get('/suggest?q=ca')
+    assert risposta.get_json() == {'suggerimenti': [], 'cursor': None}
+    assert client.get_cookie('session') is None
+    client.get('/')
+    parole = client.get('/suggest?q=ca&k=3').get_json()['suggerimenti']
+    assert len(parole) == 3 and all(parola.startswith('ca') for parola in parole)
+
+
+def test_classifica_limita_k_e_nasconde_le_parole(client):
+    modulo_app.archivio_punteggi.registra('casa', 3, 0, 10.0)
+    globale = client.get('/classifica?k=-5').get_json()['classifica']
+    assert 1 <= len(globale) <= modulo_app.archivio_punteggi.leaderboard.k
+    assert all('parola' not in voce for voce in globale)
+    assert client.get('/classifica?k=100000').status_code == 200
+    per_parola = client.get('/classifica?parola=casa').get_json()['classifica']
+    assert per_parola and per_parola[0]['parola'] == 'casa'
+
+
+def test_prefissi_dalla_versione_della_partita(client, monkeypatch):
+    from collections import OrderedDict
+
+    from abaco_data import DictionaryVersion, VocabularyIndex
+
+    holder = modulo_app.dizionari.get()
+    monkeypatch.setattr(holder, 'corrente', holder.corrente)
+    monkeypatch.setattr(holder, '_versioni', OrderedDict(holder._versioni))
+    client.get('/')
+    versione_partita = holder.corrente.versione
+
+    # Ricarica a caldo con un vocabolario diverso
+    ridotto = VocabularyIndex(['abaco', 'casa', 'cosa', 'zuzzurellone'])
+    monkeypatch.setattr(holder, '_caricatore', lambda: DictionaryVersion(ridotto, ['casa', 'cosa']))
+    holder.ricarica()
+    assert holder.corrente.versione != versione_partita
+
+    url = '/get-alphabet-prefixes?min_word=casa&max_word=cosa'
+    della_partita = client.get(url)
+    assert della_partita.get_json() == client.get(f"{url}&versione={versione_partita}").get_json()
+    assert 'private' in della_partita.headers['Cache-Control']
+    nuova = modulo_app.app.test_client().get(url)
+    assert nuova.get_json() != della_partita.get_json()
+    assert nuova.headers['ETag'] != della_partita.headers['ETag']
@@ -0,0 +1,32 @@
+import os
+
+from events import EventLog, leggi_eventi, pota_registri, statistiche
+
+
+def test_eventi_scritti_e_letti(tmp_path):
+    registro = EventLog(str(tmp_path / 'eventi.jsonl'))
+    registro.registra('partita_iniziata', 'abcd1234')
+    registro.registra('vittoria', 'abcd1234', tentativi=4, indizi=1, tempo=12.5)
+    registro.chiudi()
+    riepilogo = statistiche(leggi_eventi([registro.path]))
+    assert riepilogo['partite_iniziate'] == 1
+    assert riepilogo['vittorie'] == 1
+    assert riepilogo['tentativi_medi'] == 4
+
+
+def test_pota_registri_dei_worker_terminati(tmp_path):
+    modello = str(tmp_path / 'eventi-{pid}.jsonl')
+    # pid sicuramente non attivi (oltre il massimo di Linux), dal più vecchio
+    morti = [modello.format(pid=4194304 + i) for i in range(3)]
+    for i, file_path in enumerate(morti):
+        with open(file_path, 'w') as f:
+            f.write('x' * 100)
+        os.utime(file_path, (1000 + i, 1000 + i))
+    attivo = modello.format(pid=os.getpid())
+    with open(attivo, 'w') as f:
+        f.write('x' * 100)
+    os.utime(attivo, (0, 0))
+
+    eliminati = pota_registri(modello, 250)
+    assert eliminati == morti[:2]
+    assert os.path.exists(morti[2]) and os.path.exists(attivo)
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from abaco_data import VocabularyIndex
+from game_logic import AbacoGame
+
+VOCABOLARIO = VocabularyIndex(['abaco', 'casa', 'cosa', 'mare', 'zuzzurellone'])
+
+
+def test_tentativi_restringono_il_range():
+    game = AbacoGame('cosa', VOCABOLARIO)
+    assert game.processa_tentativo('casa', 'test').startswith('DOPO')
+    assert game.parola_minima == 'casa'
+    assert game.processa_tentativo('mare', 'test').startswith('PRIMA')
+    assert game.parola_massima == 'mare'
+    # Una parola fuori dal range non conta come tentativo
+    assert 'non è compresa' in game.processa_tentativo('abaco', 'test')
+    assert game.numero_tentativi == 2
+    game.processa_tentativo('cosa', 'test')
+    assert game.game_over and game.vincitore == 'test'
+    assert game.parole_rimaste() == 1
+
+
+def test_stato_serializzabile():
+    game = AbacoGame('cosa', VOCABOLARIO)
+    game.processa_tentativo('casa', 'test')
+    stato = json.loads(json.dumps(game.to_state()))
+    assert AbacoGame.versione_stato(stato) == (game.dizionario, VOCABOLARIO.versione)
+    ripristinata = AbacoGame.from_state(stato, VOCABOLARIO)
+    assert ripristinata.to_state() == game.to_state()
+
+
+def test_stato_con_formato_diverso_scartato():
+    stato = AbacoGame('cosa', VOCABOLARIO).to_state()
+    assert AbacoGame.versione_stato(stato[1:]) == (None, None)
+    with pytest.raises(ValueError):
+        AbacoGame.from_state(stato[1:], VOCABOLARIO)
+    with pytest.raises(ValueError):
+        AbacoGame.from_state((0,) + tuple(stato[1:]), VOCABOLARIO)
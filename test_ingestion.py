@@ -0,0 +1,19 @@
+from ingestion import filtra_parole, ingerisci, normalizza_parola
+
+
+def test_normalizza_apostrofo_come_accento():
+    assert normalizza_parola("citta'") == 'città'
+    assert normalizza_parola("Perche’") == 'perché'
+    assert normalizza_parola("po'") == "po'"
+
+
+def test_filtra_mantiene_i_troncamenti():
+    parole = ["po'", "be'", "l'acqua", 'casa', 'c4sa']
+    assert list(filtra_parole(parole)) == ["po'", "be'", 'casa']
+
+
+def test_ingerisci_mantiene_i_troncamenti(tmp_path):
+    elenco = tmp_path / 'parole.txt'
+    elenco.write_text("perche'\narcobaleno\npo'\nè\ncitta'\n", encoding='utf-8')
+    parole = ingerisci(str(elenco), cartella_cache=None)
+    assert parole == ['arcobaleno', 'città', 'perché', "po'", 'è']
@@ -0,0 +1,34 @@
+import pytest
+
+from ratelimit import MemoryRateLimiter, RateLimiter, SQLiteRateLimiter, crea_rate_limiter, leggi_limite
+
+
+def test_leggi_limite():
+    assert leggi_limite('60:2') == (60.0, 2.0)
+    with pytest.raises(ValueError):
+        leggi_limite('0:1')
+
+
+def test_interfaccia_astratta():
+    with pytest.raises(TypeError):
+        RateLimiter()
+
+
+def test_disattivato_di_default(monkeypatch):
+    monkeypatch.delenv('RATE_LIMIT_STORE', raising=False)
+    assert crea_rate_limiter() is None
+    assert isinstance(crea_rate_limiter('memory'), MemoryRateLimiter)
+    with pytest.raises(ValueError):
+        crea_rate_limiter('redis://localhost')
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_secchio_si_esaurisce(backend, tmp_path):
+    limitatore = MemoryRateLimiter() if backend == 'memory' else SQLiteRateLimiter(str(tmp_path / 'rl.db'))
+    limite = (3, 0.5)
+    assert limitatore.consuma('ip:1', 2, limite) == 0
+    assert limitatore.consuma('ip:1', 1, limite) == 0
+    attesa = limitatore.consuma('ip:1', 1, limite)
+    assert 0 < attesa <= 2
+    # Gli altri secchi non sono toccati
+    assert limitatore.consuma('ip:2', 3, limite) == 0
@@ -0,0 +1,23 @@
+import random
+
+import pytest
+
+from abaco_data import VocabularyIndex
+from simulatore import STRATEGIE, Contesto, gioca_partita
+
+VOCABOLARIO = VocabularyIndex(['abaco', 'barca', 'casa', 'cosa', 'mare', 'neve', 'zuzzurellone'])
+
+
+@pytest.mark.parametrize('strategia', sorted(STRATEGIE))
+def test_partite_vinte(strategia):
+    # 'treno' è tra le parole comuni ma non nel vocabolario: non va mai tentata
+    contesto = Contesto(VOCABOLARIO, ['barca', 'mare', 'neve', 'treno'])
+    for parola in ('barca', 'mare', 'neve'):
+        tentativi, _, vinta = gioca_partita(parola, contesto, STRATEGIE[strategia], random.Random(0))
+        assert vinta and 1 <= tentativi <= len(VOCABOLARIO)
+
+
+def test_parola_segreta_fuori_dal_vocabolario():
+    contesto = Contesto(VOCABOLARIO, ['treno'])
+    with pytest.raises(ValueError):
+        gioca_partita('treno', contesto, STRATEGIE['comuni'], random.Random(0))
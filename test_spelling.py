@@ -0,0 +1,46 @@
+import os
+
+from abaco_data import VocabularyIndex
+from spelling import (
+    SpellingIndex, carica_indice_ortografico, compila_indice_ortografico, distanza_limitata,
+    elimina_indici_precedenti, percorso_indice,
+)
+
+
+def _indice(collazione):
+    parole = ['abaco', 'citta', 'città', 'cittadino', 'zuzzurellone']
+    return SpellingIndex.costruisci(VocabularyIndex(parole, collazione=collazione))
+
+
+def test_distanza_limitata():
+    assert distanza_limitata('casa', 'cosa', 2) == 1
+    assert distanza_limitata('casa', 'caso', 2) == 1
+    assert distanza_limitata('casa', 'zebra', 2) is None
+
+
+def test_suggerimenti_nel_range_prima():
+    assert _indice('codepoint').suggerimenti('citto', 'abaco', 'città') == ['citta', 'città']
+
+
+def test_suggerimenti_range_con_collazione_italiana():
+    # Con 'italiano' città viene prima di cittadino e dopo citta, come nella partita
+    assert _indice('italiano').suggerimenti('citto', 'città', 'cittadino') == ['città', 'citta']
+
+def test_indice_per_versione_caricato_solo_se_compilato(tmp_path):
+    vocabolario = VocabularyIndex(['casa', 'cosa', 'mare'])
+    base = str(tmp_path / 'vocabolario.sym')
+    # Senza indice compilato nessun worker lo costruisce: niente suggerimenti
+    assert carica_indice_ortografico(base, vocabolario) is None
+    assert not os.listdir(tmp_path)
+
+    percorso = compila_indice_ortografico(base, vocabolario)
+    assert vocabolario.versione in percorso
+    indice = carica_indice_ortografico(base, vocabolario)
+    assert indice.suggerimenti('csa', 'a', 'z', 5)[0] in ('casa', 'cosa')
+
+    # Una nuova versione ha un file proprio; quello precedente viene poi rimosso
+    nuovo = VocabularyIndex(['casa', 'cosa', 'mare', 'remo'])
+    assert carica_indice_ortografico(base, nuovo) is None
+    compila_indice_ortografico(base, nuovo)
+    elimina_indici_precedenti(base, nuovo)
+    assert os.listdir(tmp_path) == [os.path.basename(percorso_indice(base, nuovo))]